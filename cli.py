@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Command line interface for the Assignment Grader.
+
+Runs ingestion, statistics, grade export and batch ingestion without the
+GUI, so assignments can be processed by scripts and scheduled jobs. Each
+command writes its result to stdout as one JSON object, progress messages
+go to stderr, and the exit code tells whether the command succeeded.
+Nothing here imports Tkinter.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+from core.assignment import Assignment
+from core.batch_runner import BatchRunner, DEFAULT_MAX_CONCURRENT, discover_assignment_pairs, summarize_assignment
+from core.file_processor import DEFAULT_READ_AHEAD
+from core.running_statistics import RunningStatistics
+from core.session_store import SessionStore, count_graded_submissions
+from core.statistics import StatisticsCalculator
+from utils.parse_cache import ParseCache
+
+
+# Exit codes (argparse exits with 2 for invalid arguments)
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_PARSE_ERRORS = 3
+
+DEFAULT_BINS = 10
+
+
+def build_parser():
+    """
+    Build the argument parser with the ingest, stats, export and batch subcommands.
+
+    Returns:
+        argparse.ArgumentParser: The parser
+    """
+    # Where the submissions come from, shared by all subcommands
+    source = argparse.ArgumentParser(add_help=False)
+    source.add_argument('--gradebook', help='Path to the gradebook CSV file')
+    source.add_argument('--zip', dest='zip_path', help='Path to the submissions ZIP file')
+    source.add_argument('--session', help='Path to a session database (written by ingest, read by stats and export)')
+    source.add_argument('--name', help='Assignment name (defaults to the ZIP file name)')
+    source.add_argument('--parallel', action='store_true', help='Parse submission folders in a process pool')
+    source.add_argument('--workers', type=int, default=None, help='Number of worker processes for --parallel')
+    source.add_argument('--no-cache', action='store_true', help='Do not use the on-disk parse cache')
+    source.add_argument('--indent', type=int, default=2, help='Indentation of the JSON output (0 for one line)')
+
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description='Headless ingestion, statistics and export for the Assignment Grader'
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+
+    ingest = subparsers.add_parser('ingest', parents=[source], help='Parse the submissions of an assignment')
+    ingest.add_argument('--strict', action='store_true',
+                        help=f'Exit with code {EXIT_PARSE_ERRORS} if any file could not be parsed')
+    ingest.add_argument('--force', action='store_true',
+                        help='Replace a --session file even if submissions in it have been graded')
+    ingest.add_argument('--stream', action='store_true',
+                        help='Handle the submissions one at a time as they are parsed, in constant memory')
+    ingest.add_argument('--read-ahead', type=int, default=DEFAULT_READ_AHEAD,
+                        help='Number of submissions parsed ahead of the one being saved, with --stream')
+    ingest.set_defaults(handler=run_ingest)
+
+    stats = subparsers.add_parser('stats', parents=[source], help='Calculate grade and solution length statistics')
+    stats.add_argument('--bins', type=int, default=DEFAULT_BINS, help='Number of histogram bins')
+    stats.set_defaults(handler=run_stats)
+
+    export = subparsers.add_parser('export', parents=[source], help='Export grades and feedback to a CSV file')
+    export.add_argument('--output', '-o', help='Path of the CSV file (defaults to <assignment>_grades.csv)')
+    export.set_defaults(handler=run_export)
+
+    batch = subparsers.add_parser('batch', help='Ingest every gradebook/ZIP pair found in a directory tree')
+    batch.add_argument('root', help='Directory to search for gradebook CSV and submissions ZIP files')
+    batch.add_argument('--jobs', type=int, default=DEFAULT_MAX_CONCURRENT,
+                       help='Number of assignments ingested at the same time')
+    batch.add_argument('--workers', type=int, default=None, help='Number of worker processes parsing files')
+    batch.add_argument('--serial', action='store_true', help='Parse files in the ingesting threads, without processes')
+    batch.add_argument('--session-dir', help='Directory to save a session database of each assignment in')
+    batch.add_argument('--no-cache', action='store_true', help='Do not use the on-disk parse cache')
+    batch.add_argument('--strict', action='store_true',
+                       help=f'Exit with code {EXIT_PARSE_ERRORS} if any file could not be parsed')
+    batch.add_argument('--indent', type=int, default=2, help='Indentation of the JSON output (0 for one line)')
+    batch.set_defaults(handler=run_batch)
+
+    return parser
+
+
+def load_assignment(args):
+    """
+    Load an assignment from a saved session, or by parsing its gradebook and ZIP file.
+
+    A session is resumed if --session names an existing database and no
+    gradebook is given; otherwise the files are parsed.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Assignment: The loaded assignment
+
+    Raises:
+        ValueError: If neither a session nor a gradebook and ZIP file are given
+    """
+    if args.session and not args.gradebook and os.path.exists(args.session):
+        assignment = Assignment()
+        assignment.resume_session(args.session)
+        if args.name:
+            assignment.set_assignment_name(args.name)
+        return assignment
+
+    assignment = create_assignment(args)
+    assignment.load_student_names()
+    assignment.load_submissions()
+    return assignment
+
+
+def create_assignment(args):
+    """
+    Create an assignment for the gradebook and ZIP file, without loading them.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Assignment: The assignment, with its file processor configured
+
+    Raises:
+        ValueError: If the gradebook or ZIP file is not given
+    """
+    if not args.gradebook or not args.zip_path:
+        raise ValueError("Either --session or both --gradebook and --zip are required")
+
+    assignment = Assignment(gradebook_path=args.gradebook, zip_path=args.zip_path)
+    assignment.file_processor.parallel = args.parallel
+    assignment.file_processor.max_workers = args.workers
+    if args.no_cache:
+        assignment.file_processor.parse_cache = None
+
+    assignment.set_assignment_name(args.name)
+    return assignment
+
+
+def run_ingest(args):
+    """
+    Parse the submissions of an assignment, optionally saving them to a session.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        tuple: (result dictionary, exit code)
+    """
+    check_session_replaceable(args)
+    if args.stream:
+        return run_streaming_ingest(args)
+
+    start = time.monotonic()
+    assignment = load_assignment(args)
+    try:
+        session_path = None
+        if args.session and args.gradebook:
+            session_path = assignment.start_session(args.session)
+
+        result = summarize_assignment(assignment)
+        result['session'] = session_path
+        result['elapsed_seconds'] = round(time.monotonic() - start, 3)
+    finally:
+        close_assignment(assignment)
+
+    exit_code = EXIT_PARSE_ERRORS if args.strict and result['errors'] else EXIT_OK
+    return result, exit_code
+
+
+def check_session_replaceable(args):
+    """
+    Make sure ingesting doesn't replace a session with grading work in it, unless forced.
+
+    Args:
+        args: Parsed command line arguments
+
+    Raises:
+        ValueError: If the --session file has graded submissions and --force is not given
+    """
+    if not args.session or not args.gradebook or args.force:
+        return
+
+    graded = count_graded_submissions(args.session)
+    if graded:
+        raise ValueError(
+            f"Session {args.session} has {graded} graded submission(s); "
+            "use --force to replace it or choose another --session path"
+        )
+
+
+def run_streaming_ingest(args):
+    """
+    Parse the submissions of an assignment one at a time, optionally saving them to a session.
+
+    No submission is kept after it is summarized and saved, so memory use
+    does not depend on the size of the archive.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        tuple: (result dictionary, exit code)
+    """
+    start = time.monotonic()
+    assignment = create_assignment(args)
+    lengths = RunningStatistics()
+    processed = 0
+
+    def summarized(submissions):
+        nonlocal processed
+        for submission in submissions:
+            processed += 1
+            length = submission.calculate_solution_length()
+            if length > 0:
+                lengths.add(length)
+            yield submission
+
+    store = None
+    try:
+        submissions = summarized(assignment.iter_submissions(read_ahead=args.read_ahead))
+        if args.session:
+            store = SessionStore(args.session)
+            store.save_session(assignment, submissions)
+        else:
+            for _ in submissions:
+                pass
+
+        processor = assignment.file_processor
+        students_submitted = assignment.get_submission_count()
+        result = {
+            'assignment': assignment.assignment_name,
+            'gradebook': assignment.gradebook_csv_file_path,
+            'zip': assignment.submissions_zip_path,
+            'students_submitted': students_submitted,
+            'submissions_processed': processed,
+            'missing_submissions': max(students_submitted - processed, 0),
+            'errors': [error._asdict() for error in processor.errors],
+            'name_ambiguities': [
+                {'folder': folder, 'chosen_name': chosen, 'matching_names': matches}
+                for folder, chosen, matches in processor.name_ambiguities
+            ],
+            'images': assignment.image_store.get_stats(),
+            'solution_length': {
+                'mean': lengths.mean,
+                'median': lengths.median,
+                'min': int(lengths.min),
+                'max': int(lengths.max)
+            },
+            'session': args.session,
+            'elapsed_seconds': round(time.monotonic() - start, 3)
+        }
+    finally:
+        if store is not None:
+            store.close()
+        assignment.file_processor.close()
+
+    exit_code = EXIT_PARSE_ERRORS if args.strict and result['errors'] else EXIT_OK
+    return result, exit_code
+
+
+def run_stats(args):
+    """
+    Calculate the statistics of an assignment.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        tuple: (result dictionary, exit code)
+    """
+    assignment = load_assignment(args)
+    try:
+        calculator = StatisticsCalculator()
+        submissions = assignment.get_submissions()
+        table = assignment.get_submission_table()
+        stats = calculator.calculate_statistics(submissions, table)
+
+        grade_edges, grade_counts = calculator.calculate_grade_distribution(table, bins=args.bins)
+        length_edges, length_counts = calculator.calculate_length_distribution(table, bins=args.bins)
+
+        result = {
+            'assignment': assignment.assignment_name,
+            'students_submitted': assignment.get_submission_count(),
+            'submissions_processed': stats['submission_count'],
+            'graded': len(stats['grades']),
+            'statistics': {key: value for key, value in stats.items() if key != 'grades'},
+            'grade_histogram': {'bin_edges': grade_edges.tolist(), 'counts': grade_counts.tolist()},
+            'length_histogram': {'bin_edges': length_edges.tolist(), 'counts': length_counts.tolist()}
+        }
+    finally:
+        close_assignment(assignment)
+
+    return result, EXIT_OK
+
+
+def run_export(args):
+    """
+    Export the grades and feedback of an assignment to a CSV file.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        tuple: (result dictionary, exit code)
+    """
+    assignment = load_assignment(args)
+    try:
+        output_path = assignment.export_to_csv(args.output)
+        result = {
+            'assignment': assignment.assignment_name,
+            'output': os.path.abspath(output_path),
+            'rows': len(assignment.data_frame)
+        }
+    finally:
+        close_assignment(assignment)
+
+    return result, EXIT_OK
+
+
+def run_batch(args):
+    """
+    Ingest all assignments found in a directory tree.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        tuple: (result dictionary, exit code)
+    """
+    pairs, unpaired = discover_assignment_pairs(args.root)
+
+    runner = BatchRunner(
+        max_concurrent=args.jobs,
+        parallel=not args.serial,
+        max_workers=args.workers,
+        parse_cache=None if args.no_cache else ParseCache(),
+        session_dir=args.session_dir
+    )
+    result = runner.run(pairs)
+    result['unpaired_files'] = unpaired
+
+    course = result['course']
+    if course['failed']:
+        exit_code = EXIT_FAILURE
+    elif args.strict and course['parse_errors']:
+        exit_code = EXIT_PARSE_ERRORS
+    else:
+        exit_code = EXIT_OK
+    return result, exit_code
+
+
+def close_assignment(assignment):
+    """Release the session database and open archive of an assignment."""
+    assignment.close_session()
+    assignment.file_processor.close()
+
+
+def _json_default(value):
+    """Convert numpy scalars and other values json can't serialize."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def write_json(result, indent=2):
+    """
+    Write a result to stdout as JSON.
+
+    Args:
+        result: Dictionary to write
+        indent: Indentation, or 0 for a single line
+    """
+    json.dump(result, sys.stdout, indent=indent or None, default=_json_default)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def run_cli(argv=None):
+    """
+    Run a command line command.
+
+    Args:
+        argv: Command line arguments without the program name (sys.argv[1:] if None)
+
+    Returns:
+        int: Exit code
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        parser.print_help(sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        # Keep stdout for the JSON result; the components print their progress
+        with contextlib.redirect_stdout(sys.stderr):
+            result, exit_code = args.handler(args)
+    except Exception as e:
+        write_json({'command': args.command, 'error': str(e), 'error_type': type(e).__name__}, args.indent)
+        return EXIT_FAILURE
+
+    write_json(dict(command=args.command, **result), args.indent)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(run_cli())
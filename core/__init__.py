@@ -2,9 +2,13 @@
 Core module for assignment grading functionality.
 """
 
-from .assignment import Assignment
-from .file_processor import FileProcessor
+from .assignment import Assignment, ParsedSubmissions
+from .batch_runner import AssignmentPair, BatchRunner, discover_assignment_pairs
+from .file_processor import FileProcessor, IngestCancelled, IngestProgress, ProcessingError
 from .grading_workflow import GradingWorkflow
 from .statistics import StatisticsCalculator
+from .submission_table import SubmissionTable
 
-__all__ = ['Assignment', 'FileProcessor', 'GradingWorkflow', 'StatisticsCalculator']
\ No newline at end of file
+__all__ = ['Assignment', 'AssignmentPair', 'BatchRunner', 'discover_assignment_pairs', 'FileProcessor',
+           'IngestCancelled', 'IngestProgress', 'ParsedSubmissions', 'ProcessingError', 'GradingWorkflow',
+           'StatisticsCalculator', 'SubmissionTable']
\ No newline at end of file
@@ -6,32 +6,98 @@ to access and manipulate them.
 """
 
 import os
-import pandas as pd
+import threading
+from collections import namedtuple
 
+from models.image_record import ImageBlobStore
 from models.student_submission import StudentSubmission
-from core.file_processor import FileProcessor
+from core.file_processor import DEFAULT_READ_AHEAD, FileProcessor
+from core.gradebook import GradebookIndex
+from core.image_store import ImageStore
+from core.session_store import SessionStore, StoredSubmissionList, get_new_session_path
+from core.submission_table import SubmissionTable
 from utils.file_utils import get_last_downloaded
+from utils.parse_cache import ParseCache
+
+
+# Submissions parsed by parse_submissions, with everything they were parsed with,
+# waiting to replace the loaded ones
+ParsedSubmissions = namedtuple(
+    'ParsedSubmissions', ['gradebook', 'student_names', 'file_processor', 'image_store', 'submissions']
+)
 
 
 class Assignment:
     """Class representing an assignment with multiple student submissions."""
 
-    def __init__(self):
-        """Initialize a new Assignment instance."""
+    def __init__(self, gradebook_path=None, zip_path=None):
+        """
+        Initialize a new Assignment instance.
+
+        Args:
+            gradebook_path: Optional path to the gradebook CSV file. If None,
+                            the most recently downloaded CSV file is used.
+            zip_path: Optional path to the submissions ZIP file. If None,
+                      the most recently downloaded ZIP file is used.
+        """
         self.assignment_name = None
         self.names_of_students_submit = []
         self.reference_solution = ''
         self.submissions_list = []
 
-        # File paths
-        self.gradebook_csv_file_path = get_last_downloaded(".csv")
-        self.submissions_zip_path = get_last_downloaded(".zip")
+        # Parse each submission's files only when it is first viewed
+        self.lazy_loading = False
 
-        # Initialize file processor
-        self.file_processor = FileProcessor()
+        # Keep image bytes in a memory-mapped temporary file instead of in memory
+        self.spill_images = False
 
-        # DataFrame for analysis
+        # Images of all submissions, one record per distinct content
+        self.image_store = None
+
+        # File paths, None until chosen if nothing was downloaded
+        self.gradebook_csv_file_path = gradebook_path or self._find_last_downloaded(".csv")
+        self.submissions_zip_path = zip_path or self._find_last_downloaded(".zip")
+
+        # Initialize file processor, caching parsed documents between runs
+        self.file_processor = FileProcessor(parse_cache=ParseCache())
+
+        # DataFrame for analysis, and its index by student name and identifier
         self.data_frame = None
+        self.gradebook = None
+
+        # Submissions changed since the last update of data_frame, mapped to
+        # the names of their changed fields, in the order they changed
+        self.changelog = {}
+
+        # Guards changelog, which prefetch threads add to while loading submissions.
+        # Never held while a submission loads, since its loader reports changes here.
+        self._changelog_lock = threading.RLock()
+        self._synced_frame = None
+
+        # Columns of the tracked submissions' grades and lengths, kept in sync with them
+        self.submission_table = SubmissionTable()
+
+        # Fields ('grade', 'feedback', 'solution') of a resumed session's
+        # submissions still to be written to data_frame from the store
+        self._store_fields_to_sync = set()
+
+        # Optional persistent store of the grading session
+        self.session_store = None
+
+    def _find_last_downloaded(self, extension):
+        """
+        Find the most recently downloaded file with an extension.
+
+        Args:
+            extension: File extension to look for (e.g., '.zip')
+
+        Returns:
+            str: Path to the file, or None if there is none
+        """
+        try:
+            return get_last_downloaded(extension)
+        except FileNotFoundError:
+            return None
 
     def set_assignment_name(self, name=None):
         """
@@ -69,32 +135,139 @@ class Assignment:
         """Get the reference solution text."""
         return self.reference_solution
 
-    def load_submissions(self):
+    def load_submissions(self, progress_callback=None, cancel_event=None):
         """
         Load student submissions from files.
 
+        Args:
+            progress_callback: Optional function called with an IngestProgress
+                               after each file in the ZIP is processed
+            cancel_event: Optional threading.Event; setting it stops loading
+
         Returns:
             tuple: (number_of_students_submitted, list_of_submissions)
+
+        Raises:
+            IngestCancelled: If loading was cancelled
         """
-        # Make sure we have student names
-        if not self.names_of_students_submit:
-            self.load_student_names()
+        parsed = self.parse_submissions(
+            gradebook=self.gradebook if self.names_of_students_submit else None,
+            progress_callback=progress_callback,
+            cancel_event=cancel_event
+        )
+        return self.install_submissions(parsed)
+
+    def parse_submissions(self, gradebook=None, progress_callback=None, cancel_event=None):
+        """
+        Parse the submissions from the files without replacing the loaded ones.
+
+        Nothing the loaded submissions use is changed, so this can run on a
+        background thread while they are being graded. Pass the result to
+        install_submissions to switch over to the new submissions.
+
+        Args:
+            gradebook: Optional GradebookIndex from read_gradebook; None reads the CSV file
+            progress_callback: Optional function called with an IngestProgress
+                               after each file in the ZIP is processed
+            cancel_event: Optional threading.Event; setting it stops parsing
+
+        Returns:
+            ParsedSubmissions: The submissions and the gradebook, processor
+                               and image store they were parsed with
 
-        # Number of students who submitted (from gradebook)
-        num_students_submitted = len(self.names_of_students_submit)
+        Raises:
+            IngestCancelled: If parsing was cancelled
+        """
+        if gradebook is None:
+            gradebook = self.read_gradebook()
+        student_names = gradebook.get_submitted_names()
+
+        # A new processor, as lazily loaded submissions still read the archive of the current one
+        current = self.file_processor
+        file_processor = FileProcessor(
+            parallel=current.parallel,
+            max_workers=current.max_workers,
+            chunk_size=current.chunk_size,
+            parse_cache=current.parse_cache,
+            lazy=self.lazy_loading,
+            executor=current.executor
+        )
+        image_store = self._new_image_store(self.spill_images)
+        file_processor.image_store = image_store
 
-        # Process the submissions
-        self.submissions_list = self.file_processor.extract_submissions(
+        submissions = file_processor.extract_submissions(
             self.gradebook_csv_file_path,
             self.submissions_zip_path,
-            self.names_of_students_submit
+            student_names,
+            gradebook,
+            progress_callback=progress_callback,
+            cancel_event=cancel_event
         )
+        return ParsedSubmissions(gradebook, student_names, file_processor, image_store, submissions)
 
-        # Update data_frame with submissions data
-        self.update_dataframe()
+    def install_submissions(self, parsed):
+        """
+        Replace the loaded submissions with parsed ones.
+
+        The replaced file processor is not closed, as a submission of it may
+        still be loading on another thread; its archive is closed once its
+        submissions are released.
+
+        Args:
+            parsed: ParsedSubmissions from parse_submissions
+
+        Returns:
+            tuple: (number_of_students_submitted, list_of_submissions)
+        """
+        self.gradebook = parsed.gradebook
+        self.data_frame = parsed.gradebook.data_frame
+        self.names_of_students_submit = parsed.student_names
+        self.file_processor = parsed.file_processor
+        self.image_store = parsed.image_store
+        StudentSubmission.default_image_store = parsed.image_store
+        self.submissions_list = parsed.submissions
+
+        # Track changes to the submissions and update data_frame with their data,
+        # leaving the solution text of lazily loaded submissions for later
+        self.track_submissions()
+        self.update_dataframe(load_pending=not self.lazy_loading)
 
         # Return the number of students who submitted (not the number of submissions processed)
-        return num_students_submitted, self.submissions_list
+        return len(self.names_of_students_submit), self.submissions_list
+
+    def iter_submissions(self, read_ahead=DEFAULT_READ_AHEAD, progress_callback=None, cancel_event=None):
+        """
+        Stream the submissions from the files, one at a time as they are parsed.
+
+        Unlike load_submissions, the submissions are not kept in
+        submissions_list or tracked, so a consumer that handles one at a
+        time (saving a session, summarizing) needs the same memory for any
+        size of archive. Images are spilled to a temporary file for the same
+        reason.
+
+        Args:
+            read_ahead: Maximum number of submissions parsed before they are needed
+            progress_callback: Optional function called with an IngestProgress
+                               after each file in the ZIP is consumed
+            cancel_event: Optional threading.Event; setting it stops the stream
+
+        Returns:
+            generator: StudentSubmission objects sorted by student name
+        """
+        # Make sure we have student names
+        if not self.names_of_students_submit:
+            self.load_student_names()
+
+        self._set_up_image_storage(spill_images=True)
+        return self.file_processor.iter_submissions(
+            self.gradebook_csv_file_path,
+            self.submissions_zip_path,
+            self.names_of_students_submit,
+            self.gradebook,
+            read_ahead=read_ahead,
+            progress_callback=progress_callback,
+            cancel_event=cancel_event
+        )
 
     def load_student_names(self):
         """
@@ -103,27 +276,155 @@ class Assignment:
         Returns:
             list: Names of students who submitted
         """
-        if not os.path.exists(self.gradebook_csv_file_path):
-            raise FileNotFoundError(f"Gradebook CSV file not found: {self.gradebook_csv_file_path}")
-
         try:
-            # Load the CSV file
-            self.data_frame = pd.read_csv(self.gradebook_csv_file_path)
+            # Load and index the CSV file
+            self.gradebook = self.read_gradebook()
+            self.data_frame = self.gradebook.data_frame
 
             # Extract students who submitted
-            if 'Status' in self.data_frame.columns and 'Full name' in self.data_frame.columns:
-                submitted_students = self.data_frame[
-                    self.data_frame['Status'] == 'Submitted for grading'
-                ]['Full name'].tolist()
-
-                self.names_of_students_submit = submitted_students
-                return self.names_of_students_submit
-            else:
-                raise ValueError("Could not find required columns in gradebook CSV")
+            self.names_of_students_submit = self.gradebook.get_submitted_names()
+            return self.names_of_students_submit
+        except FileNotFoundError:
+            raise
         except Exception as e:
             print(f"Error processing gradebook CSV: {e}")
             return []
 
+    def read_gradebook(self):
+        """
+        Read and index the gradebook CSV file, without replacing the loaded gradebook.
+
+        Returns:
+            GradebookIndex: The indexed gradebook
+
+        Raises:
+            FileNotFoundError: If the gradebook CSV file does not exist
+        """
+        if not self.gradebook_csv_file_path or not os.path.exists(self.gradebook_csv_file_path):
+            raise FileNotFoundError(f"Gradebook CSV file not found: {self.gradebook_csv_file_path}")
+        return GradebookIndex.from_csv(self.gradebook_csv_file_path)
+
+    def _new_image_store(self, spill_images):
+        """
+        Create an image store for the submissions loaded next.
+
+        Args:
+            spill_images: Keep image bytes in a temporary file
+
+        Returns:
+            ImageStore: The new store
+        """
+        # Each load gets a new blob file; the old one is deleted once its images are released
+        return ImageStore(ImageBlobStore() if spill_images else None)
+
+    def _set_up_image_storage(self, spill_images=None):
+        """
+        Create the image store shared by the submissions loaded next.
+
+        Args:
+            spill_images: Keep image bytes in a temporary file (None uses self.spill_images)
+        """
+        if spill_images is None:
+            spill_images = self.spill_images
+
+        self.image_store = self._new_image_store(spill_images)
+        StudentSubmission.default_image_store = self.image_store
+
+        # Assignments loaded side by side each pass their own store to their submissions
+        self.file_processor.image_store = self.image_store
+
+    def start_session(self, db_path=None):
+        """
+        Save the loaded submissions to a new session store and keep it for autosaving.
+
+        Args:
+            db_path: Optional path of the session database, replaced if it exists.
+                     If None, a new file named after the assignment is used,
+                     so an earlier session with graded work is never replaced.
+
+        Returns:
+            str: Path to the session database
+        """
+        if db_path is None:
+            db_path = get_new_session_path(self.assignment_name)
+
+        self.close_session()
+        self.session_store = SessionStore(db_path)
+        self.session_store.save_session(self)
+        return db_path
+
+    def resume_session(self, db_path):
+        """
+        Resume a saved session without re-parsing the submission files.
+        Submissions are loaded from the store as they are accessed.
+
+        Args:
+            db_path: Path of the session database
+
+        Returns:
+            int: Number of submissions in the session
+        """
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Session file not found: {db_path}")
+
+        self.close_session()
+        self._set_up_image_storage()
+        store = SessionStore(db_path)
+        metadata = store.load_metadata()
+
+        self.assignment_name = metadata.get('assignment_name')
+        self.reference_solution = metadata.get('reference_solution') or ''
+        self.gradebook_csv_file_path = metadata.get('gradebook_csv_file_path')
+        self.submissions_zip_path = metadata.get('submissions_zip_path')
+        self.names_of_students_submit = metadata['names_of_students_submit']
+
+        self.session_store = store
+        self.submissions_list = StoredSubmissionList(store, on_load=self._on_session_submission_loaded)
+
+        # The gradebook is re-read and fully synced on the next update
+        self.data_frame = None
+        self.gradebook = None
+        with self._changelog_lock:
+            self.changelog = {}
+        self._synced_frame = None
+        self.submission_table = self._new_submission_table()
+
+        return len(self.submissions_list)
+
+    def _on_session_submission_loaded(self, submission):
+        """
+        Prepare a submission loaded from the session store.
+
+        Args:
+            submission: StudentSubmission that was loaded
+        """
+        self._track_submission(submission, self.session_store.get_row(submission))
+
+        # Content that was never parsed before the session was saved comes from the ZIP
+        sources = self.session_store.get_pending_sources(submission)
+        if sources and self.submissions_zip_path and os.path.exists(self.submissions_zip_path):
+            self.file_processor.add_folder_loaders(submission, self.submissions_zip_path, sources)
+
+    def save_submission(self, submission):
+        """
+        Save a submission's grade and feedback to the session store, if there is one.
+
+        Args:
+            submission: StudentSubmission to save
+
+        Returns:
+            bool: True if the submission was saved
+        """
+        if self.session_store is None:
+            return False
+        return self.session_store.save_submission(submission)
+
+    def close_session(self):
+        """Close the session store, if there is one."""
+        if self.session_store is not None:
+            self.session_store.close()
+            self.session_store = None
+
     def get_submission(self, index):
         """
         Get a submission by index.
@@ -152,43 +453,231 @@ class Assignment:
         """
         return len(self.names_of_students_submit)
 
-    def update_dataframe(self):
+    def track_submissions(self):
+        """
+        Record changes of all submissions in the changelog.
+
+        All fields of every submission are queued so the next update
+        writes them all to data_frame. Of a resumed session, only the
+        submissions loaded so far are tracked; the others are read from the
+        store when needed.
+        """
+        with self._changelog_lock:
+            self.changelog = {}
+        self.submission_table = self._new_submission_table()
+
+        if isinstance(self.submissions_list, StoredSubmissionList):
+            tracked = self.submissions_list.get_loaded().items()
+        else:
+            tracked = ((None, submission) for submission in self.submissions_list)
+
+        for row, submission in tracked:
+            self._track_submission(submission, row)
+            with self._changelog_lock:
+                self.changelog[submission] = {'solution', 'grade', 'feedback'}
+
+    def _new_submission_table(self):
+        """
+        Create an empty submission table.
+
+        For a resumed session, the stored grades and lengths of all
+        submissions are counted in its statistics until they are loaded.
+
+        Returns:
+            SubmissionTable: The new table
+        """
+        table = SubmissionTable()
+        if isinstance(self.submissions_list, StoredSubmissionList):
+            for row, _, grade, _, length, _ in self.session_store.load_grading_values():
+                table.add_placeholder(row, grade, length)
+        return table
+
+    def _track_submission(self, submission, store_row=None):
+        """
+        Start recording changes of a submission in the changelog.
+
+        Args:
+            submission: StudentSubmission to track
+            store_row: Row of the submission in the session store, if it was loaded from one
+        """
+        submission.change_listener = self._on_submission_changed
+        submission.clear_dirty()
+        self.submission_table.add(submission, replaces=store_row)
+
+    def _on_submission_changed(self, submission, field):
+        """
+        Add a submission field change to the changelog and the submission table.
+        Called from the Tk thread and from threads loading submissions.
+
+        Args:
+            submission: StudentSubmission that changed
+            field: Name of the changed field
+        """
+        with self._changelog_lock:
+            self.changelog.setdefault(submission, set()).add(field)
+        # The table has its own lock
+        self.submission_table.update(submission, field)
+
+    def get_submission_table(self):
+        """
+        Get the columnar table of the submissions.
+
+        Submissions of a resumed session join the table as they are loaded
+        from the store; until then their stored grades and lengths are
+        counted in its statistics, so nothing is loaded here.
+
+        Returns:
+            SubmissionTable: Table of the tracked submissions
+        """
+        return self.submission_table
+
+    def update_dataframe(self, load_pending=True):
         """
         Update the data_frame with submission text, grades, and feedback.
 
+        Only the fields in the changelog are written, with one indexed
+        assignment per column.
+
+        Args:
+            load_pending: Parse lazily loaded submissions to write their solution text.
+                          If False, their solution text stays in the changelog.
+
         Returns:
             pandas.DataFrame: Updated DataFrame
         """
         if self.data_frame is None:
-            if not os.path.exists(self.gradebook_csv_file_path):
+            if not self.gradebook_csv_file_path or not os.path.exists(self.gradebook_csv_file_path):
                 raise FileNotFoundError(f"Gradebook CSV file not found: {self.gradebook_csv_file_path}")
-            self.data_frame = pd.read_csv(self.gradebook_csv_file_path)
+            self.gradebook = GradebookIndex.from_csv(self.gradebook_csv_file_path)
+            self.data_frame = self.gradebook.data_frame
+
+        if self.gradebook is None or self.gradebook.data_frame is not self.data_frame:
+            self.gradebook = GradebookIndex(self.data_frame)
+
+        # A new DataFrame needs every submission written to it
+        if self._synced_frame is not self.data_frame:
+            self._synced_frame = self.data_frame
+            self.track_submissions()
+            if isinstance(self.submissions_list, StoredSubmissionList):
+                self._store_fields_to_sync = {'grade', 'feedback', 'solution'}
 
         # Create columns if they don't exist
         if 'Solution Text' not in self.data_frame.columns:
             self.data_frame['Solution Text'] = ""
 
-        # Add submission text, grades, and feedback to dataframe
-        for submission in self.submissions_list:
-            mask = self.data_frame['Full name'] == submission.get_student_name()
-            if any(mask):
-                self.data_frame.loc[mask, 'Solution Text'] = submission.get_solution()
+        # Values of a resumed session come from the store, without loading the submissions;
+        # the changelog, written after them, has the loaded submissions' newer values
+        if self._store_fields_to_sync:
+            fields = set(self._store_fields_to_sync)
+            if not load_pending:
+                fields.discard('solution')
+            self._write_stored_values(fields)
+            self._store_fields_to_sync -= fields
+
+        # Collect the row positions and new values of each column
+        updates = {'Solution Text': ([], []), 'Grade': ([], []), 'Feedback comments': ([], [])}
+
+        # Take the changes so far; changes made from now on go to a new changelog
+        with self._changelog_lock:
+            changelog, self.changelog = self.changelog, {}
+
+        for submission, fields in changelog.items():
+            if 'solution' in fields and not load_pending and not submission.is_loaded():
+                # Write the solution once the submission has been parsed
+                with self._changelog_lock:
+                    self.changelog.setdefault(submission, set()).add('solution')
+                fields = fields - {'solution'}
+            else:
+                submission.clear_dirty()
+
+            positions = self.gradebook.get_positions_by_name(submission.get_student_name())
+            if positions:
+                if 'solution' in fields:
+                    self._add_column_update(updates['Solution Text'], positions, submission.get_solution())
 
                 # Update grade
-                if submission.get_grade() is not None:
-                    self.data_frame.loc[mask, 'Grade'] = submission.get_grade()
+                if 'grade' in fields and submission.get_grade() is not None:
+                    self._add_column_update(updates['Grade'], positions, submission.get_grade())
 
                 # Update feedback
-                if submission.get_feedback():
-                    self.data_frame.loc[mask, 'Feedback comments'] = submission.get_feedback()
+                if 'feedback' in fields and submission.get_feedback():
+                    self._add_column_update(updates['Feedback comments'], positions, submission.get_feedback())
             else:
                 print(f"Warning: Student {submission.get_student_name()} not found in gradebook")
 
-        # Add text length statistics
-        self.data_frame['Solution Length'] = self.data_frame['Solution Text'].str.len()
+        for column, (positions, values) in updates.items():
+            self._assign_column_values(column, positions, values)
+
+        # Add text length statistics, only recomputing the rows that changed
+        if 'Solution Length' not in self.data_frame.columns:
+            self.data_frame['Solution Length'] = self.data_frame['Solution Text'].str.len()
+        else:
+            positions, solutions = updates['Solution Text']
+            self._assign_column_values('Solution Length', positions, [len(text) for text in solutions])
 
         return self.data_frame
 
+    def _write_stored_values(self, fields):
+        """
+        Write the values saved in the session store to data_frame.
+
+        Args:
+            fields: Fields to write ('grade', 'feedback' and/or 'solution')
+        """
+        updates = {'Solution Text': ([], []), 'Grade': ([], []), 'Feedback comments': ([], [])}
+        values = self.session_store.load_grading_values(include_solution='solution' in fields)
+
+        for _, student_name, grade, feedback, _, solution in values:
+            positions = self.gradebook.get_positions_by_name(student_name)
+            if not positions:
+                continue
+            if 'grade' in fields and grade is not None:
+                self._add_column_update(updates['Grade'], positions, grade)
+            if 'feedback' in fields and feedback:
+                self._add_column_update(updates['Feedback comments'], positions, feedback)
+            if 'solution' in fields and solution is not None:
+                self._add_column_update(updates['Solution Text'], positions, solution)
+
+        for column, (positions, column_values) in updates.items():
+            self._assign_column_values(column, positions, column_values)
+
+        if 'Solution Length' in self.data_frame.columns:
+            positions, solutions = updates['Solution Text']
+            self._assign_column_values('Solution Length', positions, [len(text) for text in solutions])
+
+    def _add_column_update(self, update, positions, value):
+        """
+        Queue a value to be written to some rows of a column.
+
+        Args:
+            update: Tuple of (positions, values) lists for the column
+            positions: Row positions to write to
+            value: Value to write
+        """
+        update[0].extend(positions)
+        update[1].extend([value] * len(positions))
+
+    def _assign_column_values(self, column, positions, values):
+        """
+        Write values to rows of a data_frame column in one indexed assignment.
+
+        Args:
+            column: Name of the column, created if missing
+            positions: Row positions to write to
+            values: Values to write, one per position
+        """
+        if not positions:
+            return
+
+        if column not in self.data_frame.columns:
+            self.data_frame[column] = float('nan')
+
+        # Text can't be stored in an all-empty float column without upcasting it first
+        if isinstance(values[0], str) and self.data_frame[column].dtype != object:
+            self.data_frame[column] = self.data_frame[column].astype(object)
+
+        self.data_frame.iloc[positions, self.data_frame.columns.get_loc(column)] = values
+
     def export_to_csv(self, output_path=None):
         """
         Export the submissions data to a CSV file.
@@ -202,8 +691,8 @@ class Assignment:
         if output_path is None:
             output_path = f"{self.assignment_name}_grades.csv"
 
-        # Make sure dataframe is updated
-        self.update_dataframe()
+        # Make sure dataframe is updated; solution text isn't exported, so nothing is parsed or loaded for it
+        self.update_dataframe(load_pending=False)
 
         # Create a cleaner export version with just the essential columns
         columns_to_export = [
@@ -0,0 +1,299 @@
+"""
+BatchRunner - Ingests many assignments at once
+
+This module finds the gradebook CSV and submissions ZIP of every
+assignment in a directory tree and ingests the assignments concurrently.
+A bounded number of assignments is loaded at a time, all of them parse
+their folders in one shared process pool and reuse one parse cache, and
+the results are collected into per-assignment and course-wide summaries.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from core.assignment import Assignment
+from core.running_statistics import RunningStatistics
+from core.session_store import count_graded_submissions, get_unused_session_path
+from core.statistics import StatisticsCalculator
+
+
+# Gradebook and submissions archive of one assignment
+AssignmentPair = namedtuple('AssignmentPair', ['name', 'gradebook_path', 'zip_path'])
+
+DEFAULT_MAX_CONCURRENT = 2
+
+# Words common to export file names that say nothing about which assignment they belong to
+GENERIC_NAME_TOKENS = frozenset(['grades', 'gradebook', 'submissions', 'export', 'csv', 'zip'])
+
+# Files written by the grader's own exports, which are not gradebooks
+EXPORT_SUFFIXES = ('_grades.csv', '_statistics.csv')
+
+
+def _name_tokens(filename):
+    """Get the distinguishing lowercase words and numbers of a file name."""
+    stem = os.path.splitext(os.path.basename(filename))[0].lower()
+    return set(re.findall(r'[a-z0-9]+', stem)) - GENERIC_NAME_TOKENS
+
+
+def _pair_directory(csv_files, zip_files):
+    """
+    Pair the gradebooks and archives found in one directory.
+
+    A lone CSV and ZIP are paired with each other. Otherwise each archive is
+    paired with the gradebook sharing the most words with its name, best
+    matches first.
+
+    Args:
+        csv_files: Paths of the CSV files
+        zip_files: Paths of the ZIP files
+
+    Returns:
+        tuple: (list of (csv_path, zip_path), list of unpaired paths)
+    """
+    if len(csv_files) == 1 and len(zip_files) == 1:
+        return [(csv_files[0], zip_files[0])], []
+
+    candidates = []
+    for zip_path in zip_files:
+        zip_tokens = _name_tokens(zip_path)
+        for csv_path in csv_files:
+            score = len(zip_tokens & _name_tokens(csv_path))
+            if score:
+                candidates.append((-score, zip_path, csv_path))
+    candidates.sort()
+
+    pairs = []
+    paired = set()
+    for _, zip_path, csv_path in candidates:
+        if zip_path not in paired and csv_path not in paired:
+            pairs.append((csv_path, zip_path))
+            paired.update((zip_path, csv_path))
+
+    unpaired = [path for path in csv_files + zip_files if path not in paired]
+    return pairs, unpaired
+
+
+def discover_assignment_pairs(root_dir):
+    """
+    Find the gradebook CSV and submissions ZIP of each assignment in a directory tree.
+
+    Files are only paired with files in the same directory. Each assignment
+    is named after the path of its ZIP file relative to the root directory.
+
+    Args:
+        root_dir: Directory to search
+
+    Returns:
+        tuple: (list of AssignmentPairs sorted by path, list of unpaired file paths)
+    """
+    if not os.path.isdir(root_dir):
+        raise FileNotFoundError(f"Directory not found: {root_dir}")
+
+    pairs = []
+    unpaired = []
+
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        dirnames.sort()
+        csv_files = sorted(
+            os.path.join(dirpath, f) for f in filenames
+            if f.lower().endswith('.csv') and not f.lower().endswith(EXPORT_SUFFIXES)
+        )
+        zip_files = sorted(os.path.join(dirpath, f) for f in filenames if f.lower().endswith('.zip'))
+        if not csv_files and not zip_files:
+            continue
+
+        directory_pairs, directory_unpaired = _pair_directory(csv_files, zip_files)
+        for csv_path, zip_path in directory_pairs:
+            # Named after the archive's path, so same-named exports of different courses stay apart
+            name = os.path.splitext(os.path.relpath(zip_path, root_dir))[0].replace(os.sep, '-')
+            pairs.append(AssignmentPair(name, csv_path, zip_path))
+        unpaired.extend(directory_unpaired)
+
+    pairs.sort(key=lambda pair: pair.zip_path)
+    return pairs, unpaired
+
+
+def summarize_assignment(assignment, stats_calculator=None):
+    """
+    Summarize the ingestion of a loaded assignment.
+
+    Args:
+        assignment: Assignment whose submissions have been loaded
+        stats_calculator: Optional StatisticsCalculator to use
+
+    Returns:
+        dict: Counts, parse errors, name ambiguities, image and length statistics
+    """
+    if stats_calculator is None:
+        stats_calculator = StatisticsCalculator()
+
+    processor = assignment.file_processor
+    submissions = assignment.get_submissions()
+    students_submitted = assignment.get_submission_count()
+    stats = stats_calculator.calculate_statistics(submissions, assignment.get_submission_table())
+
+    return {
+        'assignment': assignment.assignment_name,
+        'gradebook': assignment.gradebook_csv_file_path,
+        'zip': assignment.submissions_zip_path,
+        'students_submitted': students_submitted,
+        'submissions_processed': len(submissions),
+        'missing_submissions': max(students_submitted - len(submissions), 0),
+        'errors': [error._asdict() for error in processor.errors],
+        'name_ambiguities': [
+            {'folder': folder, 'chosen_name': chosen, 'matching_names': matches}
+            for folder, chosen, matches in processor.name_ambiguities
+        ],
+        'images': assignment.image_store.get_stats() if assignment.image_store is not None else None,
+        'solution_length': {
+            'mean': stats['mean_length'],
+            'median': stats['median_length'],
+            'min': stats['min_length'],
+            'max': stats['max_length']
+        }
+    }
+
+
+class BatchRunner:
+    """
+    Concurrent ingestion of several assignments with shared parsing resources.
+    """
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, parallel=True, max_workers=None,
+                 parse_cache=None, session_dir=None):
+        """
+        Initialize the batch runner.
+
+        Args:
+            max_concurrent: Maximum number of assignments loaded at the same time
+            parallel: Parse submission folders in a process pool shared by all assignments
+            max_workers: Number of worker processes (None uses the CPU count)
+            parse_cache: ParseCache shared by all assignments (None disables caching)
+            session_dir: Optional directory to save a session database of each assignment in
+        """
+        self.max_concurrent = max_concurrent
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.parse_cache = parse_cache
+        self.session_dir = session_dir
+        self.stats_calculator = StatisticsCalculator()
+
+        # Solution lengths of all assignments, added to by the worker threads
+        self._course_lengths = None
+        self._lock = threading.Lock()
+
+    def run(self, pairs):
+        """
+        Ingest assignments concurrently.
+
+        Args:
+            pairs: AssignmentPairs to ingest
+
+        Returns:
+            dict: 'assignments' (one summary per pair, in order) and 'course' (totals)
+        """
+        start = time.monotonic()
+        self._course_lengths = RunningStatistics()
+
+        if self.session_dir:
+            os.makedirs(self.session_dir, exist_ok=True)
+
+        executor = ProcessPoolExecutor(max_workers=self.max_workers) if self.parallel else None
+        try:
+            with ThreadPoolExecutor(max_workers=max(self.max_concurrent, 1), thread_name_prefix="batch") as threads:
+                results = list(threads.map(lambda pair: self._ingest(pair, executor), pairs))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return {
+            'assignments': results,
+            'course': self._summarize_course(results, time.monotonic() - start)
+        }
+
+    def _ingest(self, pair, executor):
+        """
+        Ingest one assignment and summarize it.
+
+        Args:
+            pair: AssignmentPair to ingest
+            executor: Shared ProcessPoolExecutor, or None to parse in this thread
+
+        Returns:
+            dict: Summary of the assignment, or its name and error if it failed
+        """
+        start = time.monotonic()
+        assignment = Assignment(gradebook_path=pair.gradebook_path, zip_path=pair.zip_path)
+        assignment.file_processor.parse_cache = self.parse_cache
+        assignment.file_processor.executor = executor
+
+        try:
+            assignment.set_assignment_name(pair.name)
+            assignment.load_student_names()
+            assignment.load_submissions()
+
+            summary = summarize_assignment(assignment, self.stats_calculator)
+            summary['session'] = None
+            if self.session_dir:
+                session_path = os.path.join(self.session_dir, f"{pair.name}.db")
+                # A session someone has graded in is kept; this run's session goes next to it
+                if count_graded_submissions(session_path):
+                    session_path = get_unused_session_path(session_path)
+                summary['session'] = assignment.start_session(session_path)
+
+            table = assignment.get_submission_table()
+            with table.lock:
+                lengths = table.length_stats.values()
+            with self._lock:
+                for length in lengths:
+                    self._course_lengths.add(length)
+        except Exception as e:
+            print(f"Error ingesting {pair.name}: {e}")
+            summary = {
+                'assignment': pair.name,
+                'gradebook': pair.gradebook_path,
+                'zip': pair.zip_path,
+                'error': str(e)
+            }
+        finally:
+            # Only the summary is kept, so the next assignment can use the memory
+            assignment.close_session()
+            assignment.file_processor.close()
+
+        summary['elapsed_seconds'] = round(time.monotonic() - start, 3)
+        return summary
+
+    def _summarize_course(self, results, elapsed):
+        """
+        Total the assignment summaries.
+
+        Args:
+            results: Summaries returned by _ingest
+            elapsed: Seconds spent on the whole batch
+
+        Returns:
+            dict: Course-wide counts and solution length statistics
+        """
+        succeeded = [result for result in results if 'error' not in result]
+        lengths = self._course_lengths
+
+        return {
+            'assignments': len(results),
+            'succeeded': len(succeeded),
+            'failed': len(results) - len(succeeded),
+            'students_submitted': sum(result['students_submitted'] for result in succeeded),
+            'submissions_processed': sum(result['submissions_processed'] for result in succeeded),
+            'missing_submissions': sum(result['missing_submissions'] for result in succeeded),
+            'parse_errors': sum(len(result['errors']) for result in succeeded),
+            'solution_length': {
+                'mean': lengths.mean,
+                'median': lengths.median,
+                'min': int(lengths.min),
+                'max': int(lengths.max)
+            },
+            'elapsed_seconds': round(elapsed, 3)
+        }
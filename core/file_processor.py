@@ -4,12 +4,234 @@ FileProcessor - Component for processing submission files
 This module handles extracting submissions from ZIP and CSV files.
 """
 
+import io
 import os
+import queue
 import re
-import zipfile
-import pandas as pd
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
-from models.student_submission import StudentSubmission
+from core.gradebook import GradebookIndex
+from models.student_submission import StudentSubmission, SolutionSegment, SEGMENT_FILE, SEGMENT_SEPARATOR
+from utils.lazy_import import lazy_import
+from utils.name_matcher import StudentNameIndex
+from utils.zip_index import ZipIndex
+
+pd = lazy_import('pandas')
+
+
+# A file that could not be parsed during ingestion
+ProcessingError = namedtuple('ProcessingError', ['folder', 'filename', 'message'])
+
+# Progress of an extraction, reported after each file is parsed (or indexed, when loading lazily)
+# elapsed: seconds since the ZIP folders started being processed
+IngestProgress = namedtuple(
+    'IngestProgress', ['filename', 'files_done', 'files_total', 'bytes_done', 'bytes_total', 'elapsed']
+)
+
+# A ZIP folder with solution files and the student it was matched to
+# index: position among the archive's submissions, used as the submission id
+FolderPlan = namedtuple('FolderPlan', ['folder', 'student_name', 'index', 'solution_files'])
+
+# Separator between the submissions of a student found in several places
+ADDITIONAL_SUBMISSION_SEPARATOR = "\n\n--- ADDITIONAL SUBMISSION ---\n\n"
+
+# Number of parsed submissions iter_submissions keeps ready for its consumer
+DEFAULT_READ_AHEAD = 8
+
+
+# Archives opened by the current worker process, so each worker reads a central directory once.
+# A pool shared by several assignments interleaves their jobs, so a few archives are kept open.
+_worker_zip_indexes = OrderedDict()
+WORKER_MAX_OPEN_ZIPS = 4
+
+
+def _get_worker_zip_index(zip_path):
+    """
+    Get the ZipIndex of the current worker process for a ZIP file.
+
+    Args:
+        zip_path: Path to the ZIP file
+
+    Returns:
+        ZipIndex: Open index of the archive
+    """
+    zip_index = _worker_zip_indexes.get(zip_path)
+    if zip_index is not None:
+        _worker_zip_indexes.move_to_end(zip_path)
+        return zip_index
+
+    while len(_worker_zip_indexes) >= WORKER_MAX_OPEN_ZIPS:
+        _, oldest = _worker_zip_indexes.popitem(last=False)
+        oldest.close()
+
+    zip_index = _worker_zip_indexes[zip_path] = ZipIndex(zip_path, max_handles=1)
+    return zip_index
+
+
+def _parse_folder_job(job):
+    """
+    Process pool entry point for parsing one submission folder.
+
+    Only takes and returns picklable values.
+
+    Args:
+        job: Tuple of (zip_path, folder, solution_files, parse_cache)
+
+    Returns:
+        tuple: See _parse_folder_files
+    """
+    zip_path, folder, solution_files, parse_cache = job
+    return _parse_folder_files(_get_worker_zip_index(zip_path), folder, solution_files, parse_cache)
+
+
+def _parse_folder_files(zip_index, folder, solution_files, parse_cache=None, on_file_parsed=None):
+    """
+    Parse all solution files of one submission folder.
+
+    Args:
+        zip_index: ZipIndex of the submissions archive
+        folder: Folder being parsed
+        solution_files: Paths of the solution files in the folder
+        parse_cache: Optional ParseCache to reuse results of earlier parses
+        on_file_parsed: Optional function called with the path of each file once it is parsed
+
+    Returns:
+        tuple: (folder, list of (filename, text), list of ImageRecords, list of (filename, message))
+    """
+    parsed_files = []
+    images = []
+    errors = []
+
+    for solution_file in solution_files:
+        # Parse each file with its own scratch submission to collect its images and errors
+        parser = StudentSubmission(0, "temp")
+        parser.parse_cache = parse_cache
+        # Images are stored by the submission they end up in, not the scratch parser
+        parser.image_store = None
+        try:
+            file_data = zip_index.read(solution_file)
+            file_content = parser.parse_file_to_text(io.BytesIO(file_data), solution_file)
+        except Exception as e:
+            parser.record_parse_error(solution_file, f"Error reading file: {e}")
+            file_content = ""
+
+        parsed_files.append((solution_file, file_content))
+        images.extend(parser.get_images())
+        errors.extend(parser.get_parse_errors())
+
+        if on_file_parsed is not None:
+            on_file_parsed(solution_file)
+
+    return folder, parsed_files, images, errors
+
+
+class IngestCancelled(Exception):
+    """Raised when an extraction is stopped through its cancel event."""
+
+
+class _ProgressTracker:
+    """
+    Counts the files and bytes processed in an extraction, reports them,
+    and stops the extraction when it is cancelled.
+    """
+
+    def __init__(self, zip_index, filenames, callback=None, cancel_event=None):
+        """
+        Initialize the tracker.
+
+        Args:
+            zip_index: ZipIndex of the submissions archive
+            filenames: Paths of all files the extraction will process
+            callback: Optional function called with an IngestProgress after each file
+            cancel_event: Optional threading.Event that cancels the extraction when set
+        """
+        self.zip_index = zip_index
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.files_total = len(filenames)
+        self.bytes_total = zip_index.total_size(filenames)
+        self.files_done = 0
+        self.bytes_done = 0
+        self.start = time.monotonic()
+
+    def check_cancelled(self):
+        """
+        Stop the extraction if it was cancelled.
+
+        Raises:
+            IngestCancelled: If the cancel event is set
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise IngestCancelled("Loading the submissions was cancelled")
+
+    def file_done(self, filename):
+        """
+        Count a processed file and report the progress.
+
+        Args:
+            filename: Path of the file in the archive
+
+        Raises:
+            IngestCancelled: If the cancel event is set
+        """
+        member = self.zip_index.get_member(filename)
+        self.files_done += 1
+        self.bytes_done += member.file_size if member is not None else 0
+
+        if self.callback is not None:
+            self.callback(IngestProgress(
+                filename, self.files_done, self.files_total,
+                self.bytes_done, self.bytes_total, time.monotonic() - self.start
+            ))
+        self.check_cancelled()
+
+
+class _FolderLoader:
+    """
+    Deferred parsing of one submission folder, run by StudentSubmission.ensure_loaded.
+    """
+
+    def __init__(self, processor, zip_index, folder, solution_files, additional=False):
+        """
+        Initialize the loader.
+
+        Args:
+            processor: FileProcessor collecting the parse errors
+            zip_index: Open ZipIndex of the submissions archive
+            folder: Folder to parse
+            solution_files: Paths of the solution files in the folder
+            additional: Append to the existing solution as an additional submission
+        """
+        self.processor = processor
+        self.zip_index = zip_index
+        self.folder = folder
+        self.solution_files = solution_files
+        self.additional = additional
+
+    def as_additional(self):
+        """Get a copy of this loader that appends to an existing solution."""
+        return _FolderLoader(self.processor, self.zip_index, self.folder, self.solution_files, additional=True)
+
+    def __call__(self, submission):
+        _, parsed_files, images, errors = _parse_folder_files(
+            self.zip_index, self.folder, self.solution_files, self.processor.parse_cache
+        )
+        segments = self.processor.build_solution_segments(parsed_files)
+
+        if self.additional:
+            submission.append_solution_segments(segments, ADDITIONAL_SUBMISSION_SEPARATOR)
+        else:
+            submission.set_solution_segments(segments)
+
+        for image in images:
+            submission.add_image(image)
+
+        for filename, message in errors:
+            submission.record_parse_error(filename, message)
+            self.processor.errors.append(ProcessingError(self.folder, filename, message))
 
 
 class FileProcessor:
@@ -17,7 +239,45 @@ class FileProcessor:
     Component for extracting submissions from various file sources.
     """
 
-    def extract_submissions(self, gradebook_path, zip_path, student_names):
+    def __init__(self, parallel=False, max_workers=None, chunk_size=1, parse_cache=None, lazy=False,
+                 executor=None):
+        """
+        Initialize the file processor.
+
+        Args:
+            parallel: Parse submission folders in a process pool
+            max_workers: Number of worker processes (None uses the CPU count)
+            chunk_size: Number of folders sent to a worker at a time
+            parse_cache: Optional ParseCache to reuse results of earlier parses
+            lazy: Only index the ZIP folders up front, and parse each
+                  submission's files the first time its content is needed
+            executor: Optional ProcessPoolExecutor shared with other processors.
+                      Folders are parsed in it instead of in a pool created
+                      for each extraction; it is not shut down here.
+        """
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.parse_cache = parse_cache
+        self.lazy = lazy
+        self.executor = executor
+
+        # ImageStore given to the submissions created here; None leaves
+        # them with StudentSubmission.default_image_store
+        self.image_store = None
+
+        # Archive kept open for submissions that are loaded lazily
+        self._zip_index = None
+
+        # Files that could not be parsed during the last extraction
+        self.errors = []
+
+        # Folders that matched several students during the last extraction,
+        # as (folder_name, chosen_name, all_matching_names) tuples
+        self.name_ambiguities = []
+
+    def extract_submissions(self, gradebook_path, zip_path, student_names, gradebook=None,
+                            progress_callback=None, cancel_event=None):
         """
         Extract student submissions from gradebook and zip files.
 
@@ -25,19 +285,30 @@ class FileProcessor:
             gradebook_path: Path to the gradebook CSV file
             zip_path: Path to the submissions ZIP file
             student_names: List of student names who submitted
+            gradebook: Optional GradebookIndex of the already loaded gradebook
+            progress_callback: Optional function called with an IngestProgress after
+                               each ZIP file is processed, on the calling thread
+            cancel_event: Optional threading.Event; setting it stops the extraction
 
         Returns:
             list: List of StudentSubmission objects
+
+        Raises:
+            IngestCancelled: If the extraction was cancelled
         """
         # Use a dictionary to store submissions by student name
         # This ensures each student only has one submission (with all files merged)
         submissions_dict = {}
+        self.errors = []
+        self.name_ambiguities = []
+        self.close()
 
-        # Load gradebook data
-        data_frame = pd.read_csv(gradebook_path)
+        # Load gradebook data unless the caller already has it
+        if gradebook is None:
+            gradebook = GradebookIndex.from_csv(gradebook_path)
 
         # First extract submissions from online text
-        online_submissions = self._extract_online_submissions(data_frame)
+        online_submissions = self._extract_online_submissions(gradebook)
 
         # Add online submissions to the dictionary
         for submission in online_submissions:
@@ -45,9 +316,10 @@ class FileProcessor:
             submissions_dict[student_name] = submission
 
         # Then extract submissions from the zip file
-        if os.path.exists(zip_path):
+        if zip_path and os.path.exists(zip_path):
             zip_submissions = self._extract_zip_submissions(
-                zip_path, student_names, set(submissions_dict.keys()), data_frame
+                zip_path, student_names, set(submissions_dict.keys()), gradebook,
+                progress_callback, cancel_event
             )
 
             # For each zip submission, check if we already have a submission for this student
@@ -58,14 +330,18 @@ class FileProcessor:
                     # If we already have a submission for this student, merge the solutions
                     existing_submission = submissions_dict[student_name]
 
-                    # Merge the solutions with a clear separator
-                    combined_solution = (
-                        existing_submission.get_solution() +
-                        "\n\n--- ADDITIONAL SUBMISSION ---\n\n" +
-                        submission.get_solution()
-                    )
-
-                    existing_submission.set_solution(combined_solution)
+                    if not submission.is_loaded():
+                        # Defer the merge until the submission is loaded
+                        for loader in submission.get_pending_loaders():
+                            existing_submission.add_loader(loader.as_additional())
+                    else:
+                        # Merge the solutions with a clear separator
+                        existing_submission.append_solution_segments(
+                            submission.get_solution_segments(),
+                            ADDITIONAL_SUBMISSION_SEPARATOR
+                        )
+                        for image in submission.get_images():
+                            existing_submission.add_image(image)
                     print(f"Merged multiple submissions for {student_name}")
                 else:
                     # If this is the first submission for this student, add it
@@ -79,38 +355,35 @@ class FileProcessor:
 
         return submissions
 
-    def _extract_online_submissions(self, data_frame):
+    def _extract_online_submissions(self, gradebook):
         """
         Extract submissions from the online text field in the gradebook.
 
         Args:
-            data_frame: Pandas DataFrame with gradebook data
+            gradebook: GradebookIndex of the gradebook
 
         Returns:
             list: List of StudentSubmission objects
         """
         submissions = []
 
-        for idx, row in data_frame.iterrows():
-            if row['Status'] == 'Submitted for grading':
-                student_name = row['Full name']
+        # Rows are filtered with column operations; only the matches are visited
+        for idx, row in gradebook.get_online_text_rows():
+            # Create submission and set the online text
+            submission = self._create_submission(idx, row['Full name'])
 
-                # Check if there's online text
-                if pd.notna(row.get('Online text')) and row['Online text'].strip():
-                    # Create submission and set the online text
-                    submission = StudentSubmission(idx, student_name)
+            # Let the StudentSubmission process the online text
+            submission.process_online_text(row['Online text'])
 
-                    # Let the StudentSubmission process the online text
-                    submission.process_online_text(row['Online text'])
+            # Set metadata
+            self._set_submission_metadata(submission, row, idx)
 
-                    # Set metadata
-                    self._set_submission_metadata(submission, row, idx)
-
-                    submissions.append(submission)
+            submissions.append(submission)
 
         return submissions
 
-    def _extract_zip_submissions(self, zip_path, student_names, processed_students, data_frame):
+    def _extract_zip_submissions(self, zip_path, student_names, processed_students, gradebook,
+                                 progress_callback=None, cancel_event=None):
         """
         Extract submissions from a zip file, merging multiple files for the same student.
 
@@ -118,104 +391,399 @@ class FileProcessor:
             zip_path: Path to the zip file
             student_names: List of student names from the gradebook
             processed_students: Set of students already processed from online text
-            data_frame: Pandas DataFrame with gradebook data
+            gradebook: GradebookIndex of the gradebook
+            progress_callback: Optional function called with an IngestProgress after each file
+            cancel_event: Optional threading.Event that cancels the extraction when set
 
         Returns:
             list: List of StudentSubmission objects
         """
         # Dictionary to store submissions by folder (to collect all files)
         folder_submissions = {}
+        jobs = []
 
-        folder_contents = self._group_files_by_folder(zip_path)
+        # Normalize the student names once for all folders
+        name_index = StudentNameIndex(student_names)
 
-        with zipfile.ZipFile(zip_path, mode='r') as zip_file:
-            # Process each folder
-            for folder, files in folder_contents.items():
-                # Find solution files in this folder
-                solution_files = [f for f in files if self._is_solution_file(f)]
+        # Read the central directory once and reuse the open archive for all reads
+        zip_index = ZipIndex(zip_path)
+        try:
+            plans, skipped_files = self._plan_zip_folders(zip_index, name_index, processed_students)
 
-                if not solution_files:
-                    continue
+            progress = _ProgressTracker(
+                zip_index,
+                skipped_files + [f for plan in plans for f in plan.solution_files],
+                progress_callback,
+                cancel_event
+            )
+            for solution_file in skipped_files:
+                progress.file_done(solution_file)
 
-                # Extract student name from the folder
-                student_name = self._extract_student_name_from_path(folder, student_names)
+            # Process each folder
+            for plan in plans:
+                progress.check_cancelled()
 
-                # Skip if we already have this student's submission from online text
-                if student_name in processed_students:
-                    print(f"Skipping zip folder for {student_name}, already processed from online text")
-                    continue
+                submission = self._create_folder_submission(plan, gradebook)
+                folder_submissions[plan.folder] = submission
 
-                # If this is the first file for this folder, create a new submission
-                if folder not in folder_submissions:
-                    idx = len(folder_submissions)
-                    submission = StudentSubmission(idx, student_name)
-                    folder_submissions[folder] = submission
-
-                    # Set metadata from gradebook if available
-                    student_row = data_frame[data_frame['Full name'] == student_name]
-                    if not student_row.empty:
-                        row = student_row.iloc[0]
-                        self._set_submission_metadata(submission, row, idx)
+                if self.lazy:
+                    submission.add_loader(_FolderLoader(self, zip_index, plan.folder, plan.solution_files))
+                    for solution_file in plan.solution_files:
+                        progress.file_done(solution_file)
                 else:
-                    submission = folder_submissions[folder]
-
-                # Process all solution files and merge them
-                for i, solution_file in enumerate(solution_files):
-                    with zip_file.open(solution_file, mode='r') as f:
-                        file_content = self._parse_file_to_text(f, solution_file)
-
-                        # First file or adding to existing content
-                        if i == 0 and not submission.get_solution():
-                            submission.set_solution(file_content)
-                        else:
-                            # Add a separator with the filename to make it clear this is a different file
-                            filename = os.path.basename(solution_file)
-                            merged_content = (
-                                submission.get_solution() +
-                                f"\n\n--- FILE: {filename} ---\n\n" +
-                                file_content
-                            )
-                            submission.set_solution(merged_content)
+                    jobs.append((zip_path, plan.folder, plan.solution_files, self.parse_cache))
+
+            # Parse the files, in a process pool if enabled; results come back in job order
+            if self.lazy:
+                results = []
+            elif (self.executor is not None or self.parallel) and len(jobs) > 1:
+                results = self._parse_in_pool(jobs, progress)
+            else:
+                results = [
+                    _parse_folder_files(zip_index, folder, solution_files, parse_cache, progress.file_done)
+                    for _, folder, solution_files, parse_cache in jobs
+                ]
+
+            for result in results:
+                self._add_folder_result(folder_submissions[result[0]], result)
+        finally:
+            # Lazy submissions keep reading from the archive until they are loaded
+            if self.lazy:
+                self._zip_index = zip_index
+            else:
+                zip_index.close()
+
+        self._report_ambiguities(name_index)
 
         # Convert the dictionary to a list
         return list(folder_submissions.values())
 
-    def _group_files_by_folder(self, zip_path):
+    def _plan_zip_folders(self, zip_index, name_index, processed_students):
         """
-        Group files in a zip file by their parent folder.
+        Match the ZIP folders with solution files to students, without reading any files.
 
         Args:
-            zip_path: Path to the zip file
+            zip_index: ZipIndex of the submissions archive
+            name_index: StudentNameIndex of the student names from the gradebook
+            processed_students: Set of students already processed from online text
+
+        Returns:
+            tuple: (list of FolderPlans in archive order, list of the solution
+                   files in folders of students already processed)
+        """
+        plans = []
+        skipped_files = []
+
+        for folder, files in zip_index.get_folder_contents().items():
+            solution_files = [f for f in files if self._is_solution_file(f)]
+            if not solution_files:
+                continue
+
+            # Extract student name from the folder
+            student_name = self._extract_student_name_from_path(folder, name_index)
+
+            # Skip if we already have this student's submission from online text
+            if student_name in processed_students:
+                print(f"Skipping zip folder for {student_name}, already processed from online text")
+                skipped_files.extend(solution_files)
+                continue
+
+            plans.append(FolderPlan(folder, student_name, len(plans), solution_files))
+
+        return plans, skipped_files
+
+    def _create_folder_submission(self, plan, gradebook):
+        """
+        Create the submission of a ZIP folder, with metadata from the gradebook if available.
+
+        Args:
+            plan: FolderPlan of the folder
+            gradebook: GradebookIndex of the gradebook
 
         Returns:
-            dict: Dictionary mapping folder paths to lists of file paths
+            StudentSubmission: The new submission, without solution
+        """
+        submission = self._create_submission(plan.index, plan.student_name)
+        row = gradebook.get_row_by_name(plan.student_name)
+        if row is not None:
+            self._set_submission_metadata(submission, row, plan.index)
+        return submission
+
+    def _add_folder_result(self, submission, result, additional=False):
         """
-        folder_contents = {}
+        Store the parsed files of a folder in its submission and record their errors.
+
+        Args:
+            submission: StudentSubmission of the folder
+            result: _parse_folder_files result of the folder
+            additional: Append to the existing solution as an additional submission
+        """
+        folder, parsed_files, images, errors = result
+        segments = self.build_solution_segments(parsed_files)
+        if additional:
+            submission.append_solution_segments(segments, ADDITIONAL_SUBMISSION_SEPARATOR)
+        else:
+            submission.set_solution_segments(segments)
+
+        for image in images:
+            submission.add_image(image)
+
+        for filename, message in errors:
+            self.errors.append(ProcessingError(folder, filename, message))
+
+    def _report_ambiguities(self, name_index):
+        """Record and print the folders that could belong to more than one student."""
+        self.name_ambiguities = name_index.get_ambiguity_report()
+        for folder_name, chosen_name, matches in self.name_ambiguities:
+            print(f"Warning: folder '{folder_name}' matches several students {matches}, using {chosen_name}")
+
+    def iter_submissions(self, gradebook_path, zip_path, student_names, gradebook=None,
+                         read_ahead=DEFAULT_READ_AHEAD, progress_callback=None, cancel_event=None):
+        """
+        Extract student submissions one at a time, as their files are parsed.
+
+        The ZIP folders are matched to students up front, from the central
+        directory alone, so the submissions come out sorted by student name
+        with the same content as from extract_submissions. A background
+        thread (and the process pool, if enabled) parses ahead of the
+        consumer, but at most read_ahead parsed submissions wait at a time,
+        so memory use does not grow with the size of the archive. Files are
+        always parsed; lazy is ignored.
+
+        Args:
+            gradebook_path: Path to the gradebook CSV file
+            zip_path: Path to the submissions ZIP file
+            student_names: List of student names who submitted
+            gradebook: Optional GradebookIndex of the already loaded gradebook
+            read_ahead: Maximum number of folders parsed before the consumer asks for them
+            progress_callback: Optional function called with an IngestProgress after
+                               each ZIP file is consumed, on the consuming thread
+            cancel_event: Optional threading.Event; setting it stops the extraction
+
+        Yields:
+            StudentSubmission: Parsed submissions sorted by student name
 
-        with zipfile.ZipFile(zip_path, mode='r') as zip_file:
-            for file_info in zip_file.infolist():
-                if file_info.is_dir():
+        Raises:
+            IngestCancelled: If the extraction was cancelled
+        """
+        self.errors = []
+        self.name_ambiguities = []
+        self.close()
+
+        if gradebook is None:
+            gradebook = GradebookIndex.from_csv(gradebook_path)
+
+        online_submissions = {
+            submission.get_student_name(): submission
+            for submission in self._extract_online_submissions(gradebook)
+        }
+
+        zip_index = None
+        plans = []
+        if zip_path and os.path.exists(zip_path):
+            zip_index = ZipIndex(zip_path)
+            name_index = StudentNameIndex(student_names)
+            plans, _ = self._plan_zip_folders(zip_index, name_index, set(online_submissions))
+            self._report_ambiguities(name_index)
+
+        # Folders of each student in archive order; several are merged into the first
+        folder_plans = {}
+        for plan in plans:
+            folder_plans.setdefault(plan.student_name, []).append(plan)
+        student_order = sorted(set(online_submissions) | set(folder_plans))
+
+        # Folders in the order the consumer needs them
+        parse_order = [plan for name in student_order for plan in folder_plans.get(name, ())]
+
+        progress = None
+        if zip_index is not None:
+            progress = _ProgressTracker(
+                zip_index, [f for plan in parse_order for f in plan.solution_files],
+                progress_callback, cancel_event
+            )
+
+        results = queue.Queue(maxsize=max(read_ahead, 1))
+        stop = threading.Event()
+        parse_thread = threading.Thread(
+            target=self._parse_ahead,
+            args=(zip_path, zip_index, parse_order, results, stop, max(read_ahead, 1)),
+            name="ingest",
+            daemon=True
+        )
+
+        try:
+            parse_thread.start()
+            for student_name in student_order:
+                if progress is not None:
+                    progress.check_cancelled()
+
+                submission = online_submissions.pop(student_name, None)
+                for plan in folder_plans.get(student_name, ()):
+                    result = results.get()
+                    if isinstance(result, Exception):
+                        raise result
+
+                    if submission is None:
+                        submission = self._create_folder_submission(plan, gradebook)
+                        self._add_folder_result(submission, result)
+                    else:
+                        self._add_folder_result(submission, result, additional=True)
+                        print(f"Merged multiple submissions for {student_name}")
+
+                    for solution_file in plan.solution_files:
+                        progress.file_done(solution_file)
+
+                yield submission
+        finally:
+            # Unblock the parsing thread if the consumer stopped early
+            stop.set()
+            while parse_thread.is_alive():
+                try:
+                    results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            if zip_index is not None:
+                zip_index.close()
+
+    def _parse_ahead(self, zip_path, zip_index, plans, results, stop, read_ahead):
+        """
+        Parse submission folders in order for iter_submissions, on its background thread.
+
+        Args:
+            zip_path: Path to the submissions ZIP file
+            zip_index: ZipIndex of the archive, used when parsing in this thread
+            plans: FolderPlans in the order their results are needed
+            results: Bounded queue.Queue to put the _parse_folder_files results on,
+                     or the exception that stopped parsing
+            stop: threading.Event set when the consumer no longer needs results
+            read_ahead: Maximum number of folders parsed in the pool at a time
+        """
+        executor = None
+        if (self.executor is not None or self.parallel) and len(plans) > 1:
+            executor = self.executor or ProcessPoolExecutor(max_workers=self.max_workers)
+
+        pending = deque()
+        try:
+            for plan in plans:
+                if stop.is_set():
+                    return
+
+                if executor is None:
+                    results.put(_parse_folder_files(zip_index, plan.folder, plan.solution_files, self.parse_cache))
                     continue
 
-                # Extract the folder path (student identifier)
-                folder_path = os.path.dirname(file_info.filename)
-                if not folder_path:
-                    continue  # Skip files in the root of the zip
+                pending.append(executor.submit(
+                    _parse_folder_job, (zip_path, plan.folder, plan.solution_files, self.parse_cache)
+                ))
+                if len(pending) >= read_ahead:
+                    results.put(pending.popleft().result())
+
+            while pending and not stop.is_set():
+                results.put(pending.popleft().result())
+        except Exception as e:
+            results.put(e)
+        finally:
+            for future in pending:
+                future.cancel()
+            if executor is not None and executor is not self.executor:
+                executor.shutdown(cancel_futures=True)
+
+    def _parse_in_pool(self, jobs, progress):
+        """
+        Parse submission folders in the shared process pool, or in a pool of their own.
 
-                if folder_path not in folder_contents:
-                    folder_contents[folder_path] = []
+        Args:
+            jobs: List of _parse_folder_job arguments
+            progress: _ProgressTracker of the extraction
 
-                folder_contents[folder_path].append(file_info.filename)
+        Returns:
+            list: _parse_folder_files results in job order
 
-        return folder_contents
+        Raises:
+            IngestCancelled: If the extraction was cancelled; jobs not started are dropped
+        """
+        executor = self.executor or ProcessPoolExecutor(max_workers=self.max_workers)
+        results_iter = executor.map(_parse_folder_job, jobs, chunksize=self.chunk_size)
+        try:
+            results = []
+            for result in results_iter:
+                results.append(result)
+                for solution_file, _ in result[1]:
+                    progress.file_done(solution_file)
+            return results
+        finally:
+            # Closing the iterator cancels the jobs that haven't started
+            results_iter.close()
+            if executor is not self.executor:
+                executor.shutdown(cancel_futures=True)
+
+    def _create_submission(self, idx, student_name):
+        """
+        Create a submission that stores its images in this processor's image store.
+
+        Args:
+            idx: Index of the submission
+            student_name: Name of the student
 
-    def _extract_student_name_from_path(self, file_path, student_names):
+        Returns:
+            StudentSubmission: The new submission
+        """
+        submission = StudentSubmission(idx, student_name)
+        if self.image_store is not None:
+            submission.image_store = self.image_store
+        return submission
+
+    def build_solution_segments(self, parsed_files):
+        """
+        Build the solution segments of the parsed files of a folder.
+
+        Args:
+            parsed_files: List of (filename, text) tuples in folder order
+
+        Returns:
+            list: SolutionSegments of the texts, with a separator naming each file after the first
+        """
+        segments = []
+        for i, (solution_file, file_content) in enumerate(parsed_files):
+            if i > 0:
+                # Add a separator with the filename to make it clear this is a different file
+                filename = os.path.basename(solution_file)
+                segments.append(SolutionSegment(SEGMENT_SEPARATOR, None, f"\n\n--- FILE: {filename} ---\n\n"))
+            segments.append(SolutionSegment(SEGMENT_FILE, solution_file, file_content))
+        return segments
+
+    def add_folder_loaders(self, submission, zip_path, sources):
+        """
+        Defer parsing of submission folders, e.g. for a resumed session whose
+        submission content was never loaded.
+
+        Args:
+            submission: StudentSubmission to fill in when it is first needed
+            zip_path: Path to the submissions ZIP file
+            sources: List of (folder, solution_files) tuples, in merge order
+        """
+        if self._zip_index is None or self._zip_index.zip_path != zip_path:
+            self.close()
+            self._zip_index = ZipIndex(zip_path)
+
+        for i, (folder, solution_files) in enumerate(sources):
+            submission.add_loader(
+                _FolderLoader(self, self._zip_index, folder, solution_files, additional=i > 0)
+            )
+
+    def close(self):
+        """Close the archive kept open for lazily loaded submissions."""
+        if self._zip_index is not None:
+            self._zip_index.close()
+            self._zip_index = None
+
+    def _extract_student_name_from_path(self, file_path, name_index):
         """
         Extract student name from a file path by matching against known names.
 
         Args:
             file_path: Path to match against
-            student_names: List of known student names
+            name_index: StudentNameIndex of the known student names
 
         Returns:
             str: Matched student name or the folder name
@@ -224,14 +792,9 @@ class FileProcessor:
         folder_name = os.path.basename(file_path)
 
         # Try to match against known student names
-        for student_name in student_names:
-            # Create simplified versions for comparison
-            simplified_folder = re.sub(r'[^a-zA-Z0-9]', '', folder_name.lower())
-            simplified_student = re.sub(r'[^a-zA-Z0-9]', '', student_name.lower())
-
-            # Check if the student name is contained in the folder name
-            if simplified_student in simplified_folder or simplified_folder in simplified_student:
-                return student_name
+        student_name = name_index.match(folder_name)
+        if student_name is not None:
+            return student_name
 
         # Try to extract a name using patterns
         matches = re.findall(r'[A-Z]+\s*[A-Z]+', folder_name)
@@ -260,22 +823,13 @@ class FileProcessor:
                 return True
         return False
 
-    def _parse_file_to_text(self, file_obj, filename):
-        """
-        Parse a file to extract its text content.
-        This is a simplified version - in production, use StudentSubmission.parse_file_to_text
-        """
-        from models.student_submission import StudentSubmission
-        dummy_submission = StudentSubmission(0, "temp")
-        return dummy_submission.parse_file_to_text(file_obj, filename)
-
     def _set_submission_metadata(self, submission, row, idx):
         """
         Set metadata for a submission from a gradebook row.
 
         Args:
             submission: StudentSubmission object to update
-            row: Pandas Series with gradebook data
+            row: Gradebook row as a Pandas Series or dict
             idx: Index for default ID generation
         """
         submission.set_identifier(row.get('Identifier', f"ID_{idx}"))
@@ -0,0 +1,129 @@
+"""
+GradebookIndex - Keyed access to the rows of a gradebook DataFrame
+
+This module builds dictionaries over the gradebook once, so that looking up
+a student's row does not scan the whole DataFrame.
+"""
+
+from utils.lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+
+
+SUBMITTED_STATUS = 'Submitted for grading'
+
+
+class GradebookIndex:
+    """
+    Index of gradebook rows by student full name and by identifier.
+    """
+
+    def __init__(self, data_frame):
+        """
+        Build the index over a gradebook DataFrame.
+
+        Args:
+            data_frame: Pandas DataFrame with gradebook data
+        """
+        self.data_frame = data_frame
+
+        # Row positions (for iloc) of each name and identifier, in gradebook order
+        self._positions_by_name = self._build_positions('Full name')
+        self._positions_by_identifier = self._build_positions('Identifier')
+
+    @classmethod
+    def from_csv(cls, gradebook_path):
+        """
+        Load a gradebook CSV file and index it.
+
+        Args:
+            gradebook_path: Path to the gradebook CSV file
+
+        Returns:
+            GradebookIndex: Index over the loaded gradebook
+        """
+        return cls(pd.read_csv(gradebook_path))
+
+    def _build_positions(self, column):
+        """Map each value of a column to the row positions holding it."""
+        positions = {}
+        if column in self.data_frame.columns:
+            for pos, value in enumerate(self.data_frame[column].tolist()):
+                positions.setdefault(value, []).append(pos)
+        return positions
+
+    def get_positions_by_name(self, student_name):
+        """
+        Get the row positions of a student.
+
+        Args:
+            student_name: Full name of the student
+
+        Returns:
+            list: Row positions (for use with iloc), empty if the student is not in the gradebook
+        """
+        return self._positions_by_name.get(student_name, [])
+
+    def get_row_by_name(self, student_name):
+        """
+        Get the first gradebook row of a student.
+
+        Args:
+            student_name: Full name of the student
+
+        Returns:
+            pandas.Series: The row, or None if the student is not in the gradebook
+        """
+        positions = self._positions_by_name.get(student_name)
+        if not positions:
+            return None
+        return self.data_frame.iloc[positions[0]]
+
+    def get_row_by_identifier(self, identifier):
+        """
+        Get the gradebook row with an identifier.
+
+        Args:
+            identifier: Identifier of the participant
+
+        Returns:
+            pandas.Series: The row, or None if the identifier is not in the gradebook
+        """
+        positions = self._positions_by_identifier.get(identifier)
+        if not positions:
+            return None
+        return self.data_frame.iloc[positions[0]]
+
+    def get_submitted_names(self):
+        """
+        Get the names of the students who submitted.
+
+        Returns:
+            list: Full names of students with the submitted status
+        """
+        data_frame = self.data_frame
+        if 'Status' not in data_frame.columns or 'Full name' not in data_frame.columns:
+            raise ValueError("Could not find required columns in gradebook CSV")
+
+        return data_frame.loc[data_frame['Status'] == SUBMITTED_STATUS, 'Full name'].tolist()
+
+    def get_online_text_rows(self):
+        """
+        Get the submitted rows that have online text, using column operations.
+
+        Returns:
+            list: List of (index_label, row_dict) tuples in gradebook order
+        """
+        data_frame = self.data_frame
+        if 'Status' not in data_frame.columns or 'Online text' not in data_frame.columns:
+            return []
+
+        online_text = data_frame['Online text']
+        mask = (
+            (data_frame['Status'] == SUBMITTED_STATUS) &
+            online_text.notna() &
+            (online_text.astype(str).str.strip() != '')
+        )
+
+        selected = data_frame[mask]
+        return list(zip(selected.index, selected.to_dict('records')))
@@ -68,6 +68,10 @@ class GradingWorkflow:
         num_processed = len(submissions)
 
         print(f"Successfully processed {num_processed} out of {num_students_submitted} submissions.")
+        # Report files that could not be parsed
+        for error in self.assignment.file_processor.errors:
+            print(f"Error processing {error.filename}: {error.message}")
+
         print(f"\nReady to grade submissions for '{assignment_name}'")
 
         # Print a warning if there's a mismatch between submitted and processed
@@ -150,7 +154,6 @@ class GradingWorkflow:
         Display statistics about the assignment submissions.
         """
         submissions = self.assignment.get_submissions()
-        data_frame = self.assignment.data_frame
 
         if not submissions:
             print("\n--- ASSIGNMENT STATISTICS ---")
@@ -160,7 +163,7 @@ class GradingWorkflow:
             return
 
         # Calculate statistics
-        stats = self.stats_calculator.calculate_statistics(submissions, data_frame)
+        stats = self.stats_calculator.calculate_statistics(submissions, self.assignment.get_submission_table())
 
         # Display statistics
         print("\n--- ASSIGNMENT STATISTICS ---")
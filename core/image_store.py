@@ -0,0 +1,204 @@
+"""
+ImageStore - Assignment-wide store of the images in all submissions
+
+Students often submit the same template screenshots or course logos.
+This module keeps one copy of the bytes of each distinct image content,
+shared by every submission containing it (each submission's record keeps
+its own format and description), and tracks which students submitted
+each image. Near-identical copies (resized or recompressed) are found
+with a perceptual hash, so the grader can be told when an image also
+appears in other submissions.
+
+To find near-identical images without comparing each new image with every
+stored one, the 64-bit dHashes are split into one more band of bits than
+the similarity threshold. Two hashes that differ in at most threshold bits
+must agree exactly on at least one band, so only the images sharing a
+band with the new one are compared.
+"""
+
+import threading
+
+from utils.image_utils import difference_hash
+
+
+# Maximum number of differing dHash bits for two images to count as the same picture
+DEFAULT_SIMILARITY_THRESHOLD = 4
+
+# Number of bits of the dHashes computed by difference_hash
+HASH_BITS = 64
+
+
+def _split_bands(band_count):
+    """
+    Split the bits of a dHash into bands of nearly equal width.
+
+    Args:
+        band_count: Number of bands
+
+    Returns:
+        list: (shift, mask) of each band
+    """
+    bands = []
+    shift = 0
+    for band in range(band_count):
+        width = HASH_BITS // band_count + (band < HASH_BITS % band_count)
+        bands.append((shift, (1 << width) - 1))
+        shift += width
+    return bands
+
+
+class ImageStore:
+    """
+    Content-addressed store of ImageRecords, keyed by SHA-256 and by dHash.
+    """
+
+    def __init__(self, blob_store=None, similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD):
+        """
+        Initialize the store.
+
+        Args:
+            blob_store: Optional ImageBlobStore that new images are moved into
+            similarity_threshold: Maximum dHash distance of near-identical images
+                                  (less than HASH_BITS), or None to match exact copies only
+        """
+        self.blob_store = blob_store
+        self.similarity_threshold = similarity_threshold
+
+        # Canonical record and owners (student names) of each distinct content
+        self._records = {}
+        self._owners = {}
+
+        # dHash of each content (None if it could not be decoded), and the
+        # contents whose dHash is within the threshold of it
+        self._hashes = {}
+        self._similar = {}
+
+        # Contents by (band index, band value) of their dHash
+        self._bands = _split_bands(similarity_threshold + 1) if similarity_threshold is not None else []
+        self._buckets = {}
+
+        # Submissions add images from the Tk thread and from prefetch threads
+        self._lock = threading.Lock()
+
+    def add(self, image, owner):
+        """
+        Add an image, getting a record that shares the stored copy of its content.
+
+        Only the bytes are shared between students: the returned record keeps
+        the format and description of the image being added, so one
+        student's file names never show up in another student's submission.
+
+        Args:
+            image: ImageRecord to add
+            owner: Name of the student whose submission contains the image
+
+        Returns:
+            ImageRecord: The image itself if its content is new, otherwise a
+                         record of it sharing the stored bytes
+        """
+        with self._lock:
+            record = self._records.get(image.sha256)
+            if record is not None:
+                self._owners[image.sha256].add(owner)
+                return record.share(image.image_format, image.description)
+
+        # New content: hash the picture outside the lock, since it decodes the image
+        perceptual_hash = self._perceptual_hash(image)
+
+        with self._lock:
+            # Another thread may have added the same content meanwhile
+            record = self._records.get(image.sha256)
+            if record is not None:
+                self._owners[image.sha256].add(owner)
+                return record.share(image.image_format, image.description)
+
+            if self.blob_store is not None:
+                image.spill(self.blob_store)
+
+            self._records[image.sha256] = image
+            self._owners[image.sha256] = {owner}
+            self._add_similar(image.sha256, perceptual_hash)
+            return image
+
+    def _perceptual_hash(self, image):
+        """Compute the dHash of a record, or None if matching is off or decoding fails."""
+        if self.similarity_threshold is None:
+            return None
+        try:
+            with image.open() as img:
+                return difference_hash(img)
+        except Exception as e:
+            print(f"Error hashing image {image.description}: {e}")
+            return None
+
+    def _add_similar(self, sha256, perceptual_hash):
+        """Link a new content to the stored contents that look the same (caller holds the lock)."""
+        similar = set()
+        if perceptual_hash is not None:
+            keys = [(band, (perceptual_hash >> shift) & mask) for band, (shift, mask) in enumerate(self._bands)]
+
+            # Only contents agreeing on a whole band can be within the threshold
+            candidates = set()
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+
+            for other_sha256 in candidates:
+                if bin(perceptual_hash ^ self._hashes[other_sha256]).count('1') <= self.similarity_threshold:
+                    similar.add(other_sha256)
+                    self._similar[other_sha256].add(sha256)
+
+            for key in keys:
+                self._buckets.setdefault(key, []).append(sha256)
+
+        self._hashes[sha256] = perceptual_hash
+        self._similar[sha256] = similar
+
+    def get_shared_owners(self, image, owner=None):
+        """
+        Get the other students who submitted the same or a near-identical image.
+
+        Args:
+            image: ImageRecord in the store
+            owner: Name of the student to leave out
+
+        Returns:
+            list: Sorted names of the other students
+        """
+        with self._lock:
+            owners = set(self._owners.get(image.sha256, ()))
+            for sha256 in self._similar.get(image.sha256, ()):
+                owners.update(self._owners[sha256])
+
+        owners.discard(owner)
+        return sorted(owners, key=str)
+
+    def is_shared(self, image, owner=None):
+        """
+        Check if an image also appears in another student's submission.
+
+        Args:
+            image: ImageRecord in the store
+            owner: Name of the student whose submission is being viewed
+
+        Returns:
+            bool: True if another student submitted the same or a near-identical image
+        """
+        return bool(self.get_shared_owners(image, owner))
+
+    def get_stats(self):
+        """
+        Get the number of distinct images and of image references.
+
+        Returns:
+            dict: 'unique_images', 'references' and 'stored_bytes'
+        """
+        with self._lock:
+            return {
+                'unique_images': len(self._records),
+                'references': sum(len(owners) for owners in self._owners.values()),
+                'stored_bytes': sum(record.size for record in self._records.values())
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
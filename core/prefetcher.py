@@ -0,0 +1,79 @@
+"""
+Prefetcher - Prepares items ahead of use on a background thread
+
+This module runs a preparation function for the items the user is likely
+to need next, so that the work is already done when they are requested.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Prefetcher:
+    """
+    Background preparation of keyed items within a moving window.
+
+    Prepared items are kept until they fall out of the window passed to
+    prefetch, so moving back and forth inside the window costs nothing.
+    """
+
+    def __init__(self, prepare, max_workers=1):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            prepare: Function taking a key and returning the prepared item.
+                     It runs on a worker thread, so it must not touch Tkinter.
+            max_workers: Number of worker threads
+        """
+        self.prepare = prepare
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._futures = {}
+
+    def prefetch(self, keys):
+        """
+        Start preparing items, dropping items outside the new window.
+
+        Args:
+            keys: Keys of the items that will likely be requested soon
+        """
+        keys = list(keys)
+
+        # Forget work outside the new window; cancel it if it has not started
+        for key in list(self._futures):
+            if key not in keys:
+                self._futures.pop(key).cancel()
+
+        for key in keys:
+            if key not in self._futures:
+                self._futures[key] = self._executor.submit(self.prepare, key)
+
+    def get(self, key):
+        """
+        Get a prepared item, waiting for its prefetch or preparing it now.
+
+        Args:
+            key: Key of the item
+
+        Returns:
+            The prepared item
+        """
+        future = self._futures.get(key)
+        if future is not None and not future.cancelled():
+            try:
+                return future.result()
+            except Exception as e:
+                print(f"Error prefetching {key}: {e}")
+                self._futures.pop(key, None)
+
+        return self.prepare(key)
+
+    def clear(self):
+        """Forget all prefetched items, cancelling work that has not started."""
+        for future in self._futures.values():
+            future.cancel()
+        self._futures = {}
+
+    def shutdown(self):
+        """Stop the worker threads without waiting for pending work."""
+        self.clear()
+        self._executor.shutdown(wait=False)
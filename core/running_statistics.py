@@ -0,0 +1,232 @@
+"""
+RunningStatistics - Statistics of a changing collection of numbers
+
+This module keeps the count, mean and variance of a multiset of values
+with Welford's method, and the values themselves in sorted order, so that
+adding, removing or replacing one value updates every statistic without
+a pass over the whole collection. Keeping the values sorted takes
+O(log n) per update with sortedcontainers (a requirement); without it a
+plain list with bisect is used, whose updates are O(n).
+"""
+
+import math
+from bisect import bisect_left, bisect_right, insort
+
+try:
+    from sortedcontainers import SortedList
+    HAS_SORTEDCONTAINERS = True
+except ImportError:
+    HAS_SORTEDCONTAINERS = False
+
+
+class _SortedValues:
+    """Sorted list of values on top of bisect, used when sortedcontainers is missing (O(n) updates)."""
+
+    def __init__(self):
+        self._values = []
+
+    def add(self, value):
+        insort(self._values, value)
+
+    def remove(self, value):
+        index = bisect_left(self._values, value)
+        if index == len(self._values) or self._values[index] != value:
+            raise ValueError(f"{value} is not in the list")
+        del self._values[index]
+
+    def bisect_left(self, value):
+        return bisect_left(self._values, value)
+
+    def bisect_right(self, value):
+        return bisect_right(self._values, value)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+
+class RunningStatistics:
+    """
+    Incrementally updated statistics of a multiset of numbers.
+
+    Mean and variance are updated in O(1) with Welford's method. The values
+    are kept sorted, so min, max, median and percentiles are lookups.
+    Updates are O(log n) with sortedcontainers and O(n) with the bisect
+    list fallback, which shifts the values after each insert or removal.
+    """
+
+    def __init__(self, values=()):
+        """
+        Initialize the statistics.
+
+        Args:
+            values: Optional initial values
+        """
+        self._sorted = SortedList() if HAS_SORTEDCONTAINERS else _SortedValues()
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        """
+        Add a value.
+
+        Args:
+            value: Number to add
+        """
+        value = float(value)
+        self._sorted.add(value)
+
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+    def remove(self, value):
+        """
+        Remove one occurrence of a value.
+
+        Args:
+            value: Number previously added
+
+        Raises:
+            ValueError: If the value is not in the collection
+        """
+        value = float(value)
+        self._sorted.remove(value)
+
+        if self.count == 1:
+            self.count = 0
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+
+        # Welford's update run backwards
+        delta = value - self._mean
+        self._mean = (self._mean * self.count - value) / (self.count - 1)
+        self._m2 = max(self._m2 - delta * (value - self._mean), 0.0)
+        self.count -= 1
+
+    def replace(self, old_value, new_value):
+        """
+        Replace one value by another, as when a grade changes.
+
+        Args:
+            old_value: Number previously added, or None to only add
+            new_value: Number to add, or None to only remove
+        """
+        if old_value is not None:
+            self.remove(old_value)
+        if new_value is not None:
+            self.add(new_value)
+
+    @property
+    def mean(self):
+        """Mean of the values (0 if empty)."""
+        return self._mean if self.count else 0
+
+    def variance(self, ddof=0):
+        """
+        Variance of the values.
+
+        Args:
+            ddof: Delta degrees of freedom (0 for population, 1 for sample variance)
+
+        Returns:
+            float: The variance, or 0 if there are not enough values
+        """
+        if self.count - ddof <= 0:
+            return 0
+        return self._m2 / (self.count - ddof)
+
+    def std(self, ddof=0):
+        """
+        Standard deviation of the values.
+
+        Args:
+            ddof: Delta degrees of freedom (0 for population, 1 for sample deviation)
+
+        Returns:
+            float: The standard deviation, or 0 if there are not enough values
+        """
+        return math.sqrt(self.variance(ddof))
+
+    @property
+    def min(self):
+        """Smallest value (0 if empty)."""
+        return self._sorted[0] if self.count else 0
+
+    @property
+    def max(self):
+        """Largest value (0 if empty)."""
+        return self._sorted[-1] if self.count else 0
+
+    def percentile(self, percent):
+        """
+        Percentile of the values, interpolated linearly like numpy.percentile.
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            float: The percentile (0 if empty)
+        """
+        if not self.count:
+            return 0
+
+        position = (self.count - 1) * percent / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, self.count - 1)
+        fraction = position - lower
+        return self._sorted[lower] + (self._sorted[upper] - self._sorted[lower]) * fraction
+
+    @property
+    def median(self):
+        """Median of the values (0 if empty)."""
+        return self.percentile(50)
+
+    def histogram(self, bins=10, value_range=None):
+        """
+        Count the values in equal-width bins, like numpy.histogram.
+
+        Args:
+            bins: Number of bins
+            value_range: (low, high) of the bins; the range of the values if None
+
+        Returns:
+            tuple: (bin_edges, counts) lists; the last bin includes its right edge
+        """
+        if value_range is None:
+            low, high = (self.min, self.max) if self.count else (0, 1)
+            if low == high:
+                low, high = low - 0.5, high + 0.5
+        else:
+            low, high = value_range
+
+        edges = [low + (high - low) * i / bins for i in range(bins + 1)]
+        starts = [self._sorted.bisect_left(edge) for edge in edges]
+        end = self._sorted.bisect_right(high)
+
+        counts = [starts[i + 1] - starts[i] for i in range(bins - 1)]
+        counts.append(end - starts[bins - 1])
+        return edges, counts
+
+    def __len__(self):
+        return self.count
+
+    def values(self):
+        """
+        Get the values in ascending order.
+
+        Returns:
+            list: The values
+        """
+        return list(self._sorted)
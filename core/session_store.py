@@ -0,0 +1,568 @@
+"""
+SessionStore - Persistent grading session backed by SQLite
+
+This module saves the parsed submissions and the grading progress of an
+assignment to a SQLite database in write-ahead-log mode. Each save is a
+small transaction, so a crash loses at most the submission being edited,
+and a session can be resumed without re-parsing the ZIP file.
+"""
+
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from models.student_submission import StudentSubmission, SolutionSegment
+
+
+DEFAULT_SESSION_DIR = os.path.join(os.path.expanduser("~"), ".george_grader", "sessions")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS session (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS submissions (
+    row INTEGER PRIMARY KEY,
+    submission_id,
+    student_name TEXT,
+    identifier TEXT,
+    email TEXT,
+    solution TEXT,
+    grade REAL,
+    feedback TEXT,
+    sources TEXT,
+    segments TEXT
+);
+CREATE TABLE IF NOT EXISTS images (
+    row INTEGER,
+    position INTEGER,
+    format TEXT,
+    description TEXT,
+    data BLOB,
+    PRIMARY KEY (row, position)
+);
+"""
+
+
+def get_default_session_path(assignment_name):
+    """
+    Get the default session file path for an assignment.
+
+    Args:
+        assignment_name: Name of the assignment
+
+    Returns:
+        str: Path to the session database file
+    """
+    return os.path.join(DEFAULT_SESSION_DIR, f"{_get_safe_name(assignment_name)}.sqlite")
+
+
+def _get_safe_name(assignment_name):
+    """Make an assignment name usable as a file name."""
+    return "".join(c if c.isalnum() or c in "-_ " else "_" for c in assignment_name or "session")
+
+
+def find_session_files(assignment_name):
+    """
+    Find the session files of an assignment in the default session directory.
+
+    Args:
+        assignment_name: Name of the assignment
+
+    Returns:
+        list: Paths of the default session file and the timestamped ones
+              added by get_unused_session_path, most recently modified first
+    """
+    default_path = get_default_session_path(assignment_name)
+    base, extension = os.path.splitext(default_path)
+
+    # Only timestamped names, so 'Assignment1' doesn't pick up 'Assignment10'
+    paths = glob.glob(f"{glob.escape(base)}_{'[0-9]' * 8}-{'[0-9]' * 6}*{extension}")
+    if os.path.exists(default_path):
+        paths.append(default_path)
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def find_latest_graded_session(assignment_name):
+    """
+    Find the most recently modified session of an assignment with graded submissions.
+
+    Args:
+        assignment_name: Name of the assignment
+
+    Returns:
+        tuple: (path, number_of_graded_submissions), or (None, 0) if there is none
+    """
+    for db_path in find_session_files(assignment_name):
+        graded = count_graded_submissions(db_path)
+        if graded:
+            return db_path, graded
+    return None, 0
+
+
+def get_new_session_path(assignment_name):
+    """
+    Get a session file path for an assignment that no graded session uses.
+
+    The most recent session file of the assignment without graded
+    submissions is reused, then the default path if it is free; otherwise
+    a timestamp is added, so an earlier session with graded work is never
+    replaced.
+
+    Args:
+        assignment_name: Name of the assignment
+
+    Returns:
+        str: Path to a session database file that is free or can be replaced
+    """
+    for db_path in find_session_files(assignment_name):
+        if _count_graded_rows(db_path) == 0:
+            return db_path
+    return get_unused_session_path(get_default_session_path(assignment_name))
+
+
+def get_unused_session_path(db_path):
+    """
+    Get a path like a session file path that no existing file uses.
+
+    Args:
+        db_path: Preferred path of the session database
+
+    Returns:
+        str: The path itself if it is free, otherwise the path with a timestamp added
+    """
+    if not os.path.exists(db_path):
+        return db_path
+
+    base, extension = os.path.splitext(db_path)
+    base = f"{base}_{time.strftime('%Y%m%d-%H%M%S')}"
+    db_path = f"{base}{extension}"
+    counter = 2
+    while os.path.exists(db_path):
+        db_path = f"{base}_{counter}{extension}"
+        counter += 1
+    return db_path
+
+
+def count_graded_submissions(db_path):
+    """
+    Count the submissions of a session file that have a grade or feedback.
+
+    Args:
+        db_path: Path to the session database
+
+    Returns:
+        int: Number of graded submissions, 0 if the file is missing or not a session
+    """
+    if not os.path.exists(db_path):
+        return 0
+    return _count_graded_rows(db_path) or 0
+
+
+def _count_graded_rows(db_path):
+    """
+    Count the graded submissions of an existing session file.
+
+    Args:
+        db_path: Path to the session database
+
+    Returns:
+        int: Number of graded submissions, or None if the file is not a readable session
+    """
+    try:
+        # Read-only, so checking never creates or changes the file
+        connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            (count,) = connection.execute(
+                "SELECT COUNT(*) FROM submissions "
+                "WHERE grade IS NOT NULL OR (feedback IS NOT NULL AND feedback != '')"
+            ).fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        print(f"Could not read session {db_path}: {e}")
+        return None
+    return count
+
+
+class SessionStore:
+    """
+    SQLite storage for the submissions and grades of one assignment.
+    """
+
+    def __init__(self, db_path):
+        """
+        Open (or create) a session database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # The connection is shared with background loaders, guarded by a lock
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+
+        # Row of each submission saved or loaded through this store
+        self._rows = {}
+
+        # Rows whose solution and images have not been stored yet, because the
+        # submission was not loaded when the session was saved
+        self._pending_rows = set()
+
+        # ZIP folders still to be parsed for submissions loaded without content
+        self._pending_sources = {}
+
+    def _migrate(self):
+        """Add columns missing from session files written by older versions."""
+        columns = [info[1] for info in self.connection.execute("PRAGMA table_info(submissions)")]
+        if 'sources' not in columns:
+            self.connection.execute("ALTER TABLE submissions ADD COLUMN sources TEXT")
+        if 'segments' not in columns:
+            self.connection.execute("ALTER TABLE submissions ADD COLUMN segments TEXT")
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self.connection.close()
+
+    def save_session(self, assignment, submissions=None):
+        """
+        Write the whole assignment to the store, replacing any previous content.
+
+        Args:
+            assignment: Assignment whose submissions have been loaded
+            submissions: Optional iterable of submissions to write instead of the
+                         assignment's, e.g. Assignment.iter_submissions. They are
+                         written as they are produced and not remembered, so
+                         save_submission can't update them later.
+
+        Returns:
+            int: Number of submissions written
+        """
+        streamed = submissions is not None
+        if not streamed:
+            submissions = assignment.get_submissions()
+
+        metadata = {
+            'assignment_name': assignment.assignment_name,
+            'reference_solution': assignment.reference_solution,
+            'gradebook_csv_file_path': assignment.gradebook_csv_file_path,
+            'submissions_zip_path': assignment.submissions_zip_path,
+            'names_of_students_submit': json.dumps(assignment.names_of_students_submit)
+        }
+
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM session")
+            self.connection.execute("DELETE FROM submissions")
+            self.connection.execute("DELETE FROM images")
+            self._pending_rows = set()
+
+            self.connection.executemany(
+                "INSERT INTO session (key, value) VALUES (?, ?)",
+                list(metadata.items())
+            )
+
+            count = 0
+            for row, submission in enumerate(submissions):
+                self._insert_submission(row, submission, remember=not streamed)
+                count += 1
+        return count
+
+    def _insert_submission(self, row, submission, remember=True):
+        """
+        Insert a submission and its images (caller holds the lock and transaction).
+
+        Args:
+            row: Row of the submission
+            submission: StudentSubmission to insert
+            remember: Keep the submission's row so save_submission can update it
+        """
+        # Lazily loaded submissions are stored with the folders to parse instead of their content
+        sources = None
+        if not submission.is_loaded():
+            sources = [
+                (loader.folder, loader.solution_files)
+                for loader in submission.get_pending_loaders()
+                if hasattr(loader, 'folder')
+            ]
+
+        self.connection.execute(
+            "INSERT INTO submissions (row, submission_id, student_name, identifier, email, "
+            "solution, grade, feedback, sources, segments) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                row,
+                submission.submission_id,
+                submission.get_student_name(),
+                str(submission.get_identifier()),
+                str(submission.get_email()),
+                None if sources is not None else submission.get_solution(),
+                submission.get_grade(),
+                submission.get_feedback(),
+                json.dumps(sources) if sources is not None else None,
+                None if sources is not None else self._encode_segments(submission)
+            )
+        )
+
+        if sources is None:
+            self._insert_images(row, submission)
+        else:
+            self._pending_rows.add(row)
+
+        if remember:
+            self._rows[submission] = row
+
+    def _encode_segments(self, submission):
+        """Encode the layout of a submission's solution as JSON [kind, source, length] lists."""
+        return json.dumps([
+            [segment.kind, segment.source, len(segment.text)]
+            for segment in submission.get_solution_segments()
+        ])
+
+    def _decode_segments(self, solution, segments):
+        """Rebuild solution segments from the stored text and layout."""
+        decoded = []
+        position = 0
+        for kind, source, length in json.loads(segments):
+            decoded.append(SolutionSegment(kind, source, solution[position:position + length]))
+            position += length
+        return decoded
+
+    def _insert_images(self, row, submission):
+        """Insert the images of a submission (caller holds the lock and transaction)."""
+        for position, image in enumerate(submission.get_images()):
+            self.connection.execute(
+                "INSERT INTO images (row, position, format, description, data) VALUES (?, ?, ?, ?, ?)",
+                (row, position, image.image_format, image.description, sqlite3.Binary(image.get_bytes()))
+            )
+
+    def save_submission(self, submission):
+        """
+        Save the grade and feedback of a submission in one small transaction.
+        The solution and images are stored too if they were loaded since the session was saved.
+
+        Args:
+            submission: StudentSubmission saved or loaded through this store
+
+        Returns:
+            bool: True if the submission was saved, False if it is not in the store
+        """
+        row = self._rows.get(submission)
+        if row is None:
+            return False
+
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE submissions SET grade = ?, feedback = ? WHERE row = ?",
+                (submission.get_grade(), submission.get_feedback(), row)
+            )
+
+            if row in self._pending_rows and submission.is_loaded():
+                self.connection.execute(
+                    "UPDATE submissions SET solution = ?, sources = NULL, segments = ? WHERE row = ?",
+                    (submission.get_solution(), self._encode_segments(submission), row)
+                )
+                self._insert_images(row, submission)
+                self._pending_rows.discard(row)
+                self._pending_sources.pop(submission, None)
+        return True
+
+    def save_reference_solution(self, solution_text):
+        """
+        Save the reference solution of the session.
+
+        Args:
+            solution_text: Reference solution text
+        """
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO session (key, value) VALUES ('reference_solution', ?)",
+                (solution_text,)
+            )
+
+    def load_metadata(self):
+        """
+        Load the assignment details saved with the session.
+
+        Returns:
+            dict: Session metadata (names_of_students_submit is decoded to a list)
+        """
+        with self._lock:
+            metadata = dict(self.connection.execute("SELECT key, value FROM session").fetchall())
+
+        metadata['names_of_students_submit'] = json.loads(metadata.get('names_of_students_submit') or "[]")
+        return metadata
+
+    def get_submission_count(self):
+        """
+        Get the number of submissions in the store.
+
+        Returns:
+            int: Number of submissions
+        """
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+    def load_submission(self, row):
+        """
+        Load one submission with its images.
+
+        Args:
+            row: Row of the submission (its position in the grading order)
+
+        Returns:
+            StudentSubmission: The loaded submission, or None if there is no such row
+        """
+        with self._lock:
+            record = self.connection.execute(
+                "SELECT submission_id, student_name, identifier, email, solution, grade, feedback, sources, segments "
+                "FROM submissions WHERE row = ?",
+                (row,)
+            ).fetchone()
+            if record is None:
+                return None
+
+            images = self.connection.execute(
+                "SELECT format, description, data FROM images WHERE row = ? ORDER BY position",
+                (row,)
+            ).fetchall()
+
+        submission_id, student_name, identifier, email, solution, grade, feedback, sources, segments = record
+
+        submission = StudentSubmission(submission_id, student_name)
+        submission.set_identifier(identifier)
+        submission.set_email(email)
+        if solution and segments:
+            submission.set_solution_segments(self._decode_segments(solution, segments))
+        else:
+            submission.set_solution(solution or "")
+        submission.set_grade(grade)
+        submission.set_feedback(feedback or "")
+        for image_format, description, data in images:
+            submission.add_image(bytes(data), image_format, description)
+
+        # Freshly loaded values match the store and the gradebook export
+        submission.clear_dirty()
+        self._rows[submission] = row
+
+        if solution is None and sources:
+            self._pending_rows.add(row)
+            self._pending_sources[submission] = [
+                (folder, solution_files) for folder, solution_files in json.loads(sources)
+            ]
+        return submission
+
+    def load_grading_values(self, include_solution=False):
+        """
+        Load the grading values of every submission, without loading the submissions or their images.
+
+        Args:
+            include_solution: Also load the solution texts
+
+        Returns:
+            list: (row, student_name, grade, feedback, solution_length, solution) tuples
+                  in row order. solution_length and solution are None for
+                  submissions whose files were never parsed, and solution is
+                  None unless included.
+        """
+        solution_column = "solution" if include_solution else "NULL"
+        with self._lock:
+            return self.connection.execute(
+                f"SELECT row, student_name, grade, feedback, LENGTH(solution), {solution_column} "
+                "FROM submissions ORDER BY row"
+            ).fetchall()
+
+    def get_row(self, submission):
+        """
+        Get the row of a submission saved or loaded through this store.
+
+        Args:
+            submission: StudentSubmission
+
+        Returns:
+            int: Row of the submission, or None if it is not in the store
+        """
+        return self._rows.get(submission)
+
+    def get_pending_sources(self, submission):
+        """
+        Get the ZIP folders still to be parsed for a submission loaded from the store.
+
+        Args:
+            submission: StudentSubmission loaded through this store
+
+        Returns:
+            list: List of (folder, solution_files) tuples, empty if its content is stored
+        """
+        return self._pending_sources.get(submission, [])
+
+
+class StoredSubmissionList:
+    """
+    Read-only list of the submissions in a SessionStore, loaded row by row on first access.
+    """
+
+    def __init__(self, store, on_load=None):
+        """
+        Initialize the list.
+
+        Args:
+            store: SessionStore to load submissions from
+            on_load: Optional callback(submission) called when a row is first loaded
+        """
+        self.store = store
+        self.on_load = on_load
+        self._length = store.get_submission_count()
+        self._loaded = {}
+
+        # Rows may be requested from background prefetch threads
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("submission index out of range")
+
+        with self._lock:
+            submission = self._loaded.get(index)
+            if submission is None:
+                submission = self.store.load_submission(index)
+                self._loaded[index] = submission
+                if self.on_load is not None:
+                    self.on_load(submission)
+        return submission
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self[index]
+
+    def get_loaded(self):
+        """
+        Get the submissions loaded so far, without loading any others.
+
+        Returns:
+            dict: Row -> StudentSubmission
+        """
+        with self._lock:
+            return dict(self._loaded)
+
+    def __bool__(self):
+        return self._length > 0
@@ -4,8 +4,39 @@ StatisticsCalculator - Calculates statistics for student submissions
 This module handles statistical analysis of submission data.
 """
 
-import pandas as pd
-import numpy as np
+from core.submission_table import SubmissionTable
+
+
+def _as_table(value, argument):
+    """
+    Get a SubmissionTable from a table or a list of submissions.
+
+    Args:
+        value: SubmissionTable, or iterable of StudentSubmission objects
+        argument: Name of the argument, for the error message
+
+    Returns:
+        SubmissionTable: The table itself, or a new table of the submissions
+
+    Raises:
+        TypeError: If value is a DataFrame (as these methods took before) or not iterable
+    """
+    if isinstance(value, SubmissionTable):
+        return value
+
+    # DataFrames are iterable too, over their column names
+    if hasattr(value, 'columns'):
+        raise TypeError(
+            f"{argument} must be a SubmissionTable or a list of submissions, not a DataFrame; "
+            "use Assignment.get_submission_table()"
+        )
+    try:
+        submissions = iter(value)
+    except TypeError:
+        raise TypeError(
+            f"{argument} must be a SubmissionTable or a list of submissions, not {type(value).__name__}"
+        ) from None
+    return SubmissionTable(submissions)
 
 
 class StatisticsCalculator:
@@ -13,31 +44,58 @@ class StatisticsCalculator:
     Component for calculating statistics on student submissions.
     """
 
-    def calculate_statistics(self, submissions, data_frame):
+    def calculate_statistics(self, submissions, table=None):
         """
         Calculate comprehensive statistics for submissions.
 
         Args:
             submissions: List of StudentSubmission objects
-            data_frame: Pandas DataFrame with submission data
+            table: Optional SubmissionTable kept in sync with the submissions.
+                   If None, a table is built from the submissions.
 
         Returns:
-            dict: Statistics dictionary with various metrics
+            dict: Statistics dictionary with various metrics. 'grades' lists the
+                  graded grades in ascending order (not in submission order).
+
+        Raises:
+            TypeError: If table is not a SubmissionTable, e.g. the DataFrame this method used to take
         """
+        if table is None:
+            table = SubmissionTable(submissions)
+        elif not isinstance(table, SubmissionTable):
+            raise TypeError(
+                f"table must be a SubmissionTable, not {type(table).__name__}; "
+                "use Assignment.get_submission_table()"
+            )
+
         # Basic counts
         stats = {
             'submission_count': len(submissions)
         }
 
-        # Grade statistics
-        grades = [sub.get_grade() for sub in submissions if sub.get_grade() is not None]
-        stats['grades'] = grades
+        # Read both statistics at one point in time; loader threads update them
+        with table.lock:
+            self._add_table_statistics(stats, table)
+
+        return stats
+
+    def _add_table_statistics(self, stats, table):
+        """
+        Add the grade and length statistics of a table (caller holds the table's lock).
 
-        if grades:
-            stats['average_grade'] = sum(grades) / len(grades)
-            stats['max_grade'] = max(grades)
-            stats['min_grade'] = min(grades)
-            stats['grade_stddev'] = np.std(grades) if len(grades) > 1 else 0
+        Args:
+            stats: Statistics dictionary to add to
+            table: SubmissionTable of the submissions
+        """
+        # Grade statistics, kept up to date by the table as grades change
+        grade_stats = table.grade_stats
+        stats['grades'] = grade_stats.values()
+
+        if grade_stats.count:
+            stats['average_grade'] = grade_stats.mean
+            stats['max_grade'] = grade_stats.max
+            stats['min_grade'] = grade_stats.min
+            stats['grade_stddev'] = grade_stats.std() if grade_stats.count > 1 else 0
         else:
             stats['average_grade'] = 0
             stats['max_grade'] = 0
@@ -45,70 +103,51 @@ class StatisticsCalculator:
             stats['grade_stddev'] = 0
 
         # Solution length statistics - only include submissions that were actually processed
-        if 'Solution Text' in data_frame.columns:
-            solution_lengths = data_frame[data_frame['Solution Text'].notna() &
-                                         (data_frame['Solution Text'] != '')]['Solution Length']
-
-            if not solution_lengths.empty:
-                stats['mean_length'] = solution_lengths.mean()
-                stats['median_length'] = solution_lengths.median()
-                stats['max_length'] = solution_lengths.max()
-                stats['min_length'] = solution_lengths.min()
-                stats['length_stddev'] = solution_lengths.std() if len(solution_lengths) > 1 else 0
-            else:
-                stats['mean_length'] = 0
-                stats['median_length'] = 0
-                stats['max_length'] = 0
-                stats['min_length'] = 0
-                stats['length_stddev'] = 0
+        length_stats = table.length_stats
+
+        if length_stats.count:
+            stats['mean_length'] = length_stats.mean
+            stats['median_length'] = length_stats.median
+            stats['max_length'] = int(length_stats.max)
+            stats['min_length'] = int(length_stats.min)
+            # Sample standard deviation, as pandas computed it
+            stats['length_stddev'] = length_stats.std(ddof=1) if length_stats.count > 1 else 0
         else:
-            # If Solution Text column doesn't exist
             stats['mean_length'] = 0
             stats['median_length'] = 0
             stats['max_length'] = 0
             stats['min_length'] = 0
             stats['length_stddev'] = 0
 
-        return stats
-
-    def calculate_length_distribution(self, data_frame, bins=10):
+    def calculate_length_distribution(self, table, bins=10):
         """
         Calculate the distribution of solution lengths.
 
         Args:
-            data_frame: Pandas DataFrame with submission data
+            table: SubmissionTable, or list of StudentSubmission objects
             bins: Number of bins for the distribution
 
         Returns:
             tuple: (bin_edges, counts) - numpy arrays for histogram data
-        """
-        if 'Solution Text' not in data_frame.columns:
-            return np.array([0, 1]), np.array([0])
-
-        solution_lengths = data_frame[data_frame['Solution Text'].notna() &
-                                     (data_frame['Solution Text'] != '')]['Solution Length']
 
-        if solution_lengths.empty:
-            return np.array([0, 1]), np.array([0])
-
-        hist, bin_edges = np.histogram(solution_lengths, bins=bins)
-        return bin_edges, hist
+        Raises:
+            TypeError: If table is a DataFrame, which this method used to take
+        """
+        return _as_table(table, 'table').length_histogram(bins)
 
-    def calculate_grade_distribution(self, submissions, bins=10):
+    def calculate_grade_distribution(self, table, bins=10):
         """
         Calculate the distribution of grades.
 
         Args:
-            submissions: List of StudentSubmission objects
+            table: SubmissionTable, or list of StudentSubmission objects (as
+                   this method took before)
             bins: Number of bins for the distribution
 
         Returns:
             tuple: (bin_edges, counts) - numpy arrays for histogram data
-        """
-        grades = [sub.get_grade() for sub in submissions if sub.get_grade() is not None]
-
-        if not grades:
-            return np.array([0, 100]), np.array([0])
 
-        hist, bin_edges = np.histogram(grades, bins=bins, range=(0, 100))
-        return bin_edges, hist
\ No newline at end of file
+        Raises:
+            TypeError: If table is a DataFrame or not iterable
+        """
+        return _as_table(table, 'table').grade_histogram(bins)
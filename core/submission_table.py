@@ -0,0 +1,281 @@
+"""
+SubmissionTable - Columnar view of the submissions of an assignment
+
+This module keeps the grades and solution lengths of all submissions in
+NumPy arrays, and their names and identifiers in interned string
+columns. The table is updated from the submissions' change notifications,
+so statistics, histograms and searches read whole columns instead of
+calling getters on every submission.
+"""
+
+import sys
+import threading
+
+from core.running_statistics import RunningStatistics
+from utils.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+
+
+INITIAL_CAPACITY = 64
+
+
+class SubmissionTable:
+    """
+    Column store of submission fields, one row per submission.
+
+    Grades are NaN until a submission is graded, and lengths are -1 until
+    the submission's files have been parsed. Running statistics of the
+    graded grades and of the non-empty solution lengths are updated with
+    every change.
+
+    Changes come from the Tk thread and from threads loading submissions,
+    so every method holds the table's lock. Code reading grade_stats or
+    length_stats directly should hold it too.
+    """
+
+    def __init__(self, submissions=()):
+        """
+        Build the table.
+
+        Args:
+            submissions: Optional StudentSubmission objects to add
+        """
+        self.submissions = []
+        self.names = []
+        self.identifiers = []
+        self._rows = {}
+
+        # Numeric columns, allocated with the first row so an empty table doesn't need numpy
+        self._grades = None
+        self._lengths = None
+
+        self.grade_stats = RunningStatistics()
+        self.length_stats = RunningStatistics()
+
+        # Stored values counted in the statistics for submissions that aren't loaded
+        # (e.g. in a resumed session), by key, until the submission itself is added
+        self._placeholders = {}
+        self._replaced_keys = set()
+
+        # Reentrant, since adding a submission can read its fields
+        self.lock = threading.RLock()
+
+        for submission in submissions:
+            self.add(submission)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.submissions)
+
+    def __contains__(self, submission):
+        with self.lock:
+            return submission in self._rows
+
+    def _grow(self):
+        """Allocate the numeric columns, or double their capacity."""
+        if self._grades is None:
+            self._grades = np.full(INITIAL_CAPACITY, np.nan)
+            self._lengths = np.full(INITIAL_CAPACITY, -1, dtype=np.int64)
+            return
+
+        capacity = len(self._grades) * 2
+        grades = np.full(capacity, np.nan)
+        lengths = np.full(capacity, -1, dtype=np.int64)
+        grades[:len(self._grades)] = self._grades
+        lengths[:len(self._lengths)] = self._lengths
+        self._grades = grades
+        self._lengths = lengths
+
+    def add_placeholder(self, key, grade, length):
+        """
+        Count the stored grade and solution length of a submission that isn't loaded.
+
+        The values only count in grade_stats and length_stats; the table gets
+        no row for them. Adding the submission with the same key replaces them.
+
+        Args:
+            key: Key of the submission, e.g. its row in a session store
+            grade: Stored grade, or None if ungraded
+            length: Stored solution length, or None if never parsed
+        """
+        with self.lock:
+            if key in self._placeholders or key in self._replaced_keys:
+                return
+            self._placeholders[key] = (grade, length)
+            self.grade_stats.replace(None, grade)
+            self.length_stats.replace(None, length if length else None)
+
+    def add(self, submission, replaces=None):
+        """
+        Add a submission, or refresh its row if it is already in the table.
+
+        Args:
+            submission: StudentSubmission to add
+            replaces: Optional key of the placeholder whose values the submission replaces
+
+        Returns:
+            int: Row of the submission
+        """
+        # Reading the solution of an unparsed submission would parse it now
+        length = submission.calculate_solution_length() if submission.is_loaded() else None
+
+        with self.lock:
+            if replaces is not None:
+                self._replaced_keys.add(replaces)
+                placeholder = self._placeholders.pop(replaces, None)
+                if placeholder is not None:
+                    grade, stored_length = placeholder
+                    self.grade_stats.replace(grade, None)
+                    self.length_stats.replace(stored_length if stored_length else None, None)
+
+            row = self._rows.get(submission)
+            if row is None:
+                row = len(self.submissions)
+                if self._grades is None or row == len(self._grades):
+                    self._grow()
+
+                self._rows[submission] = row
+                self.submissions.append(submission)
+                self.names.append(self._intern(submission.get_student_name()))
+                self.identifiers.append(self._intern(submission.get_identifier()))
+
+            self._set_grade(row, submission.get_grade())
+            if length is not None:
+                self._set_length(row, length)
+        return row
+
+    def update(self, submission, field):
+        """
+        Copy a changed field of a submission into the table.
+
+        Args:
+            submission: StudentSubmission that changed
+            field: Name of the changed field ('solution', 'grade' or 'feedback')
+        """
+        with self.lock:
+            row = self._rows.get(submission)
+            if row is None:
+                return
+
+            if field == 'grade':
+                self._set_grade(row, submission.get_grade())
+            elif field == 'solution':
+                # Called while loaders run, so take the current text without waiting for them
+                self._set_length(row, len(submission.solution))
+
+    def _set_grade(self, row, grade):
+        """Store a grade, using NaN for ungraded submissions, and update the grade statistics (caller holds the lock)."""
+        old_grade = self._grades[row]
+        new_grade = np.nan if grade is None else float(grade)
+        if old_grade == new_grade:
+            return
+
+        self._grades[row] = new_grade
+        self.grade_stats.replace(
+            None if np.isnan(old_grade) else old_grade,
+            None if np.isnan(new_grade) else new_grade
+        )
+
+    def _set_length(self, row, length):
+        """Store a solution length and update the statistics of the non-empty ones (caller holds the lock)."""
+        old_length = int(self._lengths[row])
+        if old_length == length:
+            return
+
+        self._lengths[row] = length
+        self.length_stats.replace(
+            old_length if old_length > 0 else None,
+            length if length > 0 else None
+        )
+
+    def _intern(self, value):
+        """Intern string values so repeated names share one object."""
+        return sys.intern(value) if isinstance(value, str) else value
+
+    @property
+    def grades(self):
+        """Grade column, NaN for ungraded submissions (a copy)."""
+        with self.lock:
+            if self._grades is None:
+                return np.full(0, np.nan)
+            return self._grades[:len(self.submissions)].copy()
+
+    @property
+    def lengths(self):
+        """Solution length column, -1 for unparsed submissions (a copy)."""
+        with self.lock:
+            if self._lengths is None:
+                return np.full(0, -1, dtype=np.int64)
+            return self._lengths[:len(self.submissions)].copy()
+
+    def get_graded_grades(self):
+        """
+        Get the grades of the graded submissions.
+
+        Returns:
+            numpy.ndarray: Grades in row order
+        """
+        grades = self.grades
+        return grades[~np.isnan(grades)]
+
+    def get_solution_lengths(self):
+        """
+        Get the solution lengths of the parsed submissions with a non-empty solution.
+
+        Returns:
+            numpy.ndarray: Lengths in row order
+        """
+        lengths = self.lengths
+        return lengths[lengths > 0]
+
+    def grade_histogram(self, bins=10):
+        """
+        Calculate the distribution of grades.
+
+        Args:
+            bins: Number of bins between 0 and 100
+
+        Returns:
+            tuple: (bin_edges, counts) - numpy arrays for histogram data
+        """
+        with self.lock:
+            if not self.grade_stats.count:
+                return np.array([0, 100]), np.array([0])
+            bin_edges, counts = self.grade_stats.histogram(bins, (0, 100))
+        return np.array(bin_edges), np.array(counts)
+
+    def length_histogram(self, bins=10):
+        """
+        Calculate the distribution of solution lengths.
+
+        Args:
+            bins: Number of bins
+
+        Returns:
+            tuple: (bin_edges, counts) - numpy arrays for histogram data
+        """
+        with self.lock:
+            if not self.length_stats.count:
+                return np.array([0, 1]), np.array([0])
+            bin_edges, counts = self.length_stats.histogram(bins)
+        return np.array(bin_edges), np.array(counts)
+
+    def find(self, text):
+        """
+        Find submissions whose student name or identifier contains a text.
+
+        Args:
+            text: Text to look for, ignoring case
+
+        Returns:
+            list: Matching StudentSubmission objects in row order
+        """
+        text = text.lower()
+        with self.lock:
+            rows = list(zip(self.submissions, self.names, self.identifiers))
+        return [
+            submission
+            for submission, name, identifier in rows
+            if text in str(name).lower() or text in str(identifier).lower()
+        ]
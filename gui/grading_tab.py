@@ -2,12 +2,35 @@
 Grading tab for the Assignment Grader GUI using Tkinter.
 """
 
+import os
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
+
+from core.prefetcher import Prefetcher
+from utils.thumbnail_cache import ThumbnailCache
 from .image_viewer import ImageViewer
 from .styling import apply_custom_style
 
 
+def format_processing_errors(errors, limit=10):
+    """
+    Describe files that could not be parsed, one per line.
+
+    Args:
+        errors: List of ProcessingError tuples
+        limit: Maximum number of files to list
+
+    Returns:
+        str: The errors, followed by a count of the ones not listed
+    """
+    details = "\n".join(
+        f"{os.path.basename(error.filename)}: {error.message}" for error in errors[:limit]
+    )
+    if len(errors) > limit:
+        details += f"\n... and {len(errors) - limit} more"
+    return details
+
+
 class GradingTab:
     """Tab for grading student submissions."""
 
@@ -25,7 +48,11 @@ class GradingTab:
         "Custom": ""
     }
 
-    def __init__(self, parent, assignment, on_complete_callback):
+    # Number of upcoming and previous submissions to prepare in the background
+    PREFETCH_COUNT = 3
+    PREFETCH_BEHIND = 1
+
+    def __init__(self, parent, assignment, on_complete_callback, on_save_callback=None):
         """
         Initialize the grading tab.
 
@@ -33,13 +60,25 @@ class GradingTab:
             parent: Parent frame
             assignment: Assignment instance to work with
             on_complete_callback: Function to call when grading is complete
+            on_save_callback: Optional function to call after a submission is saved
         """
         self.parent = parent
         self.assignment = assignment
         self.on_complete_callback = on_complete_callback
+        self.on_save_callback = on_save_callback
         self.submissions = []
         self.current_index = -1
         self.current_template = tk.StringVar()
+        self.current_file = tk.StringVar()
+
+        # (source, start, end) of each file in the displayed solution text
+        self.file_offsets = []
+
+        # Prepares neighbouring submissions for display while the current one is graded
+        self.prefetcher = Prefetcher(self._prepare_display)
+
+        # Scaled images, shared by the prefetcher and the image viewer
+        self.thumbnail_cache = ThumbnailCache()
 
         self.setup_ui()
 
@@ -80,6 +119,33 @@ class GradingTab:
         solution_group = ttk.LabelFrame(paned_window, text="Student Solution")
         paned_window.add(solution_group, weight=2)
 
+        # File selector, to jump to one of the files merged into the solution
+        file_frame = ttk.Frame(solution_group)
+        file_frame.pack(fill=tk.X, padx=5, pady=2)
+
+        ttk.Label(file_frame, text="Jump to file:").pack(side=tk.LEFT, padx=5)
+
+        self.file_combo = ttk.Combobox(
+            file_frame,
+            textvariable=self.current_file,
+            state="readonly",
+            width=40
+        )
+        self.file_combo.pack(side=tk.LEFT, padx=5)
+        self.file_combo.bind('<<ComboboxSelected>>', self.jump_to_file)
+
+        # Submissions are parsed lazily, so parse errors turn up while grading
+        self.parse_errors_btn = ttk.Button(
+            file_frame,
+            text="Parse Errors So Far...",
+            command=self.show_parse_errors
+        )
+        self.parse_errors_btn.pack(side=tk.RIGHT, padx=5)
+
+        self.parse_error_var = tk.StringVar(value="")
+        ttk.Label(file_frame, textvariable=self.parse_error_var, style='Warning.TLabel').pack(
+            side=tk.LEFT, padx=5)
+
         self.solution_text = scrolledtext.ScrolledText(solution_group, wrap=tk.WORD, height=10)
         self.solution_text.pack(fill=tk.BOTH, padx=5, pady=5, expand=True)
         self.solution_text.config(state=tk.DISABLED)
@@ -88,7 +154,7 @@ class GradingTab:
         image_group = ttk.LabelFrame(paned_window, text="Images")
         paned_window.add(image_group, weight=1)
 
-        self.image_viewer = ImageViewer(image_group)
+        self.image_viewer = ImageViewer(image_group, thumbnail_cache=self.thumbnail_cache)
         self.image_viewer.pack(fill=tk.BOTH, expand=True)
 
         # Add a test image button for debugging (can be hidden/removed in production)
@@ -189,6 +255,17 @@ class GradingTab:
             self.feedback_text.delete("1.0", tk.END)
             self.feedback_text.insert("1.0", template_text)
 
+    def jump_to_file(self, event=None):
+        """Scroll the solution text to the start of the selected file."""
+        position = self.file_combo.current()
+        if not 0 <= position < len(self.file_offsets):
+            return
+
+        _, start, end = self.file_offsets[position]
+        self.solution_text.tag_remove(tk.SEL, "1.0", tk.END)
+        self.solution_text.tag_add(tk.SEL, f"1.0 + {start} chars", f"1.0 + {end} chars")
+        self.solution_text.see(f"1.0 + {start} chars")
+
     def set_ui_enabled(self, enabled):
         """Enable or disable UI components."""
         state = tk.NORMAL if enabled else tk.DISABLED
@@ -210,6 +287,7 @@ class GradingTab:
         """
         self.submissions = submissions
         self.current_index = -1
+        self.prefetcher.clear()
 
         if self.submissions:
             self.progress_label.config(text=f"Submission 0 of {len(self.submissions)}")
@@ -238,8 +316,8 @@ class GradingTab:
             # Set the current index
             self.current_index = index
 
-            # Get the submission
-            submission = self.submissions[index]
+            # Get the submission and its scaled images, waiting for the prefetch if one is running
+            submission, prepared_images = self.prefetcher.get(index)
 
             # Update UI
             self.student_name_var.set(f"Student: {submission.get_student_name()}")
@@ -250,8 +328,22 @@ class GradingTab:
             self.solution_text.insert("1.0", submission.get_solution())
             self.solution_text.config(state=tk.DISABLED)
 
+            # List the files in the solution for the file selector
+            self.file_offsets = submission.get_source_offsets()
+            self.file_combo.config(values=[os.path.basename(source) for source, _, _ in self.file_offsets])
+            self.current_file.set("")
+
+            # Warn about files of this submission that could not be parsed
+            parse_errors = submission.get_parse_errors()
+            if parse_errors:
+                self.parse_error_var.set(
+                    f"Could not parse: {', '.join(os.path.basename(name) for name, _ in parse_errors)}"
+                )
+            else:
+                self.parse_error_var.set("")
+
             # Update image viewer with any images in the submission
-            self.image_viewer.set_images(submission)
+            self.image_viewer.set_images(submission, prepared_images)
 
             # Update feedback text
             self.feedback_text.delete("1.0", tk.END)
@@ -276,6 +368,47 @@ class GradingTab:
             # Enable UI
             self.set_ui_enabled(True)
 
+            # Start preparing the neighbouring submissions in the background,
+            # keeping the current one for quick back-and-forth navigation
+            first = max(index - self.PREFETCH_BEHIND, 0)
+            last = min(index + self.PREFETCH_COUNT, len(self.submissions) - 1)
+            self.prefetcher.prefetch(
+                [index] + [i for i in range(index + 1, last + 1)] + [i for i in range(first, index)]
+            )
+
+    def show_parse_errors(self):
+        """Report the files that could not be parsed so far."""
+        # Copy, as the prefetcher may record errors while this is shown
+        errors = list(self.assignment.file_processor.errors)
+        if not errors:
+            messagebox.showinfo("Parse Errors", "No parse errors so far.")
+            return
+
+        messagebox.showwarning(
+            "Parse Errors",
+            f"{len(errors)} file(s) could not be processed completely so far:\n\n"
+            f"{format_processing_errors(errors)}"
+        )
+
+    def _prepare_display(self, index):
+        """
+        Parse a submission and scale its images for display.
+        Runs on a prefetch thread, so it must not touch Tkinter widgets.
+
+        Args:
+            index: Index of the submission
+
+        Returns:
+            tuple: (StudentSubmission, result of ImageViewer.prepare_images)
+        """
+        submission = self.submissions[index]
+        submission.ensure_loaded()
+        return submission, self.image_viewer.prepare_images(submission)
+
+    def close(self):
+        """Stop background work."""
+        self.prefetcher.shutdown()
+
     def save_current_submission(self):
         """Save the current submission's feedback and grade."""
         if 0 <= self.current_index < len(self.submissions):
@@ -295,6 +428,15 @@ class GradingTab:
             except ValueError:
                 messagebox.showwarning("Invalid Grade", "Please enter a valid number for the grade.")
 
+            # Persist the change so it survives a crash
+            try:
+                self.assignment.save_submission(submission)
+            except Exception as e:
+                print(f"Error saving submission to session: {e}")
+
+            if self.on_save_callback:
+                self.on_save_callback()
+
     def previous_submission(self):
         """Load the previous submission."""
         if self.current_index > 0:
@@ -310,8 +452,8 @@ class GradingTab:
         # Save the current submission
         self.save_current_submission()
 
-        # Update the dataframe
-        self.assignment.update_dataframe()
+        # Update the grades and feedback in the dataframe, without parsing or loading pending submissions
+        self.assignment.update_dataframe(load_pending=False)
 
         # Call the completion callback
         self.on_complete_callback()
@@ -6,6 +6,7 @@ import tkinter as tk
 from tkinter import ttk
 
 from utils.image_utils import create_tk_image
+from utils.thumbnail_cache import ThumbnailCache
 
 
 class ImageViewer(tk.Frame):
@@ -13,17 +14,19 @@ class ImageViewer(tk.Frame):
     A component to display and browse images in a submission.
     """
 
-    def __init__(self, parent, images=None):
+    def __init__(self, parent, images=None, thumbnail_cache=None):
         """
         Initialize the image viewer.
 
         Args:
             parent: Parent widget
             images: List of Tkinter PhotoImage objects
+            thumbnail_cache: ThumbnailCache shared with other users of the scaled images
         """
         super().__init__(parent)
 
         self.images = images or []
+        self.thumbnail_cache = thumbnail_cache or ThumbnailCache()
         self.current_index = 0
         self.photo_references = []  # Keep references to prevent garbage collection
 
@@ -57,12 +60,41 @@ class ImageViewer(tk.Frame):
         description_label = ttk.Label(self, textvariable=self.description_var)
         description_label.pack(fill=tk.X, padx=5, pady=5)
 
-    def set_images(self, submission):
+        # Warning shown when other students submitted the same image
+        self.shared_var = tk.StringVar()
+        shared_label = ttk.Label(self, textvariable=self.shared_var, style='Warning.TLabel')
+        shared_label.pack(fill=tk.X, padx=5)
+
+    def prepare_images(self, submission):
+        """
+        Scale the images of a submission and find the ones other students also submitted.
+        This does not touch Tkinter, so it can run on a background thread.
+
+        Args:
+            submission: StudentSubmission object containing images
+
+        Returns:
+            list: List of (scaled PIL image or None, description, names of other students) tuples
+        """
+        image_store = submission.image_store
+        prepared_images = []
+
+        for image in submission.get_images():
+            thumbnail = self.thumbnail_cache.get_thumbnail(image.get_bytes(), content_hash=image.sha256)
+            shared_with = []
+            if image_store is not None:
+                shared_with = image_store.get_shared_owners(image, submission.get_student_name())
+            prepared_images.append((thumbnail, image.description, shared_with))
+
+        return prepared_images
+
+    def set_images(self, submission, prepared_images=None):
         """
         Set the images to display from a submission.
 
         Args:
             submission: StudentSubmission object containing images
+            prepared_images: Optional result of prepare_images for the submission
         """
         # Clear existing images and references
         self.images = []
@@ -72,18 +104,20 @@ class ImageViewer(tk.Frame):
         if submission and submission.has_images():
             print(f"Loading {len(submission.get_images())} images from submission")
 
-            # Get Tkinter-compatible images from the submission
-            for i in range(len(submission.get_images())):
-                image_data, image_format, description = submission.get_images()[i]
+            if prepared_images is None:
+                prepared_images = self.prepare_images(submission)
 
-                # Create a Tkinter-compatible image
-                photo = create_tk_image(image_data)
+            # Get Tkinter-compatible images from the submission
+            for i, (image_data, description, shared_with) in enumerate(prepared_images):
+                # Create a Tkinter-compatible image from the scaled copy
+                photo = create_tk_image(image_data) if image_data is not None else None
 
                 if photo:
                     self.photo_references.append(photo)  # Keep reference to prevent garbage collection
                     self.images.append({
                         'image': photo,
-                        'description': description
+                        'description': description,
+                        'shared_with': shared_with
                     })
                     print(f"Loaded image {i+1}: {description}")
                 else:
@@ -107,6 +141,7 @@ class ImageViewer(tk.Frame):
             self.counter_label.config(text="Image 0 of 0")
             self.image_label.config(text="No images available", image=None)
             self.description_var.set("")
+            self.shared_var.set("")
             self.prev_btn.config(state=tk.DISABLED)
             self.next_btn.config(state=tk.DISABLED)
             return
@@ -125,11 +160,31 @@ class ImageViewer(tk.Frame):
         # Update counter and description
         self.counter_label.config(text=f"Image {self.current_index + 1} of {len(self.images)}")
         self.description_var.set(current_image['description'])
+        self.shared_var.set(self._describe_sharing(current_image.get('shared_with')))
 
         # Update button states
         self.prev_btn.config(state=tk.NORMAL if self.current_index > 0 else tk.DISABLED)
         self.next_btn.config(state=tk.NORMAL if self.current_index < len(self.images) - 1 else tk.DISABLED)
 
+    def _describe_sharing(self, shared_with, max_names=3):
+        """
+        Describe which other students submitted an image.
+
+        Args:
+            shared_with: Names of the other students
+            max_names: Maximum number of names to list
+
+        Returns:
+            str: The warning text, or an empty string if the image is not shared
+        """
+        if not shared_with:
+            return ""
+
+        names = ", ".join(str(name) for name in shared_with[:max_names])
+        if len(shared_with) > max_names:
+            names += f" and {len(shared_with) - max_names} more"
+        return f"Shared image: also submitted by {names}"
+
     def previous_image(self):
         """Display the previous image."""
         if self.current_index > 0:
@@ -3,9 +3,37 @@ Initialization tab for the Assignment Grader GUI using Tkinter.
 """
 
 import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 
+from core.file_processor import IngestCancelled
+from core.session_store import DEFAULT_SESSION_DIR, find_latest_graded_session
+from .grading_tab import format_processing_errors
+
+
+# How often the event queue of the initialization thread is checked
+POLL_INTERVAL_MS = 100
+
+# Share of the progress bar reached after loading the names and after parsing the files
+NAMES_PROGRESS = 5
+FILES_PROGRESS = 90
+
+# Seconds of parsing before an estimate of the remaining time is shown
+MIN_ETA_SECONDS = 1.0
+
+
+def _format_megabytes(size):
+    """Format a size in bytes as megabytes."""
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def _format_duration(seconds):
+    """Format a duration as minutes and seconds."""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
 
 class InitializationTab:
     """Tab for initializing the assignment grading process."""
@@ -23,6 +51,11 @@ class InitializationTab:
         self.assignment = assignment
         self.on_complete_callback = on_complete_callback
 
+        # Initialization thread, its event queue and the event that cancels it
+        self.worker = None
+        self.events = None
+        self.cancel_event = None
+
         self.setup_ui()
 
     def setup_ui(self):
@@ -99,10 +132,18 @@ class InitializationTab:
         status_label = ttk.Label(progress_frame, textvariable=self.status_var)
         status_label.pack(anchor=tk.W)
 
+        self.cancel_btn = ttk.Button(progress_frame, text="Cancel", command=self.cancel_initialization,
+                                     state=tk.DISABLED)
+        self.cancel_btn.pack(anchor=tk.E)
+
         # Initialize button
         self.init_btn = ttk.Button(main_frame, text="Initialize Assignment", command=self.initialize_assignment)
         self.init_btn.pack(fill=tk.X, padx=5, pady=10)
 
+        # Resume button
+        self.resume_btn = ttk.Button(main_frame, text="Resume Saved Session...", command=self.resume_session)
+        self.resume_btn.pack(fill=tk.X, padx=5, pady=(0, 10))
+
         # Check if we have default paths
         try:
             if hasattr(self.assignment, 'gradebook_csv_file_path'):
@@ -162,6 +203,22 @@ class InitializationTab:
             messagebox.showwarning("Missing Input", "Please enter an assignment name.")
             return
 
+        # Offer to resume a saved session of this assignment before parsing it again
+        saved_path, graded = find_latest_graded_session(self.name_var.get())
+        if graded:
+            answer = messagebox.askyesnocancel(
+                "Saved Session Found",
+                f"The latest saved session of '{self.name_var.get()}' has {graded} graded submission(s):\n"
+                f"{os.path.basename(saved_path)}\n\n"
+                "Resume it instead of processing the files again?\n\n"
+                "Choose No to start a new session; the saved one is kept."
+            )
+            if answer is None:
+                return
+            if answer:
+                self._resume_from(saved_path)
+                return
+
         # Update assignment properties
         self.assignment.gradebook_csv_file_path = self.csv_path_var.get()
         self.assignment.submissions_zip_path = self.zip_path_var.get()
@@ -172,45 +229,226 @@ class InitializationTab:
         self.assignment.set_reference_solution(reference_solution)
 
         # Update UI
-        self.init_btn.config(state=tk.DISABLED)
+        self._set_running(True)
         self.status_var.set("Loading student names...")
-        self.progress_var.set(10)
-        self.parent.update()  # Force UI update
+        self.progress_var.set(0)
+
+        # Parse on a worker thread so the window keeps responding; it reports through a queue
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = threading.Thread(
+            target=self._load_in_background,
+            args=(self.events, self.cancel_event),
+            name="initialize",
+            daemon=True
+        )
+        self.worker.start()
+        self.parent.after(POLL_INTERVAL_MS, self._poll_events)
+
+    def cancel_initialization(self):
+        """Ask the initialization thread to stop after the file it is parsing."""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_btn.config(state=tk.DISABLED)
+            self.status_var.set("Cancelling...")
+
+    def _set_running(self, running):
+        """Enable the buttons for an initialization in progress, or for starting one."""
+        self.init_btn.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.resume_btn.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.cancel_btn.config(state=tk.NORMAL if running else tk.DISABLED)
+
+    def _load_in_background(self, events, cancel_event):
+        """
+        Load the assignment on the initialization thread.
+
+        Tkinter must only be used from the main thread, so this only puts
+        events on the queue: ('status', text, percent), ('files', IngestProgress),
+        ('done', ParsedSubmissions), ('cancelled',) or ('error', exception).
+
+        Args:
+            events: Queue to put the events on
+            cancel_event: threading.Event set to cancel loading
+        """
+        try:
+            # Only parse here; the loaded submissions are replaced on the Tk thread,
+            # as the grading and statistics tabs may still be using them
+            gradebook = self.assignment.read_gradebook()
+            events.put(('status', f"Found {len(gradebook.get_submitted_names())} student submissions "
+                                  "in the gradebook.", NAMES_PROGRESS))
+            if cancel_event.is_set():
+                raise IngestCancelled("Loading the submissions was cancelled")
+
+            parsed = self.assignment.parse_submissions(
+                gradebook=gradebook,
+                progress_callback=lambda progress: events.put(('files', progress)),
+                cancel_event=cancel_event
+            )
+            events.put(('done', parsed))
+        except IngestCancelled:
+            events.put(('cancelled',))
+        except Exception as e:
+            events.put(('error', e))
+
+    def _poll_events(self):
+        """Apply the events of the initialization thread to the UI, then check again later."""
+        latest_progress = None
+        try:
+            while True:
+                event = self.events.get_nowait()
+                kind = event[0]
+
+                # Only the newest file progress of a batch is worth drawing
+                if kind == 'files':
+                    latest_progress = event[1]
+                    continue
+                if latest_progress is not None:
+                    self._show_file_progress(latest_progress)
+                    latest_progress = None
+
+                if kind == 'status':
+                    self.status_var.set(event[1])
+                    self.progress_var.set(event[2])
+                elif kind == 'done':
+                    self._finish_initialization(event[1])
+                    return
+                elif kind == 'cancelled':
+                    self._reset("Initialization cancelled.")
+                    return
+                elif kind == 'error':
+                    messagebox.showerror(
+                        "Initialization Error",
+                        f"An error occurred during initialization:\n\n{str(event[1])}"
+                    )
+                    self._reset("Initialization failed. Please try again.")
+                    return
+        except queue.Empty:
+            pass
+
+        if latest_progress is not None:
+            self._show_file_progress(latest_progress)
+        self.parent.after(POLL_INTERVAL_MS, self._poll_events)
+
+    def _show_file_progress(self, progress):
+        """
+        Show how many files and bytes have been parsed and the estimated time left.
+
+        Args:
+            progress: IngestProgress from the file processor
+        """
+        if progress.bytes_total:
+            fraction = progress.bytes_done / progress.bytes_total
+        elif progress.files_total:
+            fraction = progress.files_done / progress.files_total
+        else:
+            fraction = 1.0
+        self.progress_var.set(NAMES_PROGRESS + fraction * (FILES_PROGRESS - NAMES_PROGRESS))
+
+        status = (f"Processing file {progress.files_done} of {progress.files_total} "
+                  f"({_format_megabytes(progress.bytes_done)} of {_format_megabytes(progress.bytes_total)})")
+
+        # Bytes are a better measure of the work left than files, which vary in size
+        if progress.elapsed >= MIN_ETA_SECONDS and 0 < progress.bytes_done < progress.bytes_total:
+            rate = progress.bytes_done / progress.elapsed
+            status += f", about {_format_duration((progress.bytes_total - progress.bytes_done) / rate)} left"
+        self.status_var.set(status)
+
+    def _finish_initialization(self, parsed):
+        """
+        Switch the assignment over to the parsed submissions, report problems
+        found while loading and hand over to grading.
+
+        Args:
+            parsed: ParsedSubmissions from the initialization thread
+        """
+        # The assignment can be initialized again or a session resumed from here on
+        self.worker = None
+        self._set_running(False)
 
+        num_students, submissions = self.assignment.install_submissions(parsed)
+
+        # Save the session so grading can be resumed after a crash
+        session_error = None
         try:
-            # Load student names
-            student_names = self.assignment.load_student_names()
-            self.status_var.set(f"Found {len(student_names)} student submissions in the gradebook.")
-            self.progress_var.set(40)
-            self.parent.update()  # Force UI update
-
-            # Load submissions
-            num_students, submissions = self.assignment.load_submissions()
-            self.status_var.set(f"Processed {len(submissions)} out of {num_students} submissions.")
-            self.progress_var.set(90)
-            self.parent.update()  # Force UI update
-
-            # Check for issues
-            if len(submissions) < num_students:
-                missing = num_students - len(submissions)
-                messagebox.showwarning(
-                    "Processing Warning",
-                    f"Could not process {missing} submissions. These students may have submitted "
-                    "but their submissions were not found or could not be processed."
-                )
-
-            # Finalize
-            self.progress_var.set(100)
-            self.status_var.set("Initialization complete!")
-
-            # Call the completion callback
-            self.on_complete_callback()
+            session_path = self.assignment.start_session()
+            print(f"Grading session saved to: {session_path}")
+        except Exception as e:
+            session_error = str(e)
+
+        # Check for issues
+        if len(submissions) < num_students:
+            missing = num_students - len(submissions)
+            messagebox.showwarning(
+                "Processing Warning",
+                f"Could not process {missing} submissions. These students may have submitted "
+                "but their submissions were not found or could not be processed."
+            )
+
+        # Report files that could not be parsed
+        errors = self.assignment.file_processor.errors
+        if errors:
+            messagebox.showwarning(
+                "File Processing Warning",
+                f"{len(errors)} file(s) could not be processed completely:\n\n"
+                f"{format_processing_errors(errors)}"
+            )
+
+        if session_error is not None:
+            messagebox.showwarning(
+                "Session Warning",
+                f"Grading progress will not be saved automatically:\n\n{session_error}"
+            )
+
+        # Finalize
+        self.progress_var.set(100)
+        self.status_var.set("Initialization complete!")
+
+        # Call the completion callback
+        self.on_complete_callback()
+
+    def _reset(self, status):
+        """Make the tab ready for another initialization after a cancel or error, clearing the progress."""
+        self.worker = None
+        self._set_running(False)
+        self.progress_var.set(0)
+        self.status_var.set(status)
+
+    def resume_session(self):
+        """Resume a saved grading session without re-processing the files."""
+        file_path = filedialog.askopenfilename(
+            title="Select Saved Session",
+            initialdir=DEFAULT_SESSION_DIR if os.path.isdir(DEFAULT_SESSION_DIR) else None,
+            filetypes=[("Session Files", "*.sqlite"), ("All Files", "*.*")]
+        )
+
+        if file_path:
+            self._resume_from(file_path)
+
+    def _resume_from(self, file_path):
+        """
+        Resume a saved session and hand over to grading.
+
+        Args:
+            file_path: Path to the session database
+        """
+        try:
+            num_submissions = self.assignment.resume_session(file_path)
         except Exception as e:
-            # Handle errors
             messagebox.showerror(
-                "Initialization Error",
-                f"An error occurred during initialization:\n\n{str(e)}"
+                "Resume Error",
+                f"An error occurred while resuming the session:\n\n{str(e)}"
             )
-            self.init_btn.config(state=tk.NORMAL)
-            self.progress_var.set(0)
-            self.status_var.set("Initialization failed. Please try again.")
\ No newline at end of file
+            return
+
+        # Show the restored assignment details
+        self.csv_path_var.set(self.assignment.gradebook_csv_file_path or "")
+        self.zip_path_var.set(self.assignment.submissions_zip_path or "")
+        self.name_var.set(self.assignment.assignment_name or "")
+        self.solution_text.delete("1.0", tk.END)
+        self.solution_text.insert("1.0", self.assignment.get_reference_solution())
+
+        self.progress_var.set(100)
+        self.status_var.set(f"Resumed session with {num_submissions} submissions.")
+
+        # Call the completion callback
+        self.on_complete_callback()
@@ -7,6 +7,7 @@ from tkinter import ttk, messagebox
 
 from core.assignment import Assignment
 from core.statistics import StatisticsCalculator
+from utils.lazy_import import preload_modules
 
 from .init_tab import InitializationTab
 from .grading_tab import GradingTab
@@ -14,6 +15,11 @@ from .stats_tab import StatsTab
 from .styling import apply_custom_style
 
 
+# Heavy modules imported in the background once the window is up, roughly in the order they are needed
+PRELOAD_MODULES = ['pandas', 'PIL.Image', 'filetype', 'html2text', 'PyPDF2', 'numpy', 'matplotlib.figure']
+PRELOAD_DELAY_MS = 200
+
+
 class MainWindow:
     """Main window for the Assignment Grader application using Tkinter."""
 
@@ -33,6 +39,7 @@ class MainWindow:
         self.grading_tab = None
         self.init_tab = None
         self.status_var = None
+        self.preload_thread = None
 
 
         # Get the screen width and height
@@ -50,8 +57,11 @@ class MainWindow:
         # Apply custom styling
         self.colors = apply_custom_style(root)
 
-        # Create model objects
+        # Create model objects; submissions are parsed as the grader reaches them,
+        # and their images wait in a memory-mapped file until they are shown
         self.assignment = Assignment()
+        self.assignment.lazy_loading = True
+        self.assignment.spill_images = True
         self.stats_calculator = StatisticsCalculator()
 
         # Set up the user interface
@@ -60,6 +70,14 @@ class MainWindow:
         # Set up close event handling
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
+        # Load the parsers and charting libraries while the user picks files
+        self.root.after(PRELOAD_DELAY_MS, self.start_preload)
+
+    def start_preload(self):
+        """Import the heavy modules on a background thread."""
+        if self.preload_thread is None:
+            self.preload_thread = preload_modules(PRELOAD_MODULES)
+
 
     def setup_ui(self):
         """Set up the user interface."""
@@ -72,8 +90,13 @@ class MainWindow:
 
         # Initialize tab contents
         self.init_tab = InitializationTab(init_frame, self.assignment, self.on_initialization_complete)
-        self.grading_tab = GradingTab(grading_frame, self.assignment, self.on_grading_complete)
         self.stats_tab = StatsTab(stats_frame, self.assignment, self.stats_calculator)
+        self.grading_tab = GradingTab(
+            grading_frame,
+            self.assignment,
+            self.on_grading_complete,
+            on_save_callback=self.stats_tab.schedule_update
+        )
 
         # Add tabs to the notebook
         self.tab_control.add(init_frame, text="Initialize")
@@ -107,6 +130,10 @@ class MainWindow:
         # Initialize the grading tab with the submissions
         self.grading_tab.initialize_grading(self.assignment.get_submissions())
 
+        # The statistics follow the grading as it happens
+        self.tab_control.tab(2, state="normal")
+        self.stats_tab.schedule_update()
+
         # Update status
         self.status_var.set(f"Initialized {len(self.assignment.get_submissions())} submissions for grading")
 
@@ -130,9 +157,17 @@ class MainWindow:
 
     def on_close(self):
         """Handle window close event."""
+        if self.assignment.session_store is not None:
+            message = ("Are you sure you want to exit?\n"
+                       "Your grading progress is saved and can be resumed from the Initialize tab.")
+        else:
+            message = "Are you sure you want to exit?\nAny unsaved changes will be lost."
+
         # Ask for confirmation
-        if messagebox.askyesno(
-            "Confirm Exit",
-            "Are you sure you want to exit?\nAny unsaved changes will be lost."
-        ):
+        if messagebox.askyesno("Confirm Exit", message):
+            # Save the submission being edited before closing the session
+            if self.grading_tab.current_index != -1:
+                self.grading_tab.save_current_submission()
+            self.grading_tab.close()
+            self.assignment.close_session()
             self.root.destroy()
\ No newline at end of file
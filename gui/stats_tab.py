@@ -2,6 +2,7 @@
 Statistics tab for the Assignment Grader GUI using Tkinter.
 """
 
+import importlib.util
 import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
@@ -11,15 +12,17 @@ import csv
 from utils.export_utils import export_statistics_to_csv, export_statistics_with_graphs
 from utils.email_utils import prepare_email_with_report
 
-# For plotting with matplotlib in Tkinter
-try:
-    import matplotlib
-    matplotlib.use("TkAgg")
-    from matplotlib.figure import Figure
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    HAS_MATPLOTLIB = True
-except ImportError:
-    HAS_MATPLOTLIB = False
+# For plotting with matplotlib in Tkinter; it is imported when the charts are first drawn
+HAS_MATPLOTLIB = importlib.util.find_spec("matplotlib") is not None
+Figure = None
+FigureCanvasTkAgg = None
+
+
+# Delay after the last saved submission before the statistics are refreshed
+LIVE_UPDATE_DELAY_MS = 500
+
+GRADE_BINS = 10
+LENGTH_BINS = 10
 
 
 class StatsTab:
@@ -39,12 +42,21 @@ class StatsTab:
         self.stats_calculator = stats_calculator
         self.stats = None
 
-        # For storing figures
+        # For storing figures, and the bars drawn in them
         self.grade_figure = None
         self.length_figure = None
+        self.grade_bars = None
+        self.length_bars = None
+
+        # Pending after() call of a live update, and whether one was skipped while hidden
+        self._pending_update = None
+        self._stale = False
 
         self.setup_ui()
 
+        # Apply live updates skipped while the tab was hidden when it is shown
+        self.parent.bind('<Map>', self._on_map, add='+')
+
     def setup_ui(self):
         """Set up the user interface for this tab."""
         # Main frame with padding
@@ -97,19 +109,46 @@ class StatsTab:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.summary_table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        # If matplotlib is available, add visualizations
+        # If matplotlib is available, reserve room for the visualizations
+        self.plots_frame = None
         if HAS_MATPLOTLIB:
-            self._setup_charts(main_frame)
+            self.plots_frame = ttk.Frame(main_frame)
+            self.plots_frame.pack(fill=tk.BOTH, padx=5, pady=5, expand=True)
         else:
             # Display message if matplotlib is not available
             self._setup_matplotlib_message(main_frame)
 
-    def _setup_charts(self, parent_frame):
-        """Set up the charts if matplotlib is available."""
-        # Create a frame for the plots
-        plots_frame = ttk.Frame(parent_frame)
-        plots_frame.pack(fill=tk.BOTH, padx=5, pady=5, expand=True)
+    def _ensure_charts(self):
+        """
+        Create the charts the first time they are drawn.
+
+        Returns:
+            bool: True if the charts are available
+        """
+        if self.grade_figure is not None:
+            return True
+        if self.plots_frame is None:
+            return False
+
+        global Figure, FigureCanvasTkAgg
+        try:
+            import matplotlib
+            matplotlib.use("TkAgg")
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        except ImportError as e:
+            print(f"Error loading matplotlib: {e}")
+            main_frame = self.plots_frame.master
+            self.plots_frame.destroy()
+            self.plots_frame = None
+            self._setup_matplotlib_message(main_frame)
+            return False
+
+        self._setup_charts(self.plots_frame)
+        return True
 
+    def _setup_charts(self, plots_frame):
+        """Set up the charts in their frame."""
         # Grade distribution
         grade_group = ttk.LabelFrame(plots_frame, text="Grade Distribution")
         grade_group.pack(side=tk.LEFT, fill=tk.BOTH, padx=5, pady=5, expand=True)
@@ -268,7 +307,7 @@ class StatsTab:
 
             # Export HTML report if matplotlib is available
             report_path = None
-            if HAS_MATPLOTLIB:
+            if self.grade_figure is not None:
                 with tempfile.NamedTemporaryFile(suffix='.html', delete=False) as temp_report_file:
                     report_path = temp_report_file.name
                     export_statistics_with_graphs(
@@ -310,39 +349,70 @@ class StatsTab:
                 except:
                     pass
 
-    def update_statistics(self):
-        """Update the statistics display."""
+    def update_statistics(self, live=False):
+        """
+        Update the statistics display.
+
+        Args:
+            live: True when refreshing while grading is in progress, which
+                  skips the warning shown when there is nothing to analyze
+        """
         # Get the assignment name
         self.assignment_name_var.set(f"Assignment: {self.assignment.assignment_name}")
 
         # Calculate statistics
         submissions = self.assignment.get_submissions()
         if not submissions:
-            messagebox.showwarning(
-                "No Data",
-                "No submissions to analyze. Please check the grading process."
-            )
+            if not live:
+                messagebox.showwarning(
+                    "No Data",
+                    "No submissions to analyze. Please check the grading process."
+                )
             return
 
         self.stats = self.stats_calculator.calculate_statistics(
             submissions,
-            self.assignment.data_frame
+            self.assignment.get_submission_table()
         )
 
         # Update summary table
         self._update_summary_table()
 
         # Update plots if matplotlib is available
-        if HAS_MATPLOTLIB:
+        if self._ensure_charts():
             self._update_grade_distribution()
             self._update_length_distribution()
 
+    def schedule_update(self):
+        """
+        Refresh the statistics shortly, after grading has paused.
+
+        Called whenever a submission is saved. Saves in quick succession
+        restart the delay, so navigating through submissions triggers a
+        single refresh once the grader stops.
+        """
+        if self._pending_update is not None:
+            self.parent.after_cancel(self._pending_update)
+        self._pending_update = self.parent.after(LIVE_UPDATE_DELAY_MS, self._run_scheduled_update)
+
+    def _run_scheduled_update(self):
+        """Refresh the statistics now, or when the tab is next shown if it is hidden."""
+        self._pending_update = None
+
+        if not self.parent.winfo_ismapped():
+            self._stale = True
+            return
+
+        self._stale = False
+        self.update_statistics(live=True)
+
+    def _on_map(self, event):
+        """Catch up on the updates skipped while the tab was hidden."""
+        if event.widget is self.parent and self._stale:
+            self._run_scheduled_update()
+
     def _update_summary_table(self):
         """Update the summary statistics table."""
-        # Clear the table
-        for item in self.summary_table.get_children():
-            self.summary_table.delete(item)
-
         if not self.stats:
             return
 
@@ -360,70 +430,106 @@ class StatsTab:
             ("Shortest solution", f"{self.stats['min_length']} characters")
         ]
 
-        # Add rows to the table
-        for metric, value in metrics:
-            self.summary_table.insert("", tk.END, values=(metric, value))
+        # Update the rows in place so the table doesn't flicker on live updates
+        items = self.summary_table.get_children()
+        if len(items) != len(metrics):
+            self.summary_table.delete(*items)
+            items = [self.summary_table.insert("", tk.END) for _ in metrics]
+
+        for item, (metric, value) in zip(items, metrics):
+            self.summary_table.item(item, values=(metric, value))
 
     def _update_grade_distribution(self):
         """Update the grade distribution plot."""
         if not self.stats or not self.stats['grades']:
             return
 
-        # Clear the plot
+        bin_edges, counts = self.stats_calculator.calculate_grade_distribution(
+            self.assignment.get_submission_table(),
+            bins=GRADE_BINS
+        )
+
         ax = self.grade_figure.gca()
-        ax.clear()
+        if self.grade_bars is None or len(self.grade_bars) != len(counts):
+            ax.clear()
+
+            # Create histogram bars once; later updates only change their heights
+            self.grade_bars = ax.bar(
+                bin_edges[:-1], counts, width=bin_edges[1:] - bin_edges[:-1],
+                align='edge', edgecolor='black', alpha=0.7
+            )
 
-        # Create histogram
-        ax.hist(self.stats['grades'], bins=10, edgecolor='black', alpha=0.7)
+            # Add labels and title
+            ax.set_xlabel('Grade')
+            ax.set_ylabel('Number of Submissions')
+            ax.set_title('Grade Distribution')
 
-        # Add labels and title
-        ax.set_xlabel('Grade')
-        ax.set_ylabel('Number of Submissions')
-        ax.set_title('Grade Distribution')
+            # Set x-axis range
+            ax.set_xlim(0, 100)
 
-        # Set x-axis range
-        ax.set_xlim(0, 100)
+            # Add grid
+            ax.grid(True, linestyle='--', alpha=0.7)
 
-        # Add grid
-        ax.grid(True, linestyle='--', alpha=0.7)
+            self.grade_figure.tight_layout()
+        else:
+            self._set_bar_heights(ax, self.grade_bars, counts)
 
-        # Redraw
-        self.grade_figure.tight_layout()
-        self.grade_canvas.draw()
+        # Redraw when Tk is idle
+        self.grade_canvas.draw_idle()
 
     def _update_length_distribution(self):
         """Update the solution length distribution plot."""
         if not self.stats or self.stats['mean_length'] == 0:
             return
 
-        # Clear the plot
-        ax = self.length_figure.gca()
-        ax.clear()
-
         # Get length distribution
         bin_edges, counts = self.stats_calculator.calculate_length_distribution(
-            self.assignment.data_frame,
-            bins=10
+            self.assignment.get_submission_table(),
+            bins=LENGTH_BINS
         )
+        labels = [f"{int(bin_edges[i])} - {int(bin_edges[i+1])}" for i in range(len(bin_edges)-1)]
 
-        # Create bar chart
-        x = range(len(counts))
+        ax = self.length_figure.gca()
+        if self.length_bars is None or len(self.length_bars) != len(counts):
+            ax.clear()
 
-        ax.bar(x, counts, width=0.8, edgecolor='black', alpha=0.7)
+            # Create bar chart
+            x = range(len(counts))
 
-        # Add labels
-        labels = [f"{int(bin_edges[i])} - {int(bin_edges[i+1])}" for i in range(len(bin_edges)-1)]
-        ax.set_xticks(x)
-        ax.set_xticklabels(labels, rotation=45, ha='right')
+            self.length_bars = ax.bar(x, counts, width=0.8, edgecolor='black', alpha=0.7)
+
+            # Add labels
+            ax.set_xticks(x)
+            ax.set_xticklabels(labels, rotation=45, ha='right')
+
+            # Add title and labels
+            ax.set_xlabel('Solution Length (characters)')
+            ax.set_ylabel('Number of Submissions')
+            ax.set_title('Solution Length Distribution')
+
+            # Add grid
+            ax.grid(True, linestyle='--', alpha=0.7)
 
-        # Add title and labels
-        ax.set_xlabel('Solution Length (characters)')
-        ax.set_ylabel('Number of Submissions')
-        ax.set_title('Solution Length Distribution')
+            self.length_figure.tight_layout()
+        else:
+            # The bins follow the range of the lengths, so relabel them too
+            self._set_bar_heights(ax, self.length_bars, counts)
+            ax.set_xticklabels(labels, rotation=45, ha='right')
+
+        # Redraw when Tk is idle
+        self.length_canvas.draw_idle()
+
+    def _set_bar_heights(self, ax, bars, counts):
+        """
+        Change the heights of existing bars and fit the y-axis to them.
 
-        # Add grid
-        ax.grid(True, linestyle='--', alpha=0.7)
+        Args:
+            ax: Axes holding the bars
+            bars: BarContainer returned by ax.bar
+            counts: New height of each bar
+        """
+        for bar, count in zip(bars, counts):
+            bar.set_height(count)
 
-        # Redraw
-        self.length_figure.tight_layout()
-        self.length_canvas.draw()
\ No newline at end of file
+        top = max(counts) if len(counts) else 0
+        ax.set_ylim(0, max(top, 1) * 1.05)
@@ -8,8 +8,6 @@ import tkinter as tk
 from tkinter import ttk
 import tkinter.font as tkfont
 
-from PyQt5.QtGui import QHoverEvent
-
 
 def apply_custom_style(root):
     """
@@ -55,6 +53,9 @@ def apply_custom_style(root):
     # TLabel
     style.configure('TLabel', background=colors['butter'], foreground=colors['text_dark'], font=('TkDefaultFont', 12))
 
+    # Warnings, such as images shared with other submissions
+    style.configure('Warning.TLabel', foreground=colors['dark_red'], font=('TkDefaultFont', 12, 'bold'))
+
     # TButton
     style.configure('TButton',
                    background=colors['medium_blue'],
@@ -5,19 +5,34 @@ Assignment Grader - Main entry point
 
 import sys
 import argparse
-import tkinter as tk
 import traceback
 
 
-def run_gui():
-    """Run the application in graphical user interface mode."""
+def run_gui(profile_startup=False):
+    """
+    Run the application in graphical user interface mode.
+
+    Args:
+        profile_startup: Print how long start-up and its imports take
+    """
     print("Starting GUI...")
+    profiler = None
+    if profile_startup:
+        from utils.import_profiler import ImportProfiler
+        profiler = ImportProfiler()
+        profiler.start()
+
+    # Imported here so the command line mode runs without Tkinter
+    import tkinter as tk
+
     try:
         # Create root window
         print("Creating Tkinter root window...")
         root = tk.Tk()
         root.title("George Assignment Grader")
         root.geometry("900x700")
+        if profiler:
+            profiler.mark("Tk root window created")
 
         # Just display a simple label to verify window is showing
         # print("Creating test label...")
@@ -37,6 +52,11 @@ def run_gui():
         except Exception as e:
             print(f"Error importing or creating MainWindow: {e}")
             traceback.print_exc()
+            app = None
+
+        if profiler:
+            profiler.mark("Main window created")
+            root.after_idle(_report_startup, root, app, profiler)
 
         # Start the application
         print("Starting mainloop...")
@@ -47,20 +67,49 @@ def run_gui():
         traceback.print_exc()
 
 
+def _report_startup(root, app, profiler):
+    """
+    Record that the window is shown, and print the start-up profile once
+    the background imports are done.
+
+    Args:
+        root: The root Tkinter window
+        app: MainWindow, or None if it could not be created
+        profiler: ImportProfiler recording since start-up
+    """
+    profiler.mark("Window shown")
+
+    def wait_for_preload():
+        thread = app.preload_thread if app is not None else None
+        if app is not None and (thread is None or thread.is_alive()):
+            root.after(50, wait_for_preload)
+            return
+
+        if thread is not None:
+            profiler.mark("Background imports finished")
+        profiler.stop()
+        print(profiler.report())
+
+    wait_for_preload()
+
+
 def main():
     """Main entry point function."""
-    print("Starting application...")
-
     parser = argparse.ArgumentParser(description='Assignment Grader Tool')
-    parser.add_argument('--cli', action='store_true', help='Run in command line mode')
+    parser.add_argument('--cli', nargs=argparse.REMAINDER, metavar='COMMAND',
+                        help='Run a headless command instead of the GUI (see --cli --help)')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Print how long start-up takes and which imports it spends time on')
     args = parser.parse_args()
 
-    if args.cli:
-        print("Running in CLI mode")
-        # run_cli()
-    else:
-        print("Running in GUI mode")
-        run_gui()
+    if args.cli is not None:
+        # stdout carries the command's JSON result, so nothing else is printed here
+        from cli import run_cli
+        sys.exit(run_cli(args.cli))
+
+    print("Starting application...")
+    print("Running in GUI mode")
+    run_gui(profile_startup=args.profile_startup)
 
     print("Application finished")
 
@@ -2,6 +2,7 @@
 Models module for domain objects.
 """
 
-from .student_submission import StudentSubmission
+from .image_record import ImageRecord, ImageBlobStore
+from .student_submission import StudentSubmission, SolutionSegment
 
-__all__ = ['StudentSubmission']
\ No newline at end of file
+__all__ = ['StudentSubmission', 'SolutionSegment', 'ImageRecord', 'ImageBlobStore']
\ No newline at end of file
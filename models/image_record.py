@@ -0,0 +1,218 @@
+"""
+ImageRecord class - Compact model for an image in a submission.
+
+An image is kept as its encoded bytes together with its format, pixel
+dimensions and content hash. It is only decoded when it is displayed.
+The bytes can be moved into an ImageBlobStore, a temporary file read
+through a memory map, so that images which are not on screen do not
+stay in memory.
+"""
+
+import hashlib
+import io
+import mmap
+import tempfile
+import threading
+
+from utils.image_utils import image_to_bytes
+from utils.lazy_import import lazy_import
+
+Image = lazy_import('PIL.Image')
+
+
+class ImageBlobStore:
+    """
+    Append-only temporary file holding image bytes, read through a memory map.
+    """
+
+    def __init__(self, directory=None):
+        """
+        Create the blob file.
+
+        Args:
+            directory: Directory for the temporary file (system default if None)
+        """
+        self._file = tempfile.TemporaryFile(prefix="george_images_", dir=directory)
+        self._size = 0
+        self._map = None
+
+        # Images are added and read from the Tk thread and from prefetch threads
+        self._lock = threading.Lock()
+
+    def append(self, data):
+        """
+        Append bytes to the blob file.
+
+        Args:
+            data: Bytes to store
+
+        Returns:
+            int: Offset of the stored bytes
+        """
+        with self._lock:
+            offset = self._size
+            self._file.seek(offset)
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+            return offset
+
+    def read(self, offset, length):
+        """
+        Read bytes from the blob file.
+
+        Args:
+            offset: Offset returned by append
+            length: Number of bytes to read
+
+        Returns:
+            bytes: The stored bytes
+        """
+        with self._lock:
+            # The map only covers the file as it was when mapped; remap after appends
+            if self._map is None or len(self._map) < offset + length:
+                if self._map is not None:
+                    self._map.close()
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map[offset:offset + length]
+
+    @property
+    def size(self):
+        """Total number of bytes stored."""
+        return self._size
+
+    def close(self):
+        """Close the memory map and delete the blob file."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+
+
+class ImageRecord:
+    """Class representing one encoded image of a submission."""
+
+    def __init__(self, data, image_format="", description="", width=None, height=None, sha256=None):
+        """
+        Initialize a new ImageRecord instance.
+
+        Args:
+            data: Encoded image bytes
+            image_format: Format of the image (e.g., 'png', 'jpeg')
+            description: Description or context of the image
+            width: Width in pixels, if known
+            height: Height in pixels, if known
+            sha256: Hex digest of the bytes, if already computed
+        """
+        self.image_format = image_format
+        self.description = description
+        self.width = width
+        self.height = height
+        self.size = len(data)
+        self.sha256 = sha256 or hashlib.sha256(data).hexdigest()
+
+        # Bytes in memory, or the blob store and offset holding them once spilled
+        self._data = data
+        self._blob_store = None
+        self._blob_offset = None
+
+    @classmethod
+    def from_image_data(cls, image_data, image_format="", description=""):
+        """
+        Build a record from raw image bytes or a decoded PIL image.
+        Raw bytes are checked by reading the image header, which is
+        enough to get the dimensions without decoding the pixels.
+
+        Args:
+            image_data: Raw image data or PIL Image object
+            image_format: Format of the image (e.g., 'png', 'jpeg')
+            description: Description or context of the image
+
+        Returns:
+            ImageRecord: The new record
+
+        Raises:
+            Exception: If the data is not a readable image
+        """
+        if isinstance(image_data, Image.Image):
+            width, height = image_data.size
+            data, image_format = image_to_bytes(image_data, image_format)
+        else:
+            data = bytes(image_data)
+            with Image.open(io.BytesIO(data)) as img:
+                width, height = img.size
+                image_format = image_format or (img.format or "").lower()
+
+        return cls(data, image_format, description, width, height)
+
+    def share(self, image_format="", description=""):
+        """
+        Get a record of the same content for another submission.
+
+        The bytes (in memory or in the blob store) are shared, not copied;
+        only the format and description are the new submission's own.
+
+        Args:
+            image_format: Format the other submission gave the image
+            description: The other submission's description of the image
+
+        Returns:
+            ImageRecord: The new record
+        """
+        record = ImageRecord.__new__(ImageRecord)
+        # Not copy.copy, which would read spilled bytes back through __getstate__
+        record.__dict__.update(self.__dict__)
+        record.image_format = image_format or self.image_format
+        record.description = description
+        return record
+
+    def get_bytes(self):
+        """
+        Get the encoded image bytes.
+
+        Returns:
+            bytes: Encoded image
+        """
+        if self._data is not None:
+            return self._data
+        return self._blob_store.read(self._blob_offset, self.size)
+
+    def open(self):
+        """
+        Decode the image.
+
+        Returns:
+            PIL.Image: The decoded image
+        """
+        return Image.open(io.BytesIO(self.get_bytes()))
+
+    def spill(self, blob_store):
+        """
+        Move the bytes out of memory into a blob store.
+
+        Args:
+            blob_store: ImageBlobStore to keep the bytes in
+        """
+        if self._data is None:
+            return
+        self._blob_offset = blob_store.append(self._data)
+        self._blob_store = blob_store
+        self._data = None
+
+    def is_spilled(self):
+        """Check if the bytes are kept in a blob store"""
+        return self._data is None
+
+    def __getstate__(self):
+        # Blob stores are local to a process, so pickles carry the bytes themselves
+        state = self.__dict__.copy()
+        state['_data'] = self.get_bytes()
+        state['_blob_store'] = None
+        state['_blob_offset'] = None
+        return state
+
+    def __repr__(self):
+        """String representation of the object"""
+        return (f"ImageRecord(format='{self.image_format}', size={self.width}x{self.height}, "
+                f"bytes={self.size}, description='{self.description}')")
@@ -4,55 +4,217 @@ StudentSubmission class - Model for a student's submission.
 
 import re
 import io
-import tempfile
-import html2text
-import docx2txt
-from PyPDF2 import PdfReader
-import filetype
 import os
-from PIL import Image
+import threading
+from collections import namedtuple
 
-from utils.image_utils import is_image_file, extract_images_from_docx
+from models.image_record import ImageRecord
+from utils.docx_utils import parse_docx
+from utils.image_utils import is_image_file
+from utils.lazy_import import lazy_import
+from utils.pdf_utils import extract_pdf_text, SLOW_PAGE_SECONDS
+
+html2text = lazy_import('html2text')
+filetype = lazy_import('filetype')
+
+
+# Kinds of solution segments
+SEGMENT_TEXT = 'text'
+SEGMENT_FILE = 'file'
+SEGMENT_SEPARATOR = 'separator'
+
+# A part of a solution: its kind, the file it came from (or None), and its text
+SolutionSegment = namedtuple('SolutionSegment', ['kind', 'source', 'text'])
+
+# Shared empty values; each submission gets its own container on first write
+_NO_ITEMS = ()
+_NO_FIELDS = frozenset()
 
 
 class StudentSubmission:
     """Class representing a single student's submission."""
 
+    # Slots instead of a per-object __dict__ keep large classes small in memory
+    __slots__ = (
+        'submission_id', 'student_name', 'identifier', 'email',
+        '_segments', '_solution_text', 'grade', 'feedback',
+        'images', 'parse_errors', 'dirty_fields', 'change_listener',
+        '_pending_loaders', '_load_lock', 'parse_cache', 'image_store'
+    )
+
+    # ImageStore given to new submissions, shared by all copies of an image
+    default_image_store = None
+
     def __init__(self, submission_id, student_name):
         """Initialize a new StudentSubmission instance."""
         self.submission_id = submission_id
         self.student_name = student_name
         self.identifier = ""
         self.email = ""
-        self.solution = ""
+        # The solution is kept as a tuple of ordered segments; the flat text is built on first use
+        self._segments = _NO_ITEMS
+        self._solution_text = ""
         self.grade = None
         self.feedback = ""
-        # List to store images found in the submission
-        # Each entry is a tuple of (image_data, image_format, description)
-        self.images = []
-
-    def set_solution(self, solution_text):
+        # ImageRecords of the images found in the submission
+        self.images = _NO_ITEMS
+        # Problems hit while parsing files for this submission
+        # Each entry is a tuple of (filename, message)
+        self.parse_errors = _NO_ITEMS
+        # Names of fields changed since they were last synced to the gradebook,
+        # and an optional callback(submission, field) notified of each change
+        self.dirty_fields = _NO_FIELDS
+        self.change_listener = None
+        # Deferred parsing: callables(submission) that fill in the solution and
+        # images the first time they are needed (see ensure_loaded)
+        self._pending_loaders = _NO_ITEMS
+        self._load_lock = None
+        # Optional ParseCache used to skip re-parsing DOCX and PDF files
+        self.parse_cache = None
+        # Optional ImageStore that shares one record between all copies of an image
+        self.image_store = self.default_image_store
+
+    @property
+    def solution(self):
+        """Flat solution text, without waiting for pending loaders"""
+        if self._solution_text is None:
+            self._solution_text = "".join(segment.text for segment in self._segments)
+        return self._solution_text
+
+    def set_solution(self, solution_text, source=None):
         """Set the solution text for this student submission"""
-        self.solution = solution_text
+        if solution_text != self.solution:
+            kind = SEGMENT_FILE if source is not None else SEGMENT_TEXT
+            self._segments = (SolutionSegment(kind, source, solution_text),) if solution_text else _NO_ITEMS
+            self._solution_text = solution_text
+            self._mark_dirty('solution')
         return self.solution
 
+    def set_solution_segments(self, segments):
+        """
+        Replace the solution with a list of segments.
+
+        Args:
+            segments: List of SolutionSegment objects in text order
+        """
+        self._segments = tuple(segments)
+        self._solution_text = None
+        self._mark_dirty('solution')
+
+    def append_solution_segments(self, segments, separator=None):
+        """
+        Add segments to the end of the solution without rebuilding its text.
+
+        Args:
+            segments: List of SolutionSegment objects to add
+            separator: Optional text put between the existing solution and the new segments
+        """
+        if separator:
+            segments = [SolutionSegment(SEGMENT_SEPARATOR, None, separator)] + list(segments)
+        # Only the segment references are copied, never their text
+        self._segments += tuple(segments)
+        self._solution_text = None
+        self._mark_dirty('solution')
+
+    def get_solution_segments(self):
+        """
+        Get the segments of the solution.
+
+        Returns:
+            list: List of SolutionSegment objects in text order
+        """
+        self.ensure_loaded()
+        return list(self._segments)
+
+    def get_source_offsets(self):
+        """
+        Get where the text of each source file starts and ends in the solution.
+
+        Returns:
+            list: List of (source, start, end) tuples, in text order
+        """
+        self.ensure_loaded()
+        offsets = []
+        position = 0
+        for segment in self._segments:
+            end = position + len(segment.text)
+            if segment.source is not None:
+                offsets.append((segment.source, position, end))
+            position = end
+        return offsets
+
     def get_solution(self):
         """Get the solution text for this student submission"""
+        self.ensure_loaded()
         return self.solution
 
+    def add_loader(self, loader):
+        """
+        Defer part of the parsing of this submission until its content is first needed.
+
+        Args:
+            loader: Callable taking this submission, which sets its solution and images
+        """
+        if self._load_lock is None:
+            self._load_lock = threading.RLock()
+            self._pending_loaders = []
+        self._pending_loaders.append(loader)
+
+    def get_pending_loaders(self):
+        """
+        Get the loaders that have not run yet.
+
+        Returns:
+            list: Pending loader callables
+        """
+        return list(self._pending_loaders)
+
+    def is_loaded(self):
+        """Check if all deferred parsing has been done"""
+        return self._load_lock is None
+
+    def ensure_loaded(self):
+        """
+        Run any pending loaders. Safe to call from several threads;
+        callers wait until the content is complete.
+        """
+        load_lock = self._load_lock
+        if load_lock is None:
+            return
+
+        with load_lock:
+            while self._pending_loaders:
+                loader = self._pending_loaders.pop(0)
+                try:
+                    loader(self)
+                except Exception as e:
+                    self.record_parse_error(self.student_name, f"Error loading submission: {e}")
+            self._pending_loaders = _NO_ITEMS
+            self._load_lock = None
+
     def add_image(self, image_data, image_format="", description=""):
         """
         Add an image to this submission.
 
         Args:
-            image_data: Raw image data or PIL Image object
-            image_format: Format of the image (e.g., 'png', 'jpeg')
-            description: Description or context of the image
+            image_data: Raw image data, PIL Image object or ImageRecord
+            image_format: Format of the image (e.g., 'png', 'jpeg'), if not a record
+            description: Description or context of the image, if not a record
 
         Returns:
             int: Index of the added image
         """
-        self.images.append((image_data, image_format, description))
+        if isinstance(image_data, ImageRecord):
+            record = image_data
+        else:
+            record = ImageRecord.from_image_data(image_data, image_format, description)
+
+        if self.image_store is not None:
+            record = self.image_store.add(record, self.student_name)
+
+        if not self.images:
+            self.images = []
+        self.images.append(record)
         return len(self.images) - 1
 
     def get_images(self):
@@ -60,8 +222,9 @@ class StudentSubmission:
         Get all images in this submission.
 
         Returns:
-            list: List of tuples (image_data, image_format, description)
+            list: List of ImageRecord objects
         """
+        self.ensure_loaded()
         return self.images
 
     def has_images(self):
@@ -71,6 +234,7 @@ class StudentSubmission:
         Returns:
             bool: True if there are images, False otherwise
         """
+        self.ensure_loaded()
         return len(self.images) > 0
 
     def get_image_tk(self, index, max_width=400, max_height=300):
@@ -91,17 +255,40 @@ class StudentSubmission:
         from utils.image_utils import create_tk_image
 
         if 0 <= index < len(self.images):
-            image_data, _, _ = self.images[index]
-            return create_tk_image(image_data, max_width, max_height)
+            return create_tk_image(self.images[index].get_bytes(), max_width, max_height)
         return None
 
+    def record_parse_error(self, filename, message):
+        """
+        Record a problem encountered while parsing one of the submission's files.
+
+        Args:
+            filename: Name of the file that could not be parsed
+            message: Description of the problem
+        """
+        if not self.parse_errors:
+            self.parse_errors = []
+        self.parse_errors.append((filename, str(message)))
+
+    def get_parse_errors(self):
+        """
+        Get the problems recorded while parsing files.
+
+        Returns:
+            list: List of tuples (filename, message)
+        """
+        self.ensure_loaded()
+        return self.parse_errors
+
     def get_student_name(self):
         """Get the name of the student"""
         return self.student_name
 
     def set_grade(self, grade):
         """Set the grade for this submission"""
-        self.grade = grade
+        if grade != self.grade:
+            self.grade = grade
+            self._mark_dirty('grade')
         return self.grade
 
     def get_grade(self):
@@ -110,9 +297,37 @@ class StudentSubmission:
 
     def set_feedback(self, feedback):
         """Set feedback for this submission"""
-        self.feedback = feedback
+        if feedback != self.feedback:
+            self.feedback = feedback
+            self._mark_dirty('feedback')
         return self.feedback
 
+    def _mark_dirty(self, field):
+        """
+        Record that a field changed and notify the change listener.
+
+        Args:
+            field: Name of the changed field ('solution', 'grade' or 'feedback')
+        """
+        self.dirty_fields = self.dirty_fields | {field}
+        if self.change_listener is not None:
+            self.change_listener(self, field)
+
+    def is_dirty(self):
+        """Check if any field changed since the last sync"""
+        return bool(self.dirty_fields)
+
+    def clear_dirty(self):
+        """
+        Mark all fields as synced.
+
+        Returns:
+            set: Names of the fields that were dirty
+        """
+        dirty_fields = set(self.dirty_fields)
+        self.dirty_fields = _NO_FIELDS
+        return dirty_fields
+
     def get_feedback(self):
         """Get feedback for this submission"""
         return self.feedback
@@ -152,24 +367,23 @@ class StudentSubmission:
             file_data = file_obj.read()
             try:
                 # Add the image to our list
-                img = Image.open(io.BytesIO(file_data))
                 self.add_image(
-                    img,
+                    file_data,
                     os.path.splitext(filename)[1][1:],  # Format without the dot
                     f"Image from file: {os.path.basename(filename)}"
                 )
                 solution_text = f"[Image file: {os.path.basename(filename)}]"
-                self.set_solution(solution_text)
+                self.set_solution(solution_text, filename)
                 return solution_text
             except Exception as e:
-                print(f"Error processing image file {filename}: {e}")
+                self.record_parse_error(filename, f"Error processing image file: {e}")
                 solution_text = f"[Error processing image file: {os.path.basename(filename)}]"
-                self.set_solution(solution_text)
+                self.set_solution(solution_text, filename)
                 return solution_text
 
         # Process regular document files
         solution_text = self.parse_file_to_text(file_obj, filename)
-        self.set_solution(solution_text)
+        self.set_solution(solution_text, filename)
         return solution_text
 
     def process_online_text(self, online_text):
@@ -216,9 +430,9 @@ class StudentSubmission:
         if filename.lower().endswith('.txt'):
             return self._parse_text_file(file_data)
         elif filename.lower().endswith('.docx'):
-            return self._parse_docx_file(file_data, filename)
+            return self._parse_with_cache(self._parse_docx_file, file_data, filename)
         elif filename.lower().endswith('.pdf'):
-            return self._parse_pdf_file(file_data, filename)
+            return self._parse_with_cache(self._parse_pdf_file, file_data, filename)
         elif filename.lower().endswith('.html'):
             return self._parse_html_file(file_data)
         elif filename.lower().endswith('.reg'):
@@ -226,20 +440,58 @@ class StudentSubmission:
         elif is_image_file(filename):
             # Add image to the images list
             try:
-                img = Image.open(io.BytesIO(file_data))
                 self.add_image(
-                    img,
+                    file_data,
                     os.path.splitext(filename)[1][1:],
                     f"Image from file: {os.path.basename(filename)}"
                 )
                 return f"[Image file: {os.path.basename(filename)}]"
             except Exception as e:
-                print(f"Error processing image file {filename}: {e}")
+                self.record_parse_error(filename, f"Error processing image file: {e}")
                 return f"[Error processing image file: {os.path.basename(filename)}]"
 
         # Use filetype detection for other formats
         return self._parse_by_file_type(file_data, filename)
 
+    def _parse_with_cache(self, parse_method, file_data, filename):
+        """
+        Run an expensive parser, reusing the cached result if the file was parsed before.
+
+        Args:
+            parse_method: Parser taking (file_data, filename) and returning the text
+            file_data: Raw bytes of the file
+            filename: Name of the file
+
+        Returns:
+            str: Extracted text content
+        """
+        if self.parse_cache is None:
+            return parse_method(file_data, filename)
+
+        cached = self.parse_cache.get(file_data, filename)
+        if cached is not None:
+            text, images = cached
+            for image_bytes, image_format, description in images:
+                self.add_image(image_bytes, image_format, description)
+            return text
+
+        num_images = len(self.images)
+        num_errors = len(self.parse_errors)
+        text = parse_method(file_data, filename)
+
+        # Only cache clean results so failed files are retried next time
+        if len(self.parse_errors) == num_errors:
+            try:
+                images = [
+                    (record.get_bytes(), record.image_format, record.description)
+                    for record in self.images[num_images:]
+                ]
+                self.parse_cache.put(file_data, filename, text, images)
+            except Exception as e:
+                self.record_parse_error(filename, f"Error writing parse cache: {e}")
+
+        return text
+
     def _parse_text_file(self, file_data):
         """Parse a text file with various encodings."""
         try:
@@ -252,74 +504,64 @@ class StudentSubmission:
 
     def _parse_docx_file(self, file_data, filename):
         """
-        Parse a docx file using a temporary file.
+        Parse a docx file in memory.
         Also extracts images if available.
         """
-        with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as temp_file:
-            temp_file.write(file_data)
-            temp_path = temp_file.name
-
         try:
-            # Create a temp directory for images
-            with tempfile.TemporaryDirectory() as img_dir:
-                # Extract text using docx2txt
-                text = docx2txt.process(temp_path, img_dir)
-
-                # Extract images directly from the docx file
-                extract_images_from_docx(temp_path, img_dir)
-
-                # Check for images and add them to our list
-                for img_filename in os.listdir(img_dir):
-                    if os.path.isdir(os.path.join(img_dir, img_filename)):
-                        continue  # Skip directories
-
-                    if is_image_file(img_filename):
-                        img_path = os.path.join(img_dir, img_filename)
-                        try:
-                            with open(img_path, 'rb') as img_file:
-                                img_data = img_file.read()
-
-                            # Load and add the image
-                            img = Image.open(io.BytesIO(img_data))
-                            self.add_image(
-                                img,
-                                os.path.splitext(img_filename)[1][1:],
-                                f"Image from document: {os.path.basename(filename)}"
-                            )
-                        except Exception as e:
-                            print(f"Error processing extracted image {img_filename}: {e}")
-
-            os.unlink(temp_path)
-
-            # Add a note about images if any were found
-            if self.has_images():
-                text += f"\n\n[This document contains {len(self.images)} image(s)]"
-
-            return text.strip()
+            text, images = parse_docx(file_data)
         except Exception as e:
-            os.unlink(temp_path)
-            print(f"Error processing .docx file {filename}: {e}")
+            self.record_parse_error(filename, f"Error processing .docx file: {e}")
             return ""
 
+        # Check and add the embedded images
+        for img_filename, img_data in images:
+            try:
+                self.add_image(
+                    img_data,
+                    os.path.splitext(img_filename)[1][1:],
+                    f"Image from document: {os.path.basename(filename)}"
+                )
+            except Exception as e:
+                self.record_parse_error(
+                    filename, f"Error processing extracted image {img_filename}: {e}"
+                )
+
+        # Add a note about images if any were found
+        if self.has_images():
+            text += f"\n\n[This document contains {len(self.images)} image(s)]"
+
+        return text.strip()
+
     def _parse_pdf_file(self, file_data, filename):
         """
-        Parse a PDF file using PyPDF2.
+        Parse a PDF file using PyPDF2, within the page and time limits of extract_pdf_text.
         Note: This simple implementation doesn't extract images from PDFs.
         """
         try:
-            content = ""
-            for page in PdfReader(stream=io.BytesIO(file_data)).pages:
-                content += f"{page.extract_text()}\n"
-
-            # Note: For comprehensive PDF image extraction, you would need a more
-            # sophisticated library like pdftoppm or a commercial PDF library
-            content += "\n[Note: Images in PDF files are not automatically extracted]"
-
-            return content.strip()
+            result = extract_pdf_text(file_data)
         except Exception as e:
-            print(f"Error processing PDF file {filename}: {e}")
+            self.record_parse_error(filename, f"Error processing PDF file: {e}")
             return ""
 
+        for page_index, message in result.errors:
+            self.record_parse_error(filename, f"Error extracting page {page_index + 1}: {message}")
+        if result.truncated:
+            self.record_parse_error(
+                filename,
+                f"PDF text truncated ({result.truncated}): "
+                f"extracted {result.pages_extracted} of {result.page_count} pages"
+            )
+
+        for page_index, seconds in result.page_timings:
+            if seconds > SLOW_PAGE_SECONDS:
+                print(f"Slow PDF page in {os.path.basename(filename)}: page {page_index + 1} took {seconds:.1f}s")
+
+        # Note: For comprehensive PDF image extraction, you would need a more
+        # sophisticated library like pdftoppm or a commercial PDF library
+        content = result.text + "\n\n[Note: Images in PDF files are not automatically extracted]"
+
+        return content.strip()
+
     def _parse_html_file(self, file_data):
         """Parse an HTML file using html2text."""
         return html2text.html2text(file_data.decode(errors='ignore')).strip()
@@ -334,15 +576,14 @@ class StudentSubmission:
             if mime.startswith('image/'):
                 # It's an image
                 try:
-                    img = Image.open(io.BytesIO(file_data))
                     self.add_image(
-                        img,
+                        file_data,
                         mime.split('/')[1],
                         f"Image from file: {os.path.basename(filename)}"
                     )
                     return f"[Image file: {os.path.basename(filename)}]"
                 except Exception as e:
-                    print(f"Error processing image {filename}: {e}")
+                    self.record_parse_error(filename, f"Error processing image: {e}")
                     return f"[Error processing image: {os.path.basename(filename)}]"
 
             elif mime == 'application/msword' or mime == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
@@ -352,7 +593,7 @@ class StudentSubmission:
                 return self._parse_pdf_file(file_data, filename)
 
             else:
-                print(f"Unsupported file type for {filename}: {mime}")
+                self.record_parse_error(filename, f"Unsupported file type: {mime}")
                 return f"[Unsupported file type: {mime}]"
         else:
             # If filetype can't determine the type, try to decode as text
@@ -392,7 +633,10 @@ class StudentSubmission:
         Returns:
             int: Length of the solution text
         """
-        return len(self.solution) if self.solution else 0
+        self.ensure_loaded()
+        if self._solution_text is not None:
+            return len(self._solution_text)
+        return sum(len(segment.text) for segment in self._segments)
 
     def __repr__(self):
         """String representation of the object"""
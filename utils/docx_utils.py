@@ -0,0 +1,124 @@
+"""
+DOCX utilities for the Assignment Grader.
+
+This module reads Word documents straight from their bytes. The text is
+extracted with a streaming XML parser following the same rules as
+docx2txt, and embedded images are read from the archive, so parsing a
+document writes nothing to disk.
+"""
+
+import io
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+from utils.image_utils import is_image_file
+
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+TEXT_TAG = WORD_NAMESPACE + 't'
+TAB_TAG = WORD_NAMESPACE + 'tab'
+BREAK_TAGS = (WORD_NAMESPACE + 'br', WORD_NAMESPACE + 'cr')
+PARAGRAPH_TAG = WORD_NAMESPACE + 'p'
+
+HEADER_PATTERN = re.compile(r'word/header[0-9]*\.xml')
+FOOTER_PATTERN = re.compile(r'word/footer[0-9]*\.xml')
+DOCUMENT_PART = 'word/document.xml'
+
+# Image extensions docx2txt extracts from anywhere in the archive
+LOOSE_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def xml_to_text(xml_file):
+    """
+    Extract the text of a WordprocessingML part.
+
+    Text runs are joined as they are, tabs become tab characters, line
+    breaks become newlines, and each paragraph starts with a blank line.
+
+    Args:
+        xml_file: File-like object with the XML part
+
+    Returns:
+        str: The extracted text
+    """
+    parts = []
+
+    for event, element in ET.iterparse(xml_file, events=('start', 'end')):
+        tag = element.tag
+        if event == 'start':
+            if tag == TAB_TAG:
+                parts.append('\t')
+            elif tag in BREAK_TAGS:
+                parts.append('\n')
+            elif tag == PARAGRAPH_TAG:
+                parts.append('\n\n')
+        elif tag == TEXT_TAG:
+            # Text is only complete once the element has ended
+            parts.append(element.text or '')
+        elif tag == PARAGRAPH_TAG:
+            # Paragraphs are done with; drop their subtree to keep memory flat
+            element.clear()
+
+    return ''.join(parts)
+
+
+def get_docx_text(zip_file):
+    """
+    Extract the text of an open DOCX archive: headers, body, then footers.
+
+    Args:
+        zip_file: zipfile.ZipFile of the document
+
+    Returns:
+        str: The extracted text
+    """
+    names = zip_file.namelist()
+    parts = [name for name in names if HEADER_PATTERN.match(name)]
+    parts.append(DOCUMENT_PART)
+    parts.extend(name for name in names if FOOTER_PATTERN.match(name))
+
+    texts = []
+    for name in parts:
+        with zip_file.open(name) as xml_file:
+            texts.append(xml_to_text(xml_file))
+    return ''.join(texts).strip()
+
+
+def iter_docx_images(zip_file):
+    """
+    Read the images embedded in an open DOCX archive.
+
+    Args:
+        zip_file: zipfile.ZipFile of the document
+
+    Yields:
+        tuple: (image file name, image bytes), once per file name
+    """
+    seen = set()
+    for name in zip_file.namelist():
+        basename = os.path.basename(name)
+        in_media = name.startswith('word/media/') and is_image_file(basename)
+        if not (in_media or os.path.splitext(name)[1] in LOOSE_IMAGE_EXTENSIONS):
+            continue
+
+        if basename in seen:
+            continue
+        seen.add(basename)
+        yield basename, zip_file.read(name)
+
+
+def parse_docx(file_data):
+    """
+    Extract the text and images of a DOCX document held in memory.
+
+    Args:
+        file_data: Raw bytes of the document
+
+    Returns:
+        tuple: (text, list of (image file name, image bytes))
+    """
+    with zipfile.ZipFile(io.BytesIO(file_data)) as zip_file:
+        return get_docx_text(zip_file), list(iter_docx_images(zip_file))
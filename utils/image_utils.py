@@ -6,15 +6,16 @@ for display in the Tkinter GUI.
 """
 
 import io
-import os
-import tempfile
-import zipfile
-from PIL import Image, ImageTk
 
+from utils.lazy_import import lazy_import
 
-def create_tk_image(image_data, max_width=400, max_height=300):
+Image = lazy_import('PIL.Image')
+
+
+def prepare_display_image(image_data, max_width=400, max_height=300):
     """
-    Convert image data to a Tkinter-compatible PhotoImage.
+    Decode and scale an image for display.
+    This does not touch Tkinter, so it can run on a background thread.
 
     Args:
         image_data: PIL Image object or raw image data
@@ -22,19 +23,44 @@ def create_tk_image(image_data, max_width=400, max_height=300):
         max_height: Maximum height for the displayed image
 
     Returns:
-        ImageTk.PhotoImage or None if conversion fails
+        PIL.Image: Scaled copy of the image, or None if decoding fails
     """
     try:
-        # If image_data is already a PIL Image
+        # If image_data is already a PIL Image, scale a copy so the original is kept intact
         if isinstance(image_data, Image.Image):
-            img = image_data
+            img = image_data.copy()
         else:
             # Otherwise, open it from raw data
             img = Image.open(io.BytesIO(image_data))
 
         # Resize image to fit within maximum dimensions while preserving aspect ratio
         img.thumbnail((max_width, max_height), Image.LANCZOS)
+        return img
+    except Exception as e:
+        print(f"Error preparing image for display: {e}")
+        return None
+
+
+def create_tk_image(image_data, max_width=400, max_height=300):
+    """
+    Convert image data to a Tkinter-compatible PhotoImage.
 
+    Args:
+        image_data: PIL Image object or raw image data
+        max_width: Maximum width for the displayed image
+        max_height: Maximum height for the displayed image
+
+    Returns:
+        ImageTk.PhotoImage or None if conversion fails
+    """
+    # ImageTk loads Tkinter, which headless callers of this module don't have
+    from PIL import ImageTk
+
+    img = prepare_display_image(image_data, max_width, max_height)
+    if img is None:
+        return None
+
+    try:
         # Convert to Tkinter-compatible format
         photo = ImageTk.PhotoImage(img)
         return photo
@@ -43,63 +69,67 @@ def create_tk_image(image_data, max_width=400, max_height=300):
         return None
 
 
-def is_image_file(filename):
+def image_to_bytes(image_data, image_format=""):
     """
-    Check if a file is an image based on its extension.
+    Get the encoded bytes of an image.
 
     Args:
-        filename: Name of the file to check
+        image_data: PIL Image object or raw image data
+        image_format: Format to encode a PIL Image in if it has none of its own
 
     Returns:
-        bool: True if the file is likely an image, False otherwise
+        tuple: (image_bytes, image_format)
     """
-    image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp']
-    return any(filename.lower().endswith(ext) for ext in image_extensions)
+    if not isinstance(image_data, Image.Image):
+        return bytes(image_data), image_format
+
+    save_format = image_data.format or image_format or 'PNG'
+    if save_format.lower() == 'jpg':
+        save_format = 'JPEG'
+
+    buf = io.BytesIO()
+    image_data.save(buf, format=save_format)
+    return buf.getvalue(), image_format or save_format.lower()
 
 
-def extract_images_from_docx(docx_path, output_dir):
+def difference_hash(image, hash_size=8):
     """
-    Extract all images from a Word document.
+    Compute the difference hash (dHash) of an image.
+    Resized, recompressed or slightly edited copies of an image get hashes
+    that differ in only a few bits.
 
     Args:
-        docx_path: Path to the docx file
-        output_dir: Directory to save extracted images
+        image: PIL Image object
+        hash_size: Number of rows and columns compared (the hash has hash_size**2 bits)
 
     Returns:
-        list: Paths to extracted images
+        int: The hash
     """
-    extracted_files = []
+    # Let JPEG decode at reduced scale; this is a no-op for other formats
+    image.draft('L', (hash_size * 4, hash_size * 4))
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            offset = row * (hash_size + 1) + col
+            value = (value << 1) | (pixels[offset] > pixels[offset + 1])
+    return value
 
-    try:
-        # Word documents are zip files containing media
-        with zipfile.ZipFile(docx_path) as zf:
-            # List all files in the zip
-            file_list = zf.namelist()
-
-            # Extract all files that appear to be images
-            for file_path in file_list:
-                if file_path.startswith('word/media/'):
-                    # Extract to the output directory
-                    zf.extract(file_path, output_dir)
-
-                    # Get the extracted file path
-                    extracted_path = os.path.join(output_dir, file_path)
-
-                    # Move to a simpler location
-                    simple_name = os.path.basename(file_path)
-                    new_path = os.path.join(output_dir, simple_name)
-
-                    if os.path.exists(extracted_path):
-                        # Ensure the destination directory exists
-                        os.makedirs(os.path.dirname(new_path), exist_ok=True)
-
-                        # Move the file
-                        os.rename(extracted_path, new_path)
-                        extracted_files.append(new_path)
-    except Exception as e:
-        print(f"Error extracting docx images: {e}")
 
-    return extracted_files
+def is_image_file(filename):
+    """
+    Check if a file is an image based on its extension.
+
+    Args:
+        filename: Name of the file to check
+
+    Returns:
+        bool: True if the file is likely an image, False otherwise
+    """
+    image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp']
+    return any(filename.lower().endswith(ext) for ext in image_extensions)
 
 
 def create_test_image(width=200, height=200, color='red', text='Test'):
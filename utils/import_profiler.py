@@ -0,0 +1,150 @@
+"""
+Import timing for the Assignment Grader.
+
+This module measures how long each module takes to import, like
+python -X importtime, from inside the running program, and records
+start-up milestones such as the window appearing. It is used by
+main.py --profile-startup.
+"""
+
+import sys
+import threading
+import time
+
+
+class _TimedLoader:
+    """Loader wrapper that times creating and executing a module."""
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        # Extension modules are loaded here rather than in exec_module
+        create = getattr(self._loader, 'create_module', None)
+        if create is None:
+            return None
+        return self._profiler._timed(self._name, create, spec)
+
+    def exec_module(self, module):
+        try:
+            self._profiler._timed(self._name, self._loader.exec_module, module)
+        finally:
+            # Leave the real loader on the module for code that inspects it
+            module.__loader__ = self._loader
+            if getattr(module, '__spec__', None) is not None:
+                module.__spec__.loader = self._loader
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class ImportProfiler:
+    """
+    Meta path hook recording the import time of every module loaded while it is installed.
+
+    Times are cumulative (including the modules a module imports) and self
+    (excluding them), per thread, so imports on background threads are
+    measured separately from the main thread.
+    """
+
+    def __init__(self):
+        """Initialize the profiler."""
+        self.start_time = None
+
+        # Module name -> [cumulative seconds, self seconds, thread name]
+        self.timings = {}
+
+        # Thread name -> seconds spent in imports not nested in other timed imports
+        self.thread_totals = {}
+
+        # (label, seconds since start) in the order they happened
+        self.milestones = []
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start recording imports."""
+        self.start_time = time.perf_counter()
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def stop(self):
+        """Stop recording imports."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def mark(self, label):
+        """
+        Record a start-up milestone.
+
+        Args:
+            label: Description of the milestone
+        """
+        with self._lock:
+            self.milestones.append((label, time.perf_counter() - self.start_time))
+
+    def find_spec(self, fullname, path=None, target=None):
+        """Find a module with the other finders and wrap its loader to time it."""
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self, fullname)
+                return spec
+        return None
+
+    def _timed(self, name, function, *args):
+        """Call a loader step, adding its time to the module's timing."""
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+
+            thread = threading.current_thread().name
+            with self._lock:
+                timing = self.timings.setdefault(name, [0.0, 0.0, thread])
+                timing[0] += elapsed
+                timing[1] += elapsed - children
+                if not stack:
+                    self.thread_totals[thread] = self.thread_totals.get(thread, 0.0) + elapsed
+
+    def report(self, top=20):
+        """
+        Format the milestones and the slowest imports.
+
+        Args:
+            top: Number of imports to list
+
+        Returns:
+            str: The report
+        """
+        with self._lock:
+            milestones = list(self.milestones)
+            timings = dict(self.timings)
+            totals = dict(self.thread_totals)
+
+        lines = ["Start-up profile", "", "Milestones (seconds since start):"]
+        for label, seconds in milestones:
+            lines.append(f"  {seconds:8.3f}  {label}")
+
+        lines.extend(["", f"Modules imported: {len(timings)}"])
+        for thread, seconds in sorted(totals.items()):
+            lines.append(f"  Import time on {thread}: {seconds * 1000:.0f} ms")
+
+        lines.extend(["", "Slowest imports (ms, cumulative / self):"])
+        slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        for name, (cumulative, own, thread) in slowest:
+            lines.append(f"  {cumulative * 1000:8.1f} {own * 1000:8.1f}  {name}  [{thread}]")
+
+        return "\n".join(lines)
@@ -0,0 +1,103 @@
+"""
+Lazy imports for the Assignment Grader.
+
+Most of the start-up time goes to importing pandas, numpy, PIL, PyPDF2
+and matplotlib, none of which are needed to show the window. This module
+defers them: lazy_import returns a stand-in that imports the real module
+the first time one of its attributes is used, and preload_modules imports
+modules on a background thread so they are usually ready by then.
+"""
+
+import importlib
+import sys
+import threading
+import time
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    """
+
+    def __init__(self, name):
+        """
+        Initialize the stand-in.
+
+        Args:
+            name: Absolute name of the module (e.g., 'PIL.Image')
+        """
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        """Import the module, once; importlib serializes concurrent imports."""
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def is_loaded(self):
+        """
+        Check if the module has been imported, here or elsewhere.
+
+        Returns:
+            bool: True if the module is in sys.modules
+        """
+        return self._module is not None or self._name in sys.modules
+
+    def __getattr__(self, attr):
+        # Only called for attributes not set in __init__, i.e. the module's own
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded() else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    Get a module that is imported the first time it is used.
+
+    Args:
+        name: Absolute name of the module
+
+    Returns:
+        module or LazyModule: The module itself if it is already imported
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def preload_modules(names, on_done=None):
+    """
+    Import modules on a background thread.
+
+    Modules that are missing or fail to import are skipped; code using
+    them reports the error when it needs them.
+
+    Args:
+        names: Absolute names of the modules, in the order to import them
+        on_done: Optional function called on the background thread with a
+                 list of (name, seconds, error message or None) when done
+
+    Returns:
+        threading.Thread: The started daemon thread
+    """
+    def run():
+        results = []
+        for name in names:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+                error = None
+            except Exception as e:
+                error = str(e)
+            results.append((name, time.perf_counter() - start, error))
+
+        if on_done is not None:
+            on_done(results)
+
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,177 @@
+"""
+Index for matching submission folder names against student names.
+
+A folder matches a student when the normalized student name is contained in
+the normalized folder name, or the other way around. The first matching
+student in gradebook order wins. Normalized names are built once, and an
+Aho-Corasick automaton plus a trigram index find all matching students
+without comparing the folder against every name.
+"""
+
+from collections import deque
+
+from utils.text_utils import normalize_student_name
+
+
+NGRAM_SIZE = 3
+
+
+class StudentNameIndex:
+    """
+    Precomputed lookup structure over a list of student names.
+    """
+
+    def __init__(self, student_names):
+        """
+        Build the index.
+
+        Args:
+            student_names: List of student names in gradebook order
+        """
+        self.student_names = list(student_names)
+        self.normalized_names = [
+            normalize_student_name(name) if isinstance(name, str) else None
+            for name in self.student_names
+        ]
+
+        # Folders that matched more than one student, mapped to all matching names
+        self.ambiguities = {}
+
+        # Names that normalize to an empty string are contained in every folder
+        self._empty_positions = [
+            pos for pos, key in enumerate(self.normalized_names) if key == ""
+        ]
+
+        self._build_automaton()
+        self._build_ngram_index()
+
+    def _build_automaton(self):
+        """Build the Aho-Corasick automaton over the normalized names."""
+        # Trie transitions, failure links, and name positions ending at each state
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for pos, key in enumerate(self.normalized_names):
+            if not key:
+                continue
+
+            state = 0
+            for char in key:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(pos)
+
+        # Breadth-first pass to set failure links and merge outputs along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _build_ngram_index(self):
+        """Build the trigram index used to find names containing a folder name."""
+        self._ngrams = {}
+        for pos, key in enumerate(self.normalized_names):
+            if not key:
+                continue
+            for i in range(len(key) - NGRAM_SIZE + 1):
+                self._ngrams.setdefault(key[i:i + NGRAM_SIZE], set()).add(pos)
+
+    def _names_in_text(self, text):
+        """Find the positions of all names contained in the text."""
+        positions = set(self._empty_positions)
+
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            positions.update(self._output[state])
+
+        return positions
+
+    def _names_containing(self, text):
+        """Find the positions of all names that contain the text."""
+        if len(text) < NGRAM_SIZE:
+            # Too short for the trigram index; check every name
+            return {
+                pos for pos, key in enumerate(self.normalized_names)
+                if key is not None and text in key
+            }
+
+        candidates = None
+        for i in range(len(text) - NGRAM_SIZE + 1):
+            postings = self._ngrams.get(text[i:i + NGRAM_SIZE])
+            if not postings:
+                return set()
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return set()
+
+        return {pos for pos in candidates if text in self.normalized_names[pos]}
+
+    def find_matches(self, folder_name):
+        """
+        Find all students matching a folder name.
+
+        Args:
+            folder_name: Name of the submission folder
+
+        Returns:
+            list: Matching student names in gradebook order, without duplicates
+        """
+        folder_key = normalize_student_name(folder_name)
+        positions = self._names_in_text(folder_key) | self._names_containing(folder_key)
+
+        matches = []
+        for pos in sorted(positions):
+            name = self.student_names[pos]
+            if name not in matches:
+                matches.append(name)
+        return matches
+
+    def match(self, folder_name):
+        """
+        Match a folder name to a student, recording ambiguous matches.
+
+        Args:
+            folder_name: Name of the submission folder
+
+        Returns:
+            str: The first matching student name in gradebook order, or None
+        """
+        matches = self.find_matches(folder_name)
+        if not matches:
+            return None
+
+        if len(matches) > 1:
+            self.ambiguities[folder_name] = matches
+
+        return matches[0]
+
+    def get_ambiguity_report(self):
+        """
+        Get the folders that matched more than one student.
+
+        Returns:
+            list: List of (folder_name, chosen_name, all_matching_names) tuples
+        """
+        return [
+            (folder_name, matches[0], matches)
+            for folder_name, matches in self.ambiguities.items()
+        ]
@@ -0,0 +1,217 @@
+"""
+On-disk cache for parsed submission files.
+
+Parsing DOCX and PDF files is the slowest part of loading an assignment.
+This module stores the extracted text and images of each parsed file so
+that re-loading the same (or a re-downloaded) ZIP can skip the parsers.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+
+# Bump this whenever the parsers change their output, so stale entries are ignored
+PARSER_VERSION = "2"
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".george_grader", "parse_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+META_FILENAME = "meta.json"
+
+
+class ParseCache:
+    """
+    Content-addressed cache of parse results with a size cap and LRU eviction.
+
+    Each entry is a directory named after the SHA-256 of the parser version,
+    the file name and the file bytes. It holds a meta.json file with the
+    extracted text and image descriptions, and one file per image.
+    The modification time of meta.json marks when the entry was last used.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory to store the cache entries in
+            max_bytes: Maximum total size of the cache on disk
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        # Running total of the cache size, computed on first write
+        self._total_bytes = None
+
+    def make_key(self, file_data, filename):
+        """
+        Build the cache key for a file.
+
+        Args:
+            file_data: Raw bytes of the file
+            filename: Name of the file (its text appears in the parse result)
+
+        Returns:
+            str: Hex digest identifying the parse result
+        """
+        digest = hashlib.sha256()
+        digest.update(PARSER_VERSION.encode())
+        digest.update(b"\0")
+        digest.update(os.path.basename(filename).encode("utf-8", errors="replace"))
+        digest.update(b"\0")
+        digest.update(file_data)
+        return digest.hexdigest()
+
+    def get(self, file_data, filename):
+        """
+        Look up the parse result for a file.
+
+        Args:
+            file_data: Raw bytes of the file
+            filename: Name of the file
+
+        Returns:
+            tuple: (text, list of (image_bytes, image_format, description)) or None on a miss
+        """
+        entry_dir = self._entry_dir(self.make_key(file_data, filename))
+        meta_path = os.path.join(entry_dir, META_FILENAME)
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            images = []
+            for image in meta["images"]:
+                with open(os.path.join(entry_dir, image["file"]), "rb") as f:
+                    images.append((f.read(), image["format"], image["description"]))
+
+            # Mark the entry as recently used
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return meta["text"], images
+
+    def put(self, file_data, filename, text, images):
+        """
+        Store the parse result for a file.
+
+        Args:
+            file_data: Raw bytes of the file
+            filename: Name of the file
+            text: Extracted text
+            images: List of (image_bytes, image_format, description) tuples
+
+        Returns:
+            bool: True if the entry was stored, False otherwise
+        """
+        entry_dir = self._entry_dir(self.make_key(file_data, filename))
+        if os.path.exists(entry_dir):
+            return True
+
+        # Write into a scratch directory first so readers never see a partial entry
+        tmp_dir = os.path.join(self.cache_dir, f"tmp-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(tmp_dir)
+
+            meta = {"text": text, "images": []}
+            size = 0
+            for i, (image_bytes, image_format, description) in enumerate(images):
+                image_file = f"image{i}.{image_format or 'bin'}"
+                with open(os.path.join(tmp_dir, image_file), "wb") as f:
+                    f.write(image_bytes)
+                size += len(image_bytes)
+                meta["images"].append({
+                    "file": image_file,
+                    "format": image_format,
+                    "description": description
+                })
+
+            meta_json = json.dumps(meta)
+            with open(os.path.join(tmp_dir, META_FILENAME), "w", encoding="utf-8") as f:
+                f.write(meta_json)
+            size += len(meta_json)
+
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Another process may have stored the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return os.path.exists(entry_dir)
+
+        if self._total_bytes is None:
+            self._total_bytes = self._scan_total_bytes()
+        else:
+            self._total_bytes += size
+
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+        return True
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits its size cap.
+
+        Returns:
+            int: Number of entries removed
+        """
+        entries = []
+        for entry_dir in self._iter_entry_dirs():
+            try:
+                last_used = os.path.getmtime(os.path.join(entry_dir, META_FILENAME))
+            except OSError:
+                last_used = 0
+            entries.append((last_used, self._dir_size(entry_dir), entry_dir))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+
+        # Oldest entries first
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            removed += 1
+
+        self._total_bytes = total
+        return removed
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._total_bytes = 0
+
+    def _entry_dir(self, key):
+        """Get the directory of an entry, sharded by the first two hex digits."""
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _iter_entry_dirs(self):
+        """Yield the directories of all stored entries."""
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if shard.startswith("tmp-") or not os.path.isdir(shard_dir):
+                continue
+            for key in os.listdir(shard_dir):
+                yield os.path.join(shard_dir, key)
+
+    def _scan_total_bytes(self):
+        """Compute the total size of the cache on disk."""
+        return sum(self._dir_size(entry_dir) for entry_dir in self._iter_entry_dirs())
+
+    def _dir_size(self, path):
+        """Compute the total size of the files in a directory."""
+        total = 0
+        try:
+            for name in os.listdir(path):
+                total += os.path.getsize(os.path.join(path, name))
+        except OSError:
+            pass
+        return total
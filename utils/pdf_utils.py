@@ -0,0 +1,103 @@
+"""
+PDF utilities for the Assignment Grader.
+
+This module extracts the text of PDF files page by page, in order, with
+the one reader that was parsed to count the pages. Extraction stops at a
+page limit and a time budget so that one huge scanned document cannot
+stall loading a whole class, and a marker in the text shows where pages
+were skipped.
+
+Text extraction is pure Python and holds the GIL, so extracting pages on
+several threads would not be faster; submissions are already parsed in
+parallel a folder at a time.
+
+The time budget is checked between pages: a page being extracted when it
+runs out is finished, so one pathological page can still overrun it.
+"""
+
+import io
+import time
+from collections import namedtuple
+
+from utils.lazy_import import lazy_import
+
+PyPDF2 = lazy_import('PyPDF2')
+
+
+DEFAULT_MAX_PAGES = 300
+DEFAULT_TIME_BUDGET = 30.0
+
+# Pages taking longer than this are reported
+SLOW_PAGE_SECONDS = 2.0
+
+
+# Result of extracting the text of a PDF file
+# page_timings: list of (page_index, seconds); errors: list of (page_index, message)
+# truncated: description of why extraction stopped early, or None
+PdfText = namedtuple('PdfText', ['text', 'page_count', 'pages_extracted', 'page_timings', 'errors', 'truncated'])
+
+
+def _skipped_marker(first, last, reason):
+    """
+    Describe pages left out of the extracted text.
+
+    Args:
+        first: Index of the first skipped page
+        last: Index of the last skipped page
+        reason: Why the pages were skipped
+
+    Returns:
+        str: Marker such as '[pages 9-16 skipped: time budget of 30s reached]'
+    """
+    if first == last:
+        return f"[page {first + 1} skipped: {reason}]"
+    return f"[pages {first + 1}-{last + 1} skipped: {reason}]"
+
+
+def extract_pdf_text(file_data, max_pages=DEFAULT_MAX_PAGES, time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Extract the text of a PDF file within a page limit and a time budget.
+
+    Args:
+        file_data: Raw bytes of the PDF file
+        max_pages: Maximum number of pages to extract (None for no limit)
+        time_budget: Seconds after which no more pages are started (None for
+                     no limit); best-effort, as a page already started is finished
+
+    Returns:
+        PdfText: The page texts joined with newlines, with a marker in place
+                 of each run of pages that was skipped
+    """
+    start = time.monotonic()
+    deadline = start + time_budget if time_budget is not None else None
+
+    reader = PyPDF2.PdfReader(stream=io.BytesIO(file_data))
+    page_count = len(reader.pages)
+    wanted = page_count if max_pages is None else min(page_count, max_pages)
+
+    parts = []
+    page_timings = []
+    errors = []
+    truncated = None
+
+    for page_index in range(wanted):
+        if deadline is not None and time.monotonic() > deadline:
+            truncated = f"time budget of {time_budget:g}s reached"
+            parts.append(_skipped_marker(page_index, wanted - 1, truncated))
+            break
+
+        page_start = time.monotonic()
+        try:
+            parts.append(reader.pages[page_index].extract_text() or "")
+        except Exception as e:
+            errors.append((page_index, str(e)))
+            parts.append(_skipped_marker(page_index, page_index, "text could not be extracted"))
+        page_timings.append((page_index, time.monotonic() - page_start))
+
+    if wanted < page_count:
+        reason = f"page limit of {max_pages} reached"
+        parts.append(_skipped_marker(wanted, page_count - 1, reason))
+        truncated = truncated or reason
+
+    pages_extracted = len(page_timings) - len(errors)
+    return PdfText("\n".join(parts), page_count, pages_extracted, page_timings, errors, truncated)
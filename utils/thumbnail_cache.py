@@ -0,0 +1,134 @@
+"""
+In-memory cache of scaled images for the image viewer.
+
+Scaling a large scan with LANCZOS takes far longer than showing it, and
+the same images are shown again every time the grader goes back to a
+submission. This module keeps the scaled pixels of recently shown images,
+keyed by image content and target size, within a memory budget.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from utils.image_utils import prepare_display_image
+from utils.lazy_import import lazy_import
+
+Image = lazy_import('PIL.Image')
+
+
+DEFAULT_MAX_MB = 64
+
+
+def image_content_hash(image_data):
+    """
+    Hash the content of an image.
+
+    Args:
+        image_data: PIL Image object or raw image data
+
+    Returns:
+        str: Hex digest of the image content
+    """
+    digest = hashlib.sha256()
+    if isinstance(image_data, Image.Image):
+        # Decoded images are hashed by their pixels, so the hash does not depend on an encoder
+        digest.update(f"{image_data.mode}:{image_data.size}".encode())
+        digest.update(image_data.tobytes())
+    else:
+        digest.update(image_data)
+    return digest.hexdigest()
+
+
+class ThumbnailCache:
+    """
+    Thread-safe LRU cache of scaled image buffers with a memory budget.
+
+    Entries are stored as raw RGB (or RGBA) pixel buffers rather than PIL
+    images, so their size is known exactly and they hold no file handles.
+    """
+
+    def __init__(self, max_mb=DEFAULT_MAX_MB):
+        """
+        Initialize the cache.
+
+        Args:
+            max_mb: Maximum total size of the cached buffers in megabytes
+        """
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        # (content hash, max width, max height) -> (mode, size, pixel buffer), oldest first
+        self._entries = OrderedDict()
+
+        # Used from the Tk thread and from prefetch threads
+        self._lock = threading.Lock()
+
+    def get_thumbnail(self, image_data, max_width=400, max_height=300, content_hash=None):
+        """
+        Get an image scaled for display, scaling it only on a cache miss.
+
+        Args:
+            image_data: PIL Image object or raw image data
+            max_width: Maximum width for the displayed image
+            max_height: Maximum height for the displayed image
+            content_hash: Hash of the image content, if already known
+
+        Returns:
+            PIL.Image: Scaled image, or None if decoding fails
+        """
+        key = (content_hash or image_content_hash(image_data), max_width, max_height)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry is not None:
+            mode, size, buffer = entry
+            return Image.frombytes(mode, size, buffer)
+
+        img = prepare_display_image(image_data, max_width, max_height)
+        if img is None:
+            return None
+
+        # Keep transparency; everything else is stored as plain RGB
+        if img.mode not in ('RGB', 'RGBA'):
+            has_alpha = img.mode in ('LA', 'PA') or 'transparency' in img.info
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+
+        self._store(key, (img.mode, img.size, img.tobytes()))
+        return img
+
+    def _store(self, key, entry):
+        """Add an entry and evict the least recently used ones over the budget."""
+        entry_bytes = len(entry[2])
+        if entry_bytes > self.max_bytes:
+            return
+
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self.total_bytes -= len(old_entry[2])
+
+            self._entries[key] = entry
+            self.total_bytes += entry_bytes
+
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted[2])
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
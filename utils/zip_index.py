@@ -0,0 +1,158 @@
+"""
+Index of the members of a submissions ZIP file.
+
+The central directory of the archive is read once, and all member reads
+go through a small pool of open handles instead of reopening the file.
+"""
+
+import os
+import threading
+import zipfile
+from collections import namedtuple
+from contextlib import contextmanager
+
+
+# A file stored in the ZIP archive
+ZipMember = namedtuple('ZipMember', ['filename', 'file_size', 'compress_size', 'crc'])
+
+
+class ZipIndex:
+    """
+    Folder to member index of a ZIP file, with pooled handles for reading members.
+    """
+
+    def __init__(self, zip_path, max_handles=4):
+        """
+        Open the archive and index its members.
+
+        Args:
+            zip_path: Path to the ZIP file
+            max_handles: Maximum number of open handles for concurrent readers
+        """
+        self.zip_path = zip_path
+        self.max_handles = max_handles
+
+        # Members by file name, and by parent folder in archive order
+        self.members = {}
+        self.folders = {}
+
+        self._lock = threading.Condition()
+        self._open_handles = []
+        self._idle_handles = []
+
+        zip_file = zipfile.ZipFile(zip_path, mode='r')
+        self._open_handles.append(zip_file)
+        self._idle_handles.append(zip_file)
+        self._build_index(zip_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _build_index(self, zip_file):
+        """Build the member and folder indexes from the central directory."""
+        for file_info in zip_file.infolist():
+            if file_info.is_dir():
+                continue
+
+            member = ZipMember(
+                file_info.filename,
+                file_info.file_size,
+                file_info.compress_size,
+                file_info.CRC
+            )
+            self.members[member.filename] = member
+
+            # Files in the root of the zip don't belong to a student folder
+            folder_path = os.path.dirname(member.filename)
+            if folder_path:
+                self.folders.setdefault(folder_path, []).append(member)
+
+    def get_folder_contents(self):
+        """
+        Get the files of each folder.
+
+        Returns:
+            dict: Dictionary mapping folder paths to lists of file paths
+        """
+        return {
+            folder: [member.filename for member in members]
+            for folder, members in self.folders.items()
+        }
+
+    def get_member(self, filename):
+        """
+        Get the index entry of a file.
+
+        Args:
+            filename: Path of the file in the archive
+
+        Returns:
+            ZipMember: The entry, or None if the file is not in the archive
+        """
+        return self.members.get(filename)
+
+    def total_size(self, filenames=None):
+        """
+        Get the uncompressed size of some or all of the files.
+
+        Args:
+            filenames: Paths of the files to count (all files if None)
+
+        Returns:
+            int: Total size in bytes
+        """
+        if filenames is None:
+            return sum(member.file_size for member in self.members.values())
+        return sum(self.members[name].file_size for name in filenames if name in self.members)
+
+    @contextmanager
+    def handle(self):
+        """
+        Borrow an open ZipFile handle from the pool.
+
+        A new handle is opened only when all existing ones are in use and
+        the pool is not full; otherwise the caller waits for one to be returned.
+
+        Yields:
+            zipfile.ZipFile: An open handle on the archive
+        """
+        with self._lock:
+            while not self._idle_handles and len(self._open_handles) >= self.max_handles:
+                self._lock.wait()
+
+            if self._idle_handles:
+                zip_file = self._idle_handles.pop()
+            else:
+                zip_file = zipfile.ZipFile(self.zip_path, mode='r')
+                self._open_handles.append(zip_file)
+
+        try:
+            yield zip_file
+        finally:
+            with self._lock:
+                self._idle_handles.append(zip_file)
+                self._lock.notify()
+
+    def read(self, filename):
+        """
+        Read the contents of a file in the archive.
+
+        Args:
+            filename: Path of the file in the archive
+
+        Returns:
+            bytes: The file contents
+        """
+        with self.handle() as zip_file:
+            return zip_file.read(filename)
+
+    def close(self):
+        """Close all open handles."""
+        with self._lock:
+            for zip_file in self._open_handles:
+                zip_file.close()
+            self._open_handles = []
+            self._idle_handles = []